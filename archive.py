@@ -0,0 +1,289 @@
+"""Cold tier of the event history: compressed, immutable, time-indexed segments.
+
+Recent events live in memory (EventCache) and in the segmented EventStore.
+When retention retires the store's oldest segment, its events are written
+here instead of being lost (EventStore `on_retire`), and backfill.py imports
+older history in bulk. Each archive segment is two files:
+
+* ``<name>.seg``: the segment's events sorted by time, in zlib-compressed
+  blocks of BLOCK_EVENTS lines. Each line is ``epoch, repo, event type,
+  sender`` and the event JSON, tab-separated, so filters run before any
+  JSON is decoded;
+* ``<name>.idx.json``: min/max timestamp and event count for the segment,
+  plus a sparse index with one entry per block: its time range, byte range,
+  and the repos and event types in it.
+
+The index file is written last, so a segment is only visible once complete.
+A range query skips segments outside the range, bisects the block list of
+the rest, and decompresses only blocks whose time range, repos and event
+types can match. It stops as soon as the remaining blocks cannot beat the
+`limit` results it already has.
+
+    python archive.py --stats
+    python archive.py --start 2024-01-01 --end 2024-02-01 --repo acme/widgets
+"""
+import argparse
+import bisect
+import heapq
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+from event_cache import event_repo, to_epoch
+from event_store import STORE_DIR
+
+ARCHIVE_DIR = Path(os.environ.get("EVENT_ARCHIVE_DIR", STORE_DIR.parent / "event_archive"))
+# set EVENT_ARCHIVE=0 to let retention delete old segments instead
+EVENT_ARCHIVE = os.environ.get("EVENT_ARCHIVE", "1") != "0"
+BLOCK_EVENTS = int(os.environ.get("ARCHIVE_BLOCK_EVENTS", 256))
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx.json"
+
+
+def _epoch(event: dict) -> float:
+    try:
+        return to_epoch(event.get("timestamp")) or 0.0
+    except ValueError:
+        return 0.0
+
+
+def _line(t: float, event: dict) -> bytes:
+    header = (repr(t), event_repo(event) or "", event.get("event_type") or "", event.get("sender") or "")
+    return "\t".join(header).encode() + b"\t" + json.dumps(event, separators=(",", ":"), default=str).encode()
+
+
+class ArchiveSegment:
+    def __init__(self, directory: Path, index: dict):
+        self.name = index["name"]
+        self.path = directory / (self.name + SEGMENT_SUFFIX)
+        self.count = index["count"]
+        self.min_ts = index["min_ts"]
+        self.max_ts = index["max_ts"]
+        repos, types = index["repos"], index["types"]
+        self.repos = set(repos)
+        self.types = set(types)
+        # (min_ts, max_ts, offset, length, count, repos, types); blocks are in time order
+        self.blocks = [(b[0], b[1], b[2], b[3], b[4], frozenset(repos[i] for i in b[5]), frozenset(types[i] for i in b[6]))
+                       for b in index["blocks"]]
+        self.block_max = [b[1] for b in self.blocks]
+
+    def read_block(self, i: int) -> list:
+        """The block's lines, each split into [epoch, repo, event type, sender, event JSON]."""
+        _, _, offset, length, _, _, _ = self.blocks[i]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return [line.split(b"\t", 4) for line in zlib.decompress(f.read(length)).split(b"\n")]
+
+    def blocks_in(self, start: float, end: float, repo: str = None, event_type: str = None):
+        """Indexes of the blocks that may hold matching events."""
+        i = bisect.bisect_left(self.block_max, start)
+        while i < len(self.blocks) and self.blocks[i][0] <= end:
+            block = self.blocks[i]
+            if (repo is None or repo in block[5]) and (event_type is None or event_type in block[6]):
+                yield i
+            i += 1
+
+
+class Archive:
+    def __init__(self, directory=ARCHIVE_DIR, block_events: int = BLOCK_EVENTS, cached_blocks: int = 64):
+        self.directory = Path(directory)
+        self.block_events = block_events
+        self.cached_blocks = cached_blocks
+        self._segments = {}
+        self._stamp = None
+        self._blocks = OrderedDict()
+        self._lock = threading.RLock()
+
+    # -- writing ---------------------------------------------------------------------
+
+    def write_segment(self, name: str, events) -> ArchiveSegment:
+        """Write `events` as one immutable segment; rewriting an existing `name` replaces it."""
+        records = sorted(((_epoch(e), e) for e in events), key=lambda r: r[0])
+        if not records:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        repos, types = {}, {}
+        blocks = []
+        data_path = self.directory / (name + SEGMENT_SUFFIX)
+        tmp = data_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            for i in range(0, len(records), self.block_events):
+                chunk = records[i:i + self.block_events]
+                blob = zlib.compress(b"\n".join(_line(t, e) for t, e in chunk), 6)
+                block_repos = {repos.setdefault(event_repo(e), len(repos)) for _, e in chunk}
+                block_types = {types.setdefault(e.get("event_type"), len(types)) for _, e in chunk}
+                blocks.append([chunk[0][0], chunk[-1][0], f.tell(), len(blob), len(chunk),
+                               sorted(block_repos), sorted(block_types)])
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, data_path)
+        index = {"name": name, "count": len(records), "min_ts": records[0][0], "max_ts": records[-1][0],
+                 "repos": list(repos), "types": list(types), "blocks": blocks}
+        index_path = self.directory / (name + INDEX_SUFFIX)
+        tmp = index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp, index_path)
+        segment = ArchiveSegment(self.directory, index)
+        with self._lock:
+            self._segments[name] = segment
+            for key in [key for key in self._blocks if key[0] == name]:
+                del self._blocks[key]
+        return segment
+
+    def retire(self, first_seq: int, events):
+        """EventStore `on_retire` hook: keep a segment dropped by retention.
+
+        Sequence numbers restart with a fresh event log or a legacy re-import, so an
+        archived segment is never replaced: a different one with the same first seq
+        gets a numbered suffix. The same events again (a retry after a crash between
+        archiving and deleting the store segment) are not archived twice.
+        """
+        events = list(events)
+        times = [_epoch(e) for e in events]
+        if not times:
+            return
+        base = name = f"log-{first_seq:020d}"
+        n = 0
+        while (self.directory / (name + INDEX_SUFFIX)).exists():
+            try:
+                index = json.loads((self.directory / (name + INDEX_SUFFIX)).read_text())
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"archive index {name}{INDEX_SUFFIX} is unreadable, not overwriting it") from e
+            if (index.get("count"), index.get("min_ts"), index.get("max_ts")) == (len(events), min(times), max(times)):
+                return
+            n += 1
+            name = f"{base}-{n}"
+        self.write_segment(name, events)
+
+    # -- reading ---------------------------------------------------------------------
+
+    def refresh(self):
+        """Pick up segments written by other processes (a directory stat when nothing changed)."""
+        try:
+            stamp = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            names = set()
+            for path in self.directory.glob("*" + INDEX_SUFFIX):
+                name = path.name[:-len(INDEX_SUFFIX)]
+                names.add(name)
+                if name not in self._segments:
+                    try:
+                        self._segments[name] = ArchiveSegment(self.directory, json.loads(path.read_text()))
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"Skipping unreadable archive index {path}: {e!r}")
+            for name in set(self._segments) - names:
+                del self._segments[name]
+            self._stamp = stamp
+
+    @property
+    def segments(self) -> list:
+        self.refresh()
+        with self._lock:
+            return sorted(self._segments.values(), key=lambda s: s.min_ts)
+
+    def _block(self, segment: ArchiveSegment, i: int) -> list:
+        key = (segment.name, i)
+        with self._lock:
+            records = self._blocks.get(key)
+            if records is not None:
+                self._blocks.move_to_end(key)
+                return records
+        records = segment.read_block(i)
+        with self._lock:
+            self._blocks[key] = records
+            while len(self._blocks) > self.cached_blocks:
+                self._blocks.popitem(last=False)
+        return records
+
+    def query(self, start=None, end=None, repo: str = None, event_type: str = None, sender: str = None,
+              limit: int = 50, oldest_first: bool = False) -> list:
+        """Matching (epoch, event) pairs in chronological order: the newest `limit` in the range,
+        or the oldest with `oldest_first`."""
+        start_t = to_epoch(start) if start not in (None, "") else float("-inf")
+        end_t = to_epoch(end) if end not in (None, "") else float("inf")
+        candidates = []
+        for segment in self.segments:
+            if segment.max_ts < start_t or segment.min_ts > end_t:
+                continue
+            if (repo is not None and repo not in segment.repos) or (event_type is not None and event_type not in segment.types):
+                continue
+            for i in segment.blocks_in(start_t, end_t, repo, event_type):
+                candidates.append((segment, i))
+        # newest: visit blocks by descending max time; oldest: by ascending min time
+        if oldest_first:
+            candidates.sort(key=lambda c: c[0].blocks[c[1]][0])
+        else:
+            candidates.sort(key=lambda c: c[0].blocks[c[1]][1], reverse=True)
+        repo_key, type_key, sender_key = (None if v is None else v.encode() for v in (repo, event_type, sender))
+        # bounded heap of the best `limit` matches; its root is the worst one kept
+        sign = -1 if oldest_first else 1
+        kept = []
+        for segment, i in candidates:
+            if len(kept) >= limit:
+                block = segment.blocks[i]
+                if (block[0] if oldest_first else block[1]) * sign < kept[0][0]:
+                    break
+            for n, (t, line_repo, line_type, line_sender, event) in enumerate(self._block(segment, i)):
+                t = float(t)
+                if t < start_t or t > end_t:
+                    continue
+                if (repo_key is not None and line_repo != repo_key) or (type_key is not None and line_type != type_key) \
+                        or (sender_key is not None and line_sender != sender_key):
+                    continue
+                item = (t * sign, segment.name, i, n, event)
+                if len(kept) < limit:
+                    heapq.heappush(kept, item)
+                elif item[0] > kept[0][0]:
+                    heapq.heapreplace(kept, item)
+        return sorted(((item[0] * sign, json.loads(item[4])) for item in kept), key=lambda m: m[0])
+
+    def stats(self) -> dict:
+        segments = self.segments
+        return {
+            "segments": len(segments),
+            "events": sum(s.count for s in segments),
+            "bytes": sum(s.path.stat().st_size for s in segments if s.path.exists()),
+            "min_ts": min((s.min_ts for s in segments), default=None),
+            "max_ts": max((s.max_ts for s in segments), default=None),
+        }
+
+
+_archive = None
+
+
+def get_archive() -> Archive:
+    global _archive
+    if _archive is None:
+        _archive = Archive()
+    return _archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=str(ARCHIVE_DIR))
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--repo")
+    parser.add_argument("--event-type")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    archive = Archive(args.dir)
+    if args.stats or not (args.start or args.end or args.repo or args.event_type):
+        print(json.dumps(archive.stats(), indent=2))
+        return
+    for _, event in archive.query(args.start, args.end, args.repo, args.event_type, limit=args.limit):
+        print(event.get("timestamp"), event.get("event_type"), event_repo(event), event.get("title"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Bulk-import historical GitHub events into the archive.
+
+Reads JSONL files (optionally .gz) with either stored events (objects with
+`event_type`, e.g. an export of another event log) or GH Archive / Events API
+records (`type`, `actor`, `repo`, `payload`, `created_at`), and writes them
+to the archive in batches of --batch events, one compressed segment per
+batch. A batch's segment is named after a hash of its input lines, so
+re-running an import replaces segments instead of duplicating them.
+
+By default, events at or after the oldest event still in the live event log
+are skipped, since the log already has them (use --until to change that).
+
+    python backfill.py 2024-*.json.gz --batch 20000
+    python backfill.py export.jsonl --since 2024-01-01 --until 2024-07-01
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import time
+from datetime import datetime
+
+import pytz
+
+from archive import Archive, ARCHIVE_DIR
+from event_cache import to_epoch
+from event_schema import slim_repository
+from event_store import get_event_store
+
+IST = pytz.timezone("Asia/Kolkata")
+EVENT_TYPES = {"PushEvent": "push", "PullRequestEvent": "pull_request", "IssuesEvent": "issues",
+               "ReleaseEvent": "release", "CreateEvent": "create", "DeleteEvent": "delete"}
+
+
+def _event_type(name: str) -> str:
+    if name in EVENT_TYPES:
+        return EVENT_TYPES[name]
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name.removesuffix("Event")).lower()
+
+
+def from_github_archive(record: dict) -> dict:
+    """A stored-event dict from one GH Archive / Events API record."""
+    event_type = _event_type(record.get("type") or "unknown")
+    payload = record.get("payload") or {}
+    repo = (record.get("repo") or {}).get("name")
+    created = datetime.fromisoformat(record["created_at"].replace("Z", "+00:00")).astimezone(IST)
+    pr = payload.get("pull_request") or {}
+    issue = payload.get("issue") or {}
+    release = payload.get("release") or {}
+    title, description, branch = "", "", None
+    if event_type == "pull_request":
+        title, description, branch = pr.get("title", ""), pr.get("body") or "", (pr.get("base") or {}).get("ref")
+    elif event_type == "issues":
+        title, description = issue.get("title", ""), issue.get("body") or ""
+    elif event_type == "push":
+        commits = payload.get("commits") or []
+        title = f"{payload.get('size', len(commits))} commits pushed"
+        description = "\n".join(c.get("message", "") for c in commits)
+        branch = (payload.get("ref") or "").split("/")[-1] or None
+    elif event_type == "release":
+        title, description = release.get("name") or release.get("tag_name", ""), release.get("body") or ""
+    elif event_type in ("create", "delete"):
+        title = f"{'Created' if event_type == 'create' else 'Deleted'} {payload.get('ref_type', '')}: {payload.get('ref') or ''}"
+        branch = payload.get("ref") if payload.get("ref_type") == "branch" else None
+    return {
+        "timestamp": created.isoformat(),
+        "event_type": event_type,
+        "action": payload.get("action"),
+        "repository": slim_repository({"full_name": repo, "owner": {"login": repo.split("/")[0] if repo else None}}),
+        "pr_number": pr.get("number") or payload.get("number"),
+        "title": title,
+        "description": description,
+        "sender": (record.get("actor") or {}).get("login"),
+        "base_branch": (pr.get("base") or {}).get("ref"),
+        "compare_branch": (pr.get("head") or {}).get("ref"),
+        "branch": branch,
+        "delivery_id": str(record["id"]) if record.get("id") else None,
+        "workflow": None,
+    }
+
+
+def to_event(record: dict) -> dict:
+    if "event_type" in record:
+        return {**record, "repository": slim_repository(record.get("repository"))}
+    if "type" in record and "created_at" in record:
+        return from_github_archive(record)
+    raise ValueError("neither a stored event nor a GH Archive record")
+
+
+def read_lines(paths):
+    for path in paths:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def oldest_live_timestamp():
+    for _, event in get_event_store(readonly=True).iter_from(0):
+        return event.get("timestamp")
+    return None
+
+
+def backfill(paths, archive: Archive, batch_size: int = 20000, since=None, until=None) -> dict:
+    since_t, until_t = to_epoch(since), to_epoch(until)
+    counts = {"read": 0, "imported": 0, "skipped": 0, "invalid": 0, "segments": 0}
+    batch, digest = [], hashlib.sha1()
+    started = time.perf_counter()
+
+    def flush():
+        archive.write_segment(f"import-{digest.hexdigest()[:16]}", batch)
+        counts["imported"] += len(batch)
+        counts["segments"] += 1
+        rate = counts["read"] / (time.perf_counter() - started)
+        print(f"  {counts['imported']} events imported in {counts['segments']} segments ({rate:.0f} lines/s)")
+
+    for line in read_lines(paths):
+        counts["read"] += 1
+        try:
+            event = to_event(json.loads(line))
+            t = to_epoch(event.get("timestamp"))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            counts["invalid"] += 1
+            continue
+        if t is None or (since_t is not None and t < since_t) or (until_t is not None and t >= until_t):
+            counts["skipped"] += 1
+            continue
+        batch.append(event)
+        digest.update(line)
+        if len(batch) >= batch_size:
+            flush()
+            batch, digest = [], hashlib.sha1()
+    if batch:
+        flush()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--archive", default=str(ARCHIVE_DIR))
+    parser.add_argument("--batch", type=int, default=20000, help="events per archive segment")
+    parser.add_argument("--since", help="skip events before this ISO time")
+    parser.add_argument("--until", help="skip events at or after this ISO time (default: oldest event in the live log)")
+    args = parser.parse_args()
+
+    until = args.until if args.until is not None else oldest_live_timestamp()
+    if args.until is None and until:
+        print(f"Skipping events from {until} on (already in the live event log)")
+    counts = backfill(args.paths, Archive(args.archive), args.batch, args.since, until)
+    print("✅ Backfill done:", counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Archive: backfill throughput and time-range query latency over a year of events.
+
+Writes --events synthetic events spread over a year and --repos repos to a
+JSONL export, imports it with backfill.py, then times random range queries
+(per window size, with and without a repo filter) on a freshly opened archive.
+
+    python benchmarks/bench_archive.py --events 500000 --repos 300 --queries 200
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytz  # noqa: E402
+
+from archive import Archive  # noqa: E402
+from backfill import backfill  # noqa: E402
+
+IST = pytz.timezone("Asia/Kolkata")
+WINDOWS = {"1h": timedelta(hours=1), "1d": timedelta(days=1), "7d": timedelta(days=7),
+           "30d": timedelta(days=30), "365d": timedelta(days=365)}
+TYPES = ["push", "pull_request", "issues", "workflow_run", "release", "create"]
+
+
+def write_export(path: Path, events: int, repos: int, start: datetime) -> None:
+    rng = random.Random(7)
+    step = timedelta(days=365) / events
+    with open(path, "w") as f:
+        for i in range(events):
+            repo = f"org{rng.randrange(repos) % 20}/repo{rng.randrange(repos)}"
+            event_type = rng.choice(TYPES)
+            f.write(json.dumps({
+                "timestamp": (start + step * i).isoformat(), "event_type": event_type, "action": "opened",
+                "repository": {"full_name": repo, "owner": {"login": repo.split("/")[0]}},
+                "pr_number": rng.randrange(1, 500) if event_type == "pull_request" else None,
+                "title": f"{event_type} #{i}", "description": "Change description. " * rng.randrange(1, 10),
+                "sender": f"user{rng.randrange(200)}", "branch": "main", "delivery_id": f"d{i}",
+            }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=500000)
+    parser.add_argument("--repos", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200, help="queries per window and filter")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=20000)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_archive_"))
+    start = IST.localize(datetime(2024, 1, 1))
+    export = tmp / "export.jsonl"
+    write_export(export, args.events, args.repos, start)
+
+    started = time.perf_counter()
+    counts = backfill([export], Archive(tmp / "archive"), args.batch)
+    elapsed = time.perf_counter() - started
+    archive = Archive(tmp / "archive")
+    stats = archive.stats()
+    print(f"backfill: {counts['imported']} events in {elapsed:.1f}s ({counts['imported'] / elapsed:.0f}/s); "
+          f"{export.stat().st_size / 1e6:.0f} MB JSONL -> {stats['bytes'] / 1e6:.1f} MB in {stats['segments']} segments")
+
+    rng = random.Random(11)
+    repos = [f"org{r % 20}/repo{r}" for r in range(args.repos)]
+    print(f"{'window':>7} {'filter':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'rows':>6}")
+    for name, window in WINDOWS.items():
+        for with_repo in (False, True):
+            times, rows = [], 0
+            for _ in range(args.queries):
+                lo = start + timedelta(seconds=rng.uniform(0, max(0.0, (timedelta(days=365) - window).total_seconds())))
+                repo = rng.choice(repos) if with_repo else None
+                t0 = time.perf_counter()
+                rows += len(archive.query(lo.isoformat(), (lo + window).isoformat(), repo=repo, limit=args.limit))
+                times.append(time.perf_counter() - t0)
+            times.sort()
+            print(f"{name:>7} {'repo' if with_repo else '-':>7} {statistics.median(times) * 1000:>8.2f} "
+                  f"{times[int(len(times) * 0.95) - 1] * 1000:>8.2f} {times[-1] * 1000:>8.2f} {rows / len(times):>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
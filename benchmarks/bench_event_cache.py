@@ -0,0 +1,70 @@
+"""Tool latency vs. number of stored events.
+
+Fills a throwaway event log with N copies of the seed events and times each
+github.py tool once cold (first load) and then warm (served from the cache),
+next to the old approach of json.loads()-ing a full JSON array per call.
+
+    python benchmarks/bench_event_cache.py --sizes 100 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+SEED = json.loads((ROOT / "github_events.json").read_text())
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(size: int, repeat: int):
+    tmp = Path(tempfile.mkdtemp(prefix="bench_events_"))
+    os.environ["EVENT_STORE_DIR"] = str(tmp / "log")
+    for name in ("event_store", "event_cache", "github"):
+        sys.modules.pop(name, None)
+    import event_store
+    event_store.LEGACY_EVENTS_FILE = tmp / "missing.json"
+    writer = event_store.EventStore(segment_max_bytes=64 * 1024 * 1024, max_segments=1024)
+    events = [SEED[i % len(SEED)] for i in range(size)]
+    for e in events:
+        writer.append(e, sync=False)
+    writer.close()
+    legacy = tmp / "github_events.json"
+    legacy.write_text(json.dumps(events))
+
+    import github
+    tools = {
+        "get_repository_detail": lambda: github.get_repository_detail.fn(),
+        "summarize_latest_event": lambda: github.summarize_latest_event.fn(),
+        "get_workflow_status": lambda: github.get_workflow_status.fn("build"),
+    }
+    row = {"events": size, "old_parse_us": timed(lambda: json.loads(legacy.read_text()))}
+    row["cold_load_us"] = timed(lambda: github.get_event_cache().refresh())
+    for name, fn in tools.items():
+        row[name + "_us"] = timed(fn, repeat)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    rows = [run(n, args.repeat) for n in args.sizes]
+    cols = list(rows[0])
+    print(" ".join(f"{c:>24}" for c in cols))
+    for r in rows:
+        print(" ".join(f"{r[c]:>24.1f}" if isinstance(r[c], float) else f"{r[c]:>24}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""GitHubClient against the local fake GitHub: cache hit rate, latency, quota use.
+
+    python benchmarks/bench_github_client.py --requests 500 --prs 20 --latency 0.02
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_github import FakeGitHub, start_in_thread  # noqa: E402
+from github_client import GitHubClient  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--prs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.latency, args.rate_limit)
+    start_in_thread(fake.app(), args.port)
+    client = GitHubClient(base_url=f"http://127.0.0.1:{args.port}", token="test")
+
+    started = time.perf_counter()
+    for i in range(args.requests):
+        number = i % args.prs + 1
+        client.get(f"repos/acme/widgets/pulls/{number}")
+        if i % 50 == 49:
+            client.request("PATCH", f"repos/acme/widgets/pulls/{number}", body={"state": "open"})
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} GETs in {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)")
+    print("client:", client.stats())
+    print("fake github:", fake.calls, "quota used:", fake.rate_limit - fake.remaining)
+
+
+if __name__ == "__main__":
+    main()
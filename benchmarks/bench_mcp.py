@@ -0,0 +1,121 @@
+"""Load test for mcp_server.py: concurrent MCP clients over streamable HTTP.
+
+Starts the fake GitHub API and mcp_server.py in a subprocess, then opens
+--clients fastmcp Clients that each make --calls tool calls, --concurrency at a
+time. PR detail lookups go to the fake GitHub (with --latency per request);
+get_event_stats is served from the local event cache.
+
+    python benchmarks/bench_mcp.py --clients 20 --calls 50 --concurrency 4 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path[:0] = [str(ROOT), str(HERE)]
+
+from fake_github import FakeGitHub, start_in_thread  # noqa: E402
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, str(ROOT / "mcp_server.py"), "--port", str(port)],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"mcp_server.py did not start on port {port}")
+
+
+async def run_client(url: str, client_id: int, calls: int, concurrency: int, prs: int, latencies: list, errors: list):
+    from fastmcp import Client
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i):
+        if i % 2:
+            name, arguments = "get_pull_request_details", {"repo": "acme/widgets", "pr_number": (client_id + i) % prs + 1}
+        else:
+            name, arguments = "get_event_stats", {"window": "24h"}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.call_tool(name, arguments)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(repr(e))
+
+    async with Client(url) as client:
+        await asyncio.gather(*(call(i) for i in range(calls)))
+
+
+async def warm_up(url: str):
+    """Load the event cache and the server's HTTP session before timing."""
+    from fastmcp import Client
+
+    async with Client(url) as client:
+        await client.call_tool("get_event_stats", {"window": "24h"})
+        await client.call_tool("get_pull_request_details", {"repo": "acme/widgets", "pr_number": 1})
+
+
+def pct(values: list, q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1] * 1000 if len(values) > 1 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8920)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=50, help="tool calls per client")
+    parser.add_argument("--concurrency", type=int, default=4, help="in-flight calls per client")
+    parser.add_argument("--client-limit", type=int, default=8, help="MCP_CLIENT_CONCURRENCY for the server")
+    parser.add_argument("--prs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake GitHub latency per request (s)")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.latency)
+    start_in_thread(fake.app(), args.port + 1)
+    tmp = tempfile.mkdtemp(prefix="bench_mcp_")
+    env = dict(os.environ, EVENT_STORE_DIR=f"{tmp}/event_log", STATE_DIR=f"{tmp}/state",
+               GITHUB_API_URL=f"http://127.0.0.1:{args.port + 1}", GITHUB_PAT="bench",
+               MCP_CLIENT_CONCURRENCY=str(args.client_limit))
+    proc = start_server(args.port, env)
+    try:
+        url = f"http://127.0.0.1:{args.port}/mcp"
+        asyncio.run(warm_up(url))
+        latencies, errors = [], []
+
+        async def run():
+            await asyncio.gather(*(run_client(url, i, args.calls, args.concurrency, args.prs, latencies, errors)
+                                   for i in range(args.clients)))
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+    total = args.clients * args.calls
+    print(f"{total} tool calls from {args.clients} clients in {elapsed:.2f}s ({total / elapsed:.0f} calls/s)")
+    if latencies:
+        print(f"latency ms: p50={pct(latencies, 50):.1f} p95={pct(latencies, 95):.1f} p99={pct(latencies, 99):.1f} "
+              f"max={max(latencies) * 1000:.1f}")
+    print(f"errors: {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+    print("fake github:", fake.calls)
+
+
+if __name__ == "__main__":
+    main()
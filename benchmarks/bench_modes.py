@@ -0,0 +1,124 @@
+"""End-to-end latency: split deployment vs. combined in-process mode.
+
+Each mode runs in its own subprocess with a throwaway event log and state dir.
+Unique push events are POSTed to /webhook/github and the latency is measured
+until the matching message reaches the local fake Slack webhook (with the
+digest off, so each push is its own message).
+
+    python benchmarks/bench_modes.py --events 200 --slack-latency 0.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = Path(__file__).resolve().parent
+
+
+def push_payload(marker: str) -> dict:
+    return {
+        "ref": "refs/heads/main",
+        "repository": {"full_name": "acme/widgets", "owner": {"login": "acme"}},
+        "sender": {"login": "bench"},
+        "commits": [{"message": marker}],
+    }
+
+
+def serve_uvicorn(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="critical"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run_mode(mode: str, events: int, slack_latency: float, base_port: int) -> dict:
+    sys.path[:0] = [str(ROOT), str(HERE)]
+    import requests
+    from fake_github import start_in_thread
+    from fake_slack import FakeSlack
+
+    slack = FakeSlack(latency=slack_latency)
+    start_in_thread(slack.app(), base_port + 1)
+
+    if mode == "split":
+        import notify_server
+        import webhook_server
+
+        serve_uvicorn(notify_server.app, base_port + 2)
+        start_in_thread(webhook_server.app, base_port)
+    else:
+        import combined_app
+
+        serve_uvicorn(combined_app.app, base_port)
+
+    session = requests.Session()
+    url = f"http://127.0.0.1:{base_port}/webhook/github"
+    latencies = []
+    started = time.perf_counter()
+    for i in range(events):
+        marker = f"bench-{uuid.uuid4().hex}"
+        sent = time.perf_counter()
+        session.post(url, json=push_payload(marker),
+                     headers={"X-GitHub-Event": "push", "X-GitHub-Delivery": marker})
+        deadline = sent + 10
+        while (received := slack.find(marker)) is None and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        if received is not None:
+            latencies.append((received - sent) * 1000)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "mode": mode,
+        "events": events,
+        "delivered": len(latencies),
+        "events_per_s": round(events / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--slack-latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8950)
+    parser.add_argument("--mode", choices=["split", "combined"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.events, args.slack_latency, args.port)))
+        return
+
+    rows = []
+    for mode in ("split", "combined"):
+        tmp = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+        env = dict(os.environ,
+                   EVENT_STORE_DIR=f"{tmp}/event_log", STATE_DIR=f"{tmp}/state",
+                   SLACK_WEBHOOK_URL=f"http://127.0.0.1:{args.port + 1}/services/bench",
+                   NOTIFY_URL=f"http://127.0.0.1:{args.port + 2}/notify",
+                   SLACK_CHANNEL_RATE="0", DIGEST_WINDOW="0")
+        out = subprocess.run([sys.executable, __file__, "--mode", mode, "--events", str(args.events),
+                              "--slack-latency", str(args.slack_latency), "--port", str(args.port)],
+                             env=env, capture_output=True, text=True, cwd=tmp)
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            print(out.stderr[-2000:])
+            continue
+        rows.append(json.loads(lines[-1]))
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Webhook body parsing: full json.loads vs. the selective parsers in payload_parser.
+
+Builds synthetic push payloads (realistic commit objects, --commits each) and
+times every available parser, reporting median parse time and the peak Python
+heap allocated while parsing (tracemalloc; orjson's own buffers are included
+since it allocates Python objects).
+
+    python benchmarks/bench_payload_parser.py --commits 100 1000 2048 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import payload_parser  # noqa: E402
+from payload_parser import parse_webhook  # noqa: E402
+
+
+def commit(i: int) -> dict:
+    sha = f"{i:040x}"
+    person = {"name": "Dev Eloper", "email": "dev@example.com", "username": "dev"}
+    return {
+        "id": sha, "tree_id": sha[::-1], "distinct": True, "timestamp": "2024-05-01T10:00:00Z",
+        "message": f"Fix issue #{i}\n\n" + "Longer explanation of the change. " * 8,
+        "url": f"https://github.com/acme/widgets/commit/{sha}", "author": person, "committer": person,
+        "added": [f"src/module_{i}.py"], "removed": [], "modified": [f"src/file_{j}.py" for j in range(5)],
+    }
+
+
+def push_payload(commits: int) -> bytes:
+    repository = {"id": 1, "name": "widgets", "full_name": "acme/widgets", "owner": {"login": "acme", "id": 2},
+                  **{f"{key}_url": f"https://api.github.com/repos/acme/widgets/{key}" for key in
+                     ("archive", "assignees", "blobs", "branches", "commits", "contents", "issues", "pulls", "tags")}}
+    payload = {"ref": "refs/heads/main", "before": "0" * 40, "after": "f" * 40, "repository": repository,
+               "pusher": {"name": "dev"}, "sender": {"login": "dev", "id": 3},
+               "commits": [commit(i) for i in range(commits)], "head_commit": commit(commits)}
+    return json.dumps(payload).encode()
+
+
+def full_json(raw: bytes) -> dict:
+    return json.loads(raw)
+
+
+def measure(fn, raw: bytes, repeat: int) -> tuple:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(raw)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, nargs="+", default=[100, 1000, 2048])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    variants = {"json.loads (before)": full_json, "json + project": lambda raw: parse_webhook(raw, "json")}
+    if payload_parser.orjson is not None:
+        variants["orjson + project"] = lambda raw: parse_webhook(raw, "orjson")
+    if payload_parser.ijson is not None:
+        variants["ijson stream"] = lambda raw: parse_webhook(raw, "stream")
+    variants["auto"] = parse_webhook
+
+    print(f"{'commits':>8} {'body':>9}  {'parser':<20} {'parse ms':>9} {'peak MB':>8}")
+    for commits in args.commits:
+        raw = push_payload(commits)
+        for name, fn in variants.items():
+            elapsed, peak = measure(fn, raw, args.repeat)
+            print(f"{commits:>8} {len(raw) / 1e6:>7.2f}MB  {name:<20} {elapsed * 1000:>9.2f} {peak / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
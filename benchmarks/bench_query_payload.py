@@ -0,0 +1,78 @@
+"""Tool payload size and turn latency: full event dump vs. query_events.
+
+"before" is what get_recent_actions_events used to hand the model: str() of the
+whole github_events.json. "after" is query_events with its default limit,
+projection and token budget. With --llm, one gpt-4.1-nano call per variant is
+timed with the payload as a tool result (needs OPENAI_API_KEY).
+
+    python benchmarks/bench_query_payload.py --events 100 1000 [--llm]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+SEED = json.loads((ROOT / "github_events.json").read_text())
+QUESTION = "Which pull requests were opened most recently?"
+
+
+def llm_turn(payload: str) -> float:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model="gpt-4.1-nano", temperature=0)
+    started = time.perf_counter()
+    llm.invoke([SystemMessage(content="Answer using these GitHub events:\n" + payload), HumanMessage(content=QUESTION)])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--llm", action="store_true")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_query_"))
+    os.environ["EVENT_STORE_DIR"] = str(tmp / "log")
+    import event_store
+
+    event_store.LEGACY_EVENTS_FILE = tmp / "missing.json"
+    import github
+
+    writer = event_store.EventStore(import_legacy=False, segment_max_bytes=1 << 30)
+    written = 0
+    for n in sorted(args.events):
+        events = [SEED[i % len(SEED)] for i in range(n)]
+        while written < n:
+            writer.append(events[written], sync=False)
+            written += 1
+        writer.sync()
+
+        started = time.perf_counter()
+        before = str(events)
+        before_s = time.perf_counter() - started
+        started = time.perf_counter()
+        after = str(github.query_events.fn())
+        after_s = time.perf_counter() - started
+
+        row = {
+            "events": n,
+            "before_bytes": len(before), "before_tokens~": len(before) // 4, "before_tool_ms": round(before_s * 1000, 2),
+            "after_bytes": len(after), "after_tokens~": len(after) // 4, "after_tool_ms": round(after_s * 1000, 2),
+        }
+        if args.llm:
+            try:
+                row["before_turn_s"] = round(llm_turn(before), 2)
+            except Exception as e:  # context overflow is the point of this benchmark
+                row["before_turn_s"] = f"error: {type(e).__name__}"
+            row["after_turn_s"] = round(llm_turn(after), 2)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Local stand-in for the parts of api.github.com this project calls.
+
+Serves GET/PATCH /repos/{owner}/{repo}/pulls/{n} and PUT .../merge with ETags,
+304 revalidation (not counted against the quota), X-RateLimit-* headers and an
+optional injected latency.
+
+    python benchmarks/fake_github.py --port 8900 --latency 0.05 --rate-limit 5000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+from aiohttp import web
+
+
+class FakeGitHub:
+    def __init__(self, latency: float = 0.0, rate_limit: int = 5000):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset = int(time.time()) + 3600
+        self.pulls = {}
+        self.calls = {"GET": 0, "PATCH": 0, "PUT": 0, "not_modified": 0}
+
+    def pull(self, repo: str, number: int) -> dict:
+        return self.pulls.setdefault((repo, number), {
+            "number": number, "title": f"PR #{number}", "state": "open", "merged": False,
+            "base": {"ref": "main"}, "head": {"ref": f"feature-{number}"}, "repository": repo,
+        })
+
+    def _respond(self, request, data, status=200, etag=None):
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": str(self.reset),
+        }
+        if etag:
+            headers["ETag"] = etag
+        if status == 304:
+            return web.Response(status=304, headers=headers)
+        return web.json_response(data, status=status, headers=headers)
+
+    async def _pre(self, request):
+        self.calls[request.method] = self.calls.get(request.method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _charge(self, request):
+        if self.remaining <= 0:
+            return self._respond(request, {"message": "API rate limit exceeded"}, status=403)
+        self.remaining -= 1
+        return None
+
+    async def get_pull(self, request):
+        await self._pre(request)
+        pr = self.pull(f"{request.match_info['owner']}/{request.match_info['repo']}", int(request.match_info["number"]))
+        etag = '"' + hashlib.sha1(json.dumps(pr, sort_keys=True).encode()).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.calls["not_modified"] += 1
+            return self._respond(request, None, status=304, etag=etag)
+        return self._charge(request) or self._respond(request, pr, etag=etag)
+
+    async def patch_pull(self, request):
+        await self._pre(request)
+        pr = self.pull(f"{request.match_info['owner']}/{request.match_info['repo']}", int(request.match_info["number"]))
+        body = await request.json()
+        if "state" in body:
+            pr["state"] = body["state"]
+        return self._charge(request) or self._respond(request, pr)
+
+    async def merge_pull(self, request):
+        await self._pre(request)
+        pr = self.pull(f"{request.match_info['owner']}/{request.match_info['repo']}", int(request.match_info["number"]))
+        limited = self._charge(request)
+        if limited:
+            return limited
+        if pr["merged"] or pr["state"] != "open":
+            return self._respond(request, {"message": "Pull Request is not mergeable"}, status=405)
+        pr.update(merged=True, state="closed")
+        return self._respond(request, {"merged": True, "message": "Pull Request successfully merged"})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        base = "/repos/{owner}/{repo}/pulls/{number}"
+        app.router.add_get(base, self.get_pull)
+        app.router.add_patch(base, self.patch_pull)
+        app.router.add_put(base + "/merge", self.merge_pull)
+        return app
+
+
+def start_in_thread(app: web.Application, port: int) -> threading.Thread:
+    """Run an aiohttp app on localhost:`port` in a daemon thread (for benchmarks)."""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait(10)
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    args = parser.parse_args()
+    web.run_app(FakeGitHub(args.latency, args.rate_limit).app(), host="127.0.0.1", port=args.port)
@@ -0,0 +1,68 @@
+"""Local stand-in for a Slack incoming webhook / interaction response_url.
+
+Records every message with its arrival time; optional injected latency and a
+fraction of 429 responses (with Retry-After) to exercise retry paths.
+
+    python benchmarks/fake_slack.py --port 8901 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+from aiohttp import web
+
+# benchmark markers embedded in message text or the response_url path; no leading \b, since
+# in the JSON-encoded payload a marker on its own line follows the "n" of an escaped newline
+MARKER = re.compile(r"(?:replay|bench|click)-[0-9a-f]+")
+
+
+class FakeSlack:
+    def __init__(self, latency: float = 0.0, rate_limited: float = 0.0, retry_after: int = 1):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.messages = []
+        self.markers = {}
+        self.calls = {"ok": 0, "rate_limited": 0}
+
+    async def post(self, request):
+        payload = await request.json()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.rate_limited and random.random() < self.rate_limited:
+            self.calls["rate_limited"] += 1
+            return web.Response(status=429, text="rate_limited", headers={"Retry-After": str(self.retry_after)})
+        self.calls["ok"] += 1
+        received = time.perf_counter()
+        self.messages.append((received, request.path, payload))
+        for marker in MARKER.findall(request.path + json.dumps(payload)):
+            self.markers.setdefault(marker, received)
+        return web.Response(text="ok")
+
+    def find(self, marker: str):
+        """Arrival time of the first message whose text contains `marker`."""
+        if marker in self.markers:
+            return self.markers[marker]
+        if MARKER.fullmatch(marker):
+            return None
+        for received, _, payload in self.messages:
+            if marker in str(payload.get("text", "")) or marker in str(payload.get("blocks", "")):
+                return received
+        return None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/{path:.*}", self.post)
+        return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limited", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(FakeSlack(args.latency, args.rate_limited).app(), host="127.0.0.1", port=args.port)
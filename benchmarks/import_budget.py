@@ -0,0 +1,93 @@
+"""Import-time budget for the server entry points.
+
+Imports each module in a fresh interpreter with `python -X importtime` and
+fails when the cumulative import time exceeds its budget or when a module from
+the agent stack gets loaded, so cold start and per-worker memory stay small.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget-ms 800 --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# entry point -> default budget (ms, cumulative import time)
+ENTRY_POINTS = {
+    "webhook_server": 600,
+    "notify_server": 1200,
+    "combined_app": 1500,
+}
+# only the interactive agent and the MCP server may load these
+FORBIDDEN = ("langchain_core", "langchain_openai", "langgraph", "openai", "fastmcp")
+
+PROBE = """
+import {module}
+import json, resource, sys
+print(json.dumps({{"modules": sorted(sys.modules),
+                   "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(cumulative_us, self_us, module)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    return rows
+
+
+def measure(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        return {"error": "\n".join(errors[-5:])}
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    # the entry point's own top-level row; interpreter startup imports are not counted
+    total_us = next((c for c, _, name in rows if name == module), 0)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "maxrss_mb": round(probe["maxrss_kb"] / 1024, 1),
+        "slowest": sorted(rows, reverse=True),
+        "forbidden": sorted({m.split(".")[0] for m in probe["modules"]} & set(FORBIDDEN)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--budget-ms", type=float, help="override every module's budget")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    ok = True
+    for module in args.modules:
+        result = measure(module)
+        if "error" in result:
+            ok = False
+            print(f"{module}: import failed\n{result['error']}")
+            continue
+        budget = args.budget_ms or ENTRY_POINTS.get(module, 1000)
+        over = result["total_ms"] > budget
+        ok &= not over and not result["forbidden"]
+        status = "OVER BUDGET" if over else "ok"
+        print(f"{module}: {result['total_ms']} ms (budget {budget:g} ms) {status}, max RSS {result['maxrss_mb']} MB")
+        if result["forbidden"]:
+            print(f"  loads agent-stack modules: {', '.join(result['forbidden'])}")
+        for cumulative_us, _, name in result["slowest"][:args.top]:
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {name.strip()}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Replay-driven load benchmark for the webhook -> notify -> Slack pipeline.
+
+Runs the real webhook server (aiohttp) and notify/interact app (FastAPI) in
+this process against local stand-ins for Slack (fake_slack.py) and
+api.github.com (fake_github.py), then replays github_events.json, optionally
+padded with synthetic bursts, at a fixed rate. The digest is off
+(DIGEST_WINDOW=0) so every event reaches Slack as its own message. It reports
+throughput (requests acked per second, up to the last ack) and p50/p95/p99 for:
+
+    ingest   client-side POST /webhook/github round trip (the GitHub ack)
+    persist  event_store.append
+    notify   process_notification (the /notify handler body, up to the outbox enqueue)
+    slack    Slack POSTs (outbox deliveries and interaction replies)
+    e2e      webhook POST -> message arriving at the fake Slack
+
+and, for the interact scenario, /slack/interact ack time and click -> result
+(response_url) time.
+
+    python benchmarks/replay.py --rate 50 --synthetic 500 --slack-latency 0.05
+    python benchmarks/replay.py --scenario interact --clicks 200 --github-latency 0.1
+    python benchmarks/replay.py --save-baseline benchmarks/baselines/local.json
+    python benchmarks/replay.py --compare benchmarks/baselines/local.json
+    python benchmarks/replay.py --rate 0 --synthetic 2000 --notify-workers 4
+
+With --notify-workers N the notify app runs as `serve.py --workers N` in a
+subprocess (persist/notify/slack stage timings are then not collected), to
+check that throughput scales with worker processes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = Path(__file__).resolve().parent
+sys.path[:0] = [str(ROOT), str(HERE)]
+
+SEED = json.loads((ROOT / "github_events.json").read_text())
+
+
+# -- payloads ------------------------------------------------------------------------
+
+def to_payload(event: dict, marker: str):
+    """Rebuild a webhook (event_type, payload) from a stored seed event."""
+    event_type = event.get("event_type", "ping")
+    repository = event.get("repository") or {"full_name": "acme/widgets", "owner": {"login": "acme"}}
+    payload = {"repository": repository, "sender": {"login": event.get("sender") or "replay"}}
+    if event_type == "pull_request":
+        payload["action"] = "opened"
+        payload["pull_request"] = {
+            "number": random.randint(1, 10 ** 6), "title": f"{event.get('title', '')} {marker}",
+            "body": event.get("description") or "", "base": {"ref": "main"},
+            "head": {"ref": event.get("compare_branch") or "feature"},
+        }
+    elif event_type == "push":
+        payload["ref"] = "refs/heads/main"
+        lines = (event.get("description") or "").split("\n") or [""]
+        payload["commits"] = [{"message": m} for m in lines] + [{"message": marker}]
+    else:
+        event_type = "issues"
+        payload["issue"] = {"title": marker, "body": event.get("description") or ""}
+    return event_type, payload
+
+
+def synthetic(n: int, repos: int = 20):
+    for i in range(n):
+        kind = random.choice(["push", "pull_request", "issues"])
+        yield {
+            "event_type": kind,
+            "repository": {"full_name": f"org{i % repos}/repo{i % repos}", "owner": {"login": f"org{i % repos}"}},
+            "sender": f"user{i % 13}",
+            "title": f"synthetic {i}",
+            "description": "\n".join(f"commit {j}" for j in range(random.randint(1, 5))),
+        }
+
+
+# -- harness -------------------------------------------------------------------------
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"n": 0}
+    s = sorted(samples)
+
+    def p(q):
+        return round(s[min(len(s) - 1, int(q * len(s)))] * 1000, 2)
+
+    return {"n": len(s), "p50_ms": p(0.50), "p95_ms": p(0.95), "p99_ms": p(0.99)}
+
+
+def timed_sync(samples: list, fn):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+def timed_async(samples: list, fn):
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+def serve_uvicorn(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="critical"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def serve_workers(port: int, workers: int):
+    proc = subprocess.Popen([sys.executable, str(ROOT / "serve.py"), "--port", str(port), "--host", "127.0.0.1",
+                             "--workers", str(workers), "--log-level", "critical"], cwd=ROOT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"serve.py did not start on port {port}")
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        port = args.port
+        self.webhook_url = f"http://127.0.0.1:{port}/webhook/github"
+        self.interact_url = f"http://127.0.0.1:{port + 2}/slack/interact"
+        self.slack_url = f"http://127.0.0.1:{port + 1}"
+        tmp = tempfile.mkdtemp(prefix="replay_")
+        os.environ.update(
+            EVENT_STORE_DIR=f"{tmp}/event_log", STATE_DIR=f"{tmp}/state",
+            SLACK_WEBHOOK_URL=f"{self.slack_url}/services/replay",
+            NOTIFY_URL=f"http://127.0.0.1:{port + 2}/notify",
+            GITHUB_API_URL=f"http://127.0.0.1:{port + 3}", GITHUB_PAT="replay",
+            SLACK_CHANNEL_RATE=str(args.slack_rate),
+            # every event must reach Slack as its own message for e2e to find its marker
+            DIGEST_WINDOW="0",
+        )
+        os.environ.setdefault("OPENAI_API_KEY", "unused-by-this-benchmark")
+        self.stages = {name: [] for name in ("ingest", "persist", "notify", "slack", "e2e",
+                                             "interact_ack", "interact_result")}
+        self.last_ack = None
+
+    def start(self):
+        from fake_github import FakeGitHub, start_in_thread
+        from fake_slack import FakeSlack
+
+        self.slack = FakeSlack(self.args.slack_latency, self.args.slack_429)
+        start_in_thread(self.slack.app(), self.args.port + 1)
+        self.github = FakeGitHub(self.args.github_latency)
+        start_in_thread(self.github.app(), self.args.port + 3)
+
+        import notify_server
+        import slack
+        import slack_outbox
+        import webhook_server
+
+        store = webhook_server.event_store
+        store.append = timed_sync(self.stages["persist"], store.append)
+        notify_server.process_notification = timed_async(self.stages["notify"], notify_server.process_notification)
+        slack_outbox.SlackOutbox._deliver = timed_async(self.stages["slack"], slack_outbox.SlackOutbox._deliver)
+        slack.post_slack_message = timed_async(self.stages["slack"], slack.post_slack_message)
+        notify_server.post_slack_message = slack.post_slack_message
+
+        if self.args.notify_workers > 1:
+            self.workers = serve_workers(self.args.port + 2, self.args.notify_workers)
+        else:
+            serve_uvicorn(notify_server.app, self.args.port + 2)
+        start_in_thread(webhook_server.app, self.args.port)
+
+    def acked(self, sent: float, stage: str):
+        now = time.perf_counter()
+        self.stages[stage].append(now - sent)
+        self.last_ack = now if self.last_ack is None else max(self.last_ack, now)
+
+    async def wait_for_slack(self, marker: str, sent: float, timeout: float = 30):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            received = self.slack.find(marker)
+            if received is not None:
+                self.stages["e2e"].append(received - sent)
+                return
+            await asyncio.sleep(0.002)
+
+    async def replay(self, session):
+        corpus = SEED * self.args.loops + list(synthetic(self.args.synthetic))
+        interval = 1.0 / self.args.rate if self.args.rate else 0
+        waiters = []
+
+        async def send(event):
+            marker = f"replay-{uuid.uuid4().hex[:12]}"
+            event_type, payload = to_payload(event, marker)
+            headers = {"X-GitHub-Event": event_type, "X-GitHub-Delivery": marker}
+            sent = time.perf_counter()
+            async with session.post(self.webhook_url, json=payload, headers=headers) as resp:
+                await resp.read()
+            self.acked(sent, "ingest")
+            await self.wait_for_slack(marker, sent)
+
+        started = time.perf_counter()
+        for i, event in enumerate(corpus):
+            # open loop: schedule on the clock, don't wait for earlier requests
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            waiters.append(asyncio.create_task(send(event)))
+        await asyncio.gather(*waiters)
+        # throughput counts up to the last ack, not the end of the Slack waits
+        return len(corpus), (self.last_ack or time.perf_counter()) - started
+
+    async def interact(self, session):
+        interval = 1.0 / self.args.rate if self.args.rate else 0
+        waiters = []
+
+        async def click(i):
+            marker = f"click-{uuid.uuid4().hex[:12]}"
+            pr_number = i % self.args.prs + 1
+            action = "merge_action" if i % 2 == 0 else "cancel_action"
+            payload = {
+                "actions": [{"action_id": action, "value": json.dumps({"repo": "acme/widgets", "pr_number": pr_number})}],
+                "user": {"username": "replay"},
+                "response_url": f"{self.slack_url}/actions/{marker}",
+            }
+            sent = time.perf_counter()
+            async with session.post(self.interact_url, data={"payload": json.dumps(payload)}) as resp:
+                await resp.read()
+            self.acked(sent, "interact_ack")
+            deadline = sent + 30
+            while time.perf_counter() < deadline:
+                hit = self.slack.find(marker)
+                if hit is not None:
+                    self.stages["interact_result"].append(hit - sent)
+                    return
+                await asyncio.sleep(0.002)
+
+        started = time.perf_counter()
+        for i in range(self.args.clicks):
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            waiters.append(asyncio.create_task(click(i)))
+        await asyncio.gather(*waiters)
+        return self.args.clicks, (self.last_ack or time.perf_counter()) - started
+
+    async def run(self) -> dict:
+        from aiohttp import ClientSession, TCPConnector
+
+        async with ClientSession(connector=TCPConnector(limit=self.args.concurrency)) as session:
+            if self.args.scenario == "interact":
+                count, elapsed = await self.interact(session)
+            else:
+                count, elapsed = await self.replay(session)
+        return {
+            "scenario": self.args.scenario,
+            "requests": count,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_per_s": round(count / elapsed, 1) if elapsed else None,
+            "stages": {name: percentiles(s) for name, s in self.stages.items() if s},
+            "fake_slack": self.slack.calls,
+            "fake_github": self.github.calls,
+        }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> bool:
+    ok = True
+    for stage, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or "p95_ms" not in base or "p95_ms" not in stats:
+            continue
+        change = (stats["p95_ms"] - base["p95_ms"]) / max(base["p95_ms"], 1e-6)
+        flag = "REGRESSION" if change > tolerance else "ok"
+        ok &= flag == "ok"
+        print(f"{stage:>16}: p95 {base['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({change:+.0%}) {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["webhook", "interact"], default="webhook")
+    parser.add_argument("--rate", type=float, default=50, help="requests per second (0 = as fast as possible)")
+    parser.add_argument("--loops", type=int, default=1, help="times to replay github_events.json")
+    parser.add_argument("--synthetic", type=int, default=0, help="extra synthetic events after the seed corpus")
+    parser.add_argument("--clicks", type=int, default=100)
+    parser.add_argument("--prs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--slack-latency", type=float, default=0.0)
+    parser.add_argument("--slack-429", type=float, default=0.0, help="fraction of Slack posts answered with 429")
+    parser.add_argument("--slack-rate", type=float, default=0.0, help="per-channel Slack posts/s in the outbox (0 = unpaced)")
+    parser.add_argument("--github-latency", type=float, default=0.0)
+    parser.add_argument("--notify-workers", type=int, default=1, help="run the notify app with serve.py and N workers")
+    parser.add_argument("--port", type=int, default=8960)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase vs baseline")
+    args = parser.parse_args()
+
+    harness = Harness(args)
+    harness.start()
+    try:
+        result = asyncio.run(harness.run())
+    finally:
+        if getattr(harness, "workers", None) is not None:
+            harness.workers.terminate()
+            harness.workers.wait()
+    result["config"] = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+    print(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(result, indent=2))
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        if not compare(result, json.loads(args.compare.read_text()), args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
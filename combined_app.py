@@ -0,0 +1,92 @@
+"""Single-process deployment: GitHub webhook + notify/Slack pipeline in one ASGI app.
+
+Webhook events are persisted as usual and then handed to the notify pipeline
+through an in-memory queue instead of a POST to localhost:8001/notify. The split
+deployment (webhook_server.py + notify_server.py) keeps working unchanged.
+
+    uvicorn combined_app:app --host 0.0.0.0 --port 8080
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from event_bus import InProcessBus
+from notify_server import app, lifespan as notify_lifespan, process_notification
+from metrics import registry, stage
+from payload_parser import MAX_WEBHOOK_BYTES, PayloadTooLarge
+from webhook_server import event_store, ingest, parse_body, rollup_writer, sync_event_store
+
+bus = InProcessBus(process_notification)
+registry.gauge_callback("notify_queue_depth", lambda: bus.stats()["queue_depth"], "Events waiting for a notify worker")
+
+
+_store_sync = None
+
+
+async def start_event_bus():
+    global _store_sync
+    await bus.start()
+    _store_sync = asyncio.create_task(sync_event_store())
+
+
+async def stop_event_bus():
+    if _store_sync is not None:
+        _store_sync.cancel()
+    await bus.stop()
+    rollup_writer.save()
+    event_store.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    async with notify_lifespan(app):
+        await start_event_bus()
+        try:
+            yield
+        finally:
+            # drain the bus before notify_server's shutdown closes the outbox, HTTP pool and executor it delivers through
+            await stop_event_bus()
+
+
+app.router.lifespan_context = lifespan
+
+
+async def read_body(request: Request) -> bytes:
+    """The request body, refusing anything over MAX_WEBHOOK_BYTES before it is all buffered."""
+    if int(request.headers.get("content-length") or 0) > MAX_WEBHOOK_BYTES:
+        raise PayloadTooLarge(f"webhook body is over {MAX_WEBHOOK_BYTES} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_WEBHOOK_BYTES:
+            raise PayloadTooLarge(f"webhook body is over {MAX_WEBHOOK_BYTES} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/webhook/github")
+async def github_webhook(request: Request):
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+    try:
+        with stage("webhook", delivery_id):
+            data = await parse_body(await read_body(request), delivery_id)
+            return await ingest(request.headers.get("X-GitHub-Event", "unknown"), data, delivery_id, bus)
+    except PayloadTooLarge as e:
+        registry.inc("webhook_too_large_total")
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+@app.get("/notify/stats")
+async def event_bus_stats():
+    return bus.stats()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("✅ Starting combined webhook + notify server on http://localhost:8080")
+    uvicorn.run(app, host="0.0.0.0", port=8080, log_level="critical")
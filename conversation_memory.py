@@ -0,0 +1,157 @@
+"""Bounded conversation memory for the interactive agent.
+
+* Large tool results are cut to TOOL_RESULT_MAX_CHARS when the ToolMessage is
+  built; the full text is kept under a handle the model can page through with
+  the `get_tool_result` tool.
+* `fit_prompt` keeps one turn's prompt under PROMPT_MAX_TOKENS by reducing the
+  oldest tool results to their handle, without breaking tool-call pairs.
+* `ConversationMemory` carries context across questions: each finished turn
+  is stored as question + answer, recent turns are replayed within
+  MEMORY_MAX_TOKENS, and older ones are folded into a short running summary.
+
+Token counts are estimated at ~4 characters per token.
+"""
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+TOOL_RESULT_MAX_CHARS = int(os.environ.get("TOOL_RESULT_MAX_CHARS", 2000))
+PROMPT_MAX_TOKENS = int(os.environ.get("PROMPT_MAX_TOKENS", 6000))
+MEMORY_MAX_TOKENS = int(os.environ.get("MEMORY_MAX_TOKENS", 1500))
+SUMMARY_MAX_CHARS = 2000
+HANDLE_PREFIX = "result:"
+_HANDLE = re.compile(r"handle='(result:[0-9a-f]+)'")
+
+
+def estimate_tokens(message) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = len(content) // 4 + 4
+    for call in getattr(message, "tool_calls", None) or ():
+        tokens += len(str(call.get("args"))) // 4 + 8
+    return tokens
+
+
+class ToolResultStore:
+    """Full text of truncated tool results by handle; LRU bounded by total characters."""
+
+    def __init__(self, max_chars: int = 2_000_000):
+        self.max_chars = max_chars
+        self._items = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        handle = HANDLE_PREFIX + uuid.uuid4().hex[:12]
+        with self._lock:
+            self._items[handle] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._chars -= len(old)
+        return handle
+
+    def get(self, handle: str):
+        with self._lock:
+            text = self._items.get(handle)
+            if text is not None:
+                self._items.move_to_end(handle)
+            return text
+
+
+tool_results = ToolResultStore()
+
+
+def compact_tool_content(content: str, max_chars: int = TOOL_RESULT_MAX_CHARS) -> str:
+    """`content` itself when short, else its head plus a handle to the rest."""
+    if len(content) <= max_chars:
+        return content
+    handle = tool_results.put(content)
+    return (f"{content[:max_chars]}\n…[truncated {len(content) - max_chars} of {len(content)} chars; "
+            f"call get_tool_result(handle='{handle}', offset={max_chars}) for more]")
+
+
+def get_tool_result(handle: str, offset: int = 0, length: int = 2000) -> str:
+    """Read part of a truncated tool result by its handle (from a '…[truncated' note)."""
+    text = tool_results.get(handle)
+    if text is None:
+        return f"Error: unknown or expired handle {handle}"
+    length = max(1, min(int(length), TOOL_RESULT_MAX_CHARS))
+    chunk = text[int(offset):int(offset) + length]
+    rest = len(text) - int(offset) - len(chunk)
+    return chunk + (f"\n…[{rest} more chars; next offset={int(offset) + len(chunk)}]" if rest > 0 else "")
+
+
+memory_tools = {"get_tool_result": get_tool_result}
+
+
+def fit_prompt(messages: list, max_tokens: int = PROMPT_MAX_TOKENS) -> list:
+    """Shrink the oldest tool results to a handle-only stub until `messages` fit `max_tokens`.
+
+    Messages are never dropped, so every tool call keeps its ToolMessage.
+    """
+    total = sum(estimate_tokens(m) for m in messages)
+    if total <= max_tokens:
+        return messages
+    from langchain_core.messages import ToolMessage
+
+    fitted = list(messages)
+    # the newest message is what the model is answering from; it is left alone
+    for i, message in enumerate(fitted[:-1]):
+        if total <= max_tokens:
+            break
+        if not isinstance(message, ToolMessage) or len(message.content) < 200:
+            continue
+        content = message.content
+        known = _HANDLE.search(content)
+        handle = known.group(1) if known else tool_results.put(content)
+        stub = f"[{message.name} result, {len(content)} chars, dropped from the prompt; get_tool_result(handle='{handle}')]"
+        total -= estimate_tokens(message) - len(stub) // 4 - 4
+        fitted[i] = ToolMessage(tool_call_id=message.tool_call_id, name=message.name, content=stub)
+    return fitted
+
+
+class ConversationMemory:
+    """Cross-turn context for `run_agent`: recent turns verbatim, older turns as a summary."""
+
+    def __init__(self, max_tokens: int = MEMORY_MAX_TOKENS, summary_max_chars: int = SUMMARY_MAX_CHARS):
+        self.max_tokens = max_tokens
+        self.summary_max_chars = summary_max_chars
+        self.turns = deque()  # (question, answer, tokens)
+        self.summary = deque()  # one compact line per folded turn
+        self._summary_chars = 0
+        self._tokens = 0
+
+    def add_turn(self, question: str, answer: str):
+        tokens = (len(question) + len(answer)) // 4 + 8
+        self.turns.append((question, answer, tokens))
+        self._tokens += tokens
+        while self._tokens > self.max_tokens and len(self.turns) > 1:
+            old_q, old_a, old_tokens = self.turns.popleft()
+            self._tokens -= old_tokens
+            self._fold(old_q, old_a)
+
+    def _fold(self, question: str, answer: str):
+        line = f"- Q: {' '.join(question.split())[:160]} A: {' '.join(answer.split())[:240]}"
+        self.summary.append(line)
+        self._summary_chars += len(line)
+        while self._summary_chars > self.summary_max_chars and len(self.summary) > 1:
+            self._summary_chars -= len(self.summary.popleft())
+
+    def context(self) -> list:
+        """Messages to put before the next question."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        messages = []
+        if self.summary:
+            messages.append(SystemMessage(content="Earlier in this conversation:\n" + "\n".join(self.summary)))
+        for question, answer, _ in self.turns:
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+        return messages
+
+    def clear(self):
+        self.turns.clear()
+        self.summary.clear()
+        self._summary_chars = 0
+        self._tokens = 0
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+STATE_DIR = Path(os.environ.get("STATE_DIR", Path(__file__).parent / "state"))
+DEDUPE_DB = Path(os.environ.get("DEDUPE_DB", STATE_DIR / "dedupe.sqlite3"))
+
+
+def delivery_keys(delivery_id=None, repo=None, pr_number=None, action=None) -> list:
+    """Dedupe keys for one notification: the GitHub delivery and the PR action."""
+    keys = []
+    if delivery_id:
+        keys.append(f"delivery:{delivery_id}")
+    if pr_number is not None:
+        keys.append(f"pr:{repo}#{pr_number}:{action}")
+    return keys
+
+
+class DeliveryDedupe:
+    """Bounded "seen it already?" set shared by every worker on the host.
+
+    Keys live in a WAL-mode SQLite table (primary-key lookups) with an expiry
+    time. Expired rows are purged, and the table is trimmed to `max_entries`
+    oldest-first, every `sweep_every` claims. A small in-process LRU answers
+    repeats without touching the database.
+    """
+
+    def __init__(self, path=DEDUPE_DB, ttl: float = 24 * 3600, max_entries: int = 200_000,
+                 sweep_every: int = 1000, local_entries: int = 4096):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self.local_entries = local_entries
+        self._local = OrderedDict()
+        self._claims = 0
+        self._lock = threading.RLock()
+        self.pid = os.getpid()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA cache_size=-2048")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, expires REAL NOT NULL) WITHOUT ROWID")
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_expires ON seen (expires)")
+
+    def _remember(self, key, expires):
+        self._local[key] = expires
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_entries:
+            self._local.popitem(last=False)
+
+    def claim(self, *keys) -> bool:
+        """Mark `keys` as seen. False if any of them was already seen (a duplicate)."""
+        keys = [k for k in keys if k]
+        if not keys:
+            return True
+        now = time.time()
+        with self._lock:
+            if any(self._local.get(k, 0) > now for k in keys):
+                return False
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ",".join("?" * len(keys))
+                row = db.execute(f"SELECT 1 FROM seen WHERE key IN ({placeholders}) AND expires > ? LIMIT 1",
+                                 (*keys, now)).fetchone()
+                if row is None:
+                    expires = now + self.ttl
+                    db.executemany("INSERT OR REPLACE INTO seen (key, expires) VALUES (?, ?)",
+                                   [(k, expires) for k in keys])
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if row is None:
+                # only keys this claim owns; a lost claim may have hit just one of them
+                for k in keys:
+                    self._remember(k, now + self.ttl)
+            self._claims += 1
+            if self._claims % self.sweep_every == 0:
+                self.sweep(now)
+            return row is None
+
+    def release(self, *keys):
+        """Forget keys claimed for a notification that was not sent, so a retry can claim them again."""
+        keys = [k for k in keys if k]
+        if not keys:
+            return
+        with self._lock:
+            for k in keys:
+                self._local.pop(k, None)
+            self._db.executemany("DELETE FROM seen WHERE key = ?", [(k,) for k in keys])
+
+    def sweep(self, now: float = None):
+        now = now or time.time()
+        with self._lock:
+            db = self._db
+            db.execute("DELETE FROM seen WHERE expires <= ?", (now,))
+            excess = db.execute("SELECT COUNT(*) FROM seen").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute("DELETE FROM seen WHERE key IN (SELECT key FROM seen ORDER BY expires LIMIT ?)", (excess,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_dedupe = None
+
+
+def get_dedupe() -> DeliveryDedupe:
+    """Per-process instance; re-created after a fork so workers never share a connection."""
+    global _dedupe
+    if _dedupe is None or _dedupe.pid != os.getpid():
+        _dedupe = DeliveryDedupe()
+    return _dedupe
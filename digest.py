@@ -0,0 +1,168 @@
+"""Coalesce bursts of non-interactive notifications into one Slack digest per repo and branch.
+
+The first event of a quiet group is sent at once. Events arriving within
+DIGEST_WINDOW seconds after it are buffered, and the group is flushed as a
+single Block Kit message once its oldest buffered event is DIGEST_WINDOW old
+or DIGEST_MAX_EVENTS have piled up. The buffer lives in the outbox database
+and a flush moves its rows into the outbox in the same transaction, so
+buffered events survive restarts and every worker process can flush any
+group. PR cards (Merge/Cancel buttons) never go through here.
+"""
+import asyncio
+import json
+import os
+import time
+
+from http_pool import run_blocking
+from metrics import registry
+
+DIGEST_WINDOW = float(os.environ.get("DIGEST_WINDOW", 30))
+DIGEST_MAX_EVENTS = int(os.environ.get("DIGEST_MAX_EVENTS", 50))
+# events that carry buttons and must go out on their own
+INTERACTIVE_EVENT_TYPES = {"pull_request"}
+MAX_DIGEST_LINES = 25
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS digest_items (id INTEGER PRIMARY KEY AUTOINCREMENT, group_key TEXT NOT NULL, url TEXT NOT NULL, "
+    "item TEXT NOT NULL, created REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS digest_items_group ON digest_items (group_key, id)",
+    "CREATE TABLE IF NOT EXISTS digest_groups (group_key TEXT PRIMARY KEY, last_sent REAL NOT NULL) WITHOUT ROWID",
+)
+
+
+def is_digestible(event_type: str, pr_number=None) -> bool:
+    return not (event_type in INTERACTIVE_EVENT_TYPES and pr_number)
+
+
+def _line(item: dict) -> str:
+    title = item.get("title") or item.get("event_type")
+    first = (item.get("description") or "").strip().split("\n")[0]
+    detail = f" — {first[:80]}" if first and first != title else ""
+    return f"• `{item.get('event_type')}` {title}{detail} _by {item.get('sender') or 'unknown'} at {item.get('time', '')}_"
+
+
+def build_digest_payload(repo: str, branch: str, items: list) -> dict:
+    """One Block Kit message summarizing `items` (oldest first)."""
+    counts = {}
+    for item in items:
+        counts[item.get("event_type")] = counts.get(item.get("event_type"), 0) + 1
+    summary = ", ".join(f"{n} {kind}" for kind, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+    where = f"{repo} ({branch})" if branch else repo
+    header = f"📦 {len(items)} GitHub events on {where}: {summary}"
+    lines = [_line(item) for item in items[:MAX_DIGEST_LINES]]
+    if len(items) > MAX_DIGEST_LINES:
+        lines.append(f"…and {len(items) - MAX_DIGEST_LINES} more")
+    body = "\n".join(lines)
+    if len(body) > 2900:  # section text is capped at 3000 characters
+        body = body[:2900].rsplit("\n", 1)[0] + "\n…"
+    senders = sorted({item.get("sender") for item in items if item.get("sender")})
+    return {
+        "text": header,
+        "blocks": [
+            {"type": "section", "text": {"type": "mrkdwn", "text": f"*{header}*"}},
+            {"type": "section", "text": {"type": "mrkdwn", "text": body}},
+            {"type": "context", "elements": [{"type": "mrkdwn", "text": f"{items[0].get('time', '')} – {items[-1].get('time', '')} · by {', '.join(senders[:10]) or 'unknown'}"}]},
+        ],
+        "mrkdwn": True,
+    }
+
+
+class DigestBuffer:
+    def __init__(self, outbox, window: float = DIGEST_WINDOW, max_events: int = DIGEST_MAX_EVENTS):
+        self.outbox = outbox
+        self.window = window
+        self.max_events = max_events
+        self.counters = {"immediate": 0, "buffered": 0, "digests": 0}
+        self._task = None
+        self.outbox.transaction(lambda db: [db.execute(statement) for statement in SCHEMA])
+
+    def add(self, url: str, repo: str, branch: str, item: dict) -> bool:
+        """Buffer `item` for its group; False when the group is quiet and the caller should send it now."""
+        if self.window <= 0:
+            return False
+        key = json.dumps([url, repo, branch])
+        now = time.time()
+
+        def add(db):
+            """(buffered, flushed)"""
+            pending = db.execute("SELECT COUNT(*) FROM digest_items WHERE group_key = ?", (key,)).fetchone()[0]
+            last = db.execute("SELECT last_sent FROM digest_groups WHERE group_key = ?", (key,)).fetchone()
+            if not pending and (last is None or last[0] <= now - self.window):
+                db.execute("INSERT OR REPLACE INTO digest_groups (group_key, last_sent) VALUES (?, ?)", (key, now))
+                return False, False
+            db.execute("INSERT INTO digest_items (group_key, url, item, created) VALUES (?, ?, ?, ?)",
+                       (key, url, json.dumps(item), now))
+            if pending + 1 >= self.max_events:
+                self._flush_group(db, key, now)
+                return True, True
+            return True, False
+
+        buffered, flushed = self.outbox.transaction(add)
+        if flushed:
+            self.outbox.wake()
+        self.counters["buffered" if buffered else "immediate"] += 1
+        registry.inc("digest_events_total", path="buffered" if buffered else "immediate")
+        return buffered
+
+    def _flush_group(self, db, key: str, now: float):
+        rows = db.execute("SELECT id, url, item FROM digest_items WHERE group_key = ? ORDER BY id", (key,)).fetchall()
+        if not rows:
+            return
+        url, repo, branch = json.loads(key)
+        items = [json.loads(row[2]) for row in rows]
+        if len(items) == 1:
+            payload = items[0]["payload"]
+        else:
+            payload = build_digest_payload(repo, branch, items)
+        # keyed by the first buffered row so a flush retried by another worker is not sent twice
+        self.outbox.insert(db, url, payload, key=f"digest:{rows[0][0]}", trace_id=items[0].get("delivery_id"))
+        db.execute("DELETE FROM digest_items WHERE group_key = ? AND id <= ?", (key, rows[-1][0]))
+        db.execute("INSERT OR REPLACE INTO digest_groups (group_key, last_sent) VALUES (?, ?)", (key, now))
+        self.counters["digests"] += 1
+        registry.inc("digest_flushes_total")
+        registry.inc("digest_flushed_events_total", len(items))
+
+    def flush_due(self, force: bool = False) -> int:
+        """Flush every group whose oldest item has waited a full window (all groups with `force`)."""
+        now = time.time()
+        cutoff = now if force else now - self.window
+
+        def flush(db):
+            keys = [row[0] for row in db.execute(
+                "SELECT group_key FROM digest_items GROUP BY group_key HAVING MIN(created) <= ?", (cutoff,))]
+            for key in keys:
+                self._flush_group(db, key, now)
+            return len(keys)
+
+        flushed = self.outbox.transaction(flush)
+        if flushed:
+            self.outbox.wake()
+        return flushed
+
+    async def start(self):
+        self._task = asyncio.create_task(self._flusher())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _flusher(self):
+        interval = max(0.1, min(1.0, self.window / 4))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_blocking(self.flush_due)
+            except Exception as e:
+                print(f"Digest flush failed: {e!r}")
+
+
+_digest = None
+
+
+def get_digest(outbox) -> DigestBuffer:
+    global _digest
+    if _digest is None or _digest.outbox is not outbox:
+        _digest = DigestBuffer(outbox)
+    return _digest
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+
+class InProcessBus:
+    """In-memory stand-in for NotifyDispatcher when both servers share one process.
+
+    Same `submit()`/`start()`/`stop()`/`stats()` surface, but events go onto an
+    asyncio.Queue consumed by `workers` tasks that await `handler(event)` directly,
+    with no HTTP hop or JSON round trip in between.
+    """
+
+    def __init__(self, handler, workers: int = None, queue_size: int = None):
+        self.handler = handler
+        self.workers = workers or int(os.environ.get("NOTIFY_WORKERS", 4))
+        self.queue_size = queue_size or int(os.environ.get("NOTIFY_QUEUE_SIZE", 1000))
+        self.queue = None
+        self._tasks = []
+        self.counters = {"submitted": 0, "delivered": 0, "failed": 0, "dropped": 0}
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 5.0):
+        if self.queue is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"Event bus not drained on shutdown, {self.queue.qsize()} events left")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, event: dict) -> bool:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            print(f"Event bus full ({self.queue_size}), dropping {event.get('event_type')} event")
+            return False
+        self.counters["submitted"] += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.handler(event)
+                self.counters["delivered"] += 1
+            except Exception as e:
+                self.counters["failed"] += 1
+                print(f"Failed to process event in-process: {e!r}")
+            finally:
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+        }
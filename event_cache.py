@@ -0,0 +1,298 @@
+import bisect
+import itertools
+import threading
+from datetime import datetime
+
+import pytz
+
+from event_store import LEGACY_EVENTS_FILE, EventStore, get_event_store
+from workflow_index import WorkflowIndex
+
+
+IST = pytz.timezone("Asia/Kolkata")
+
+
+def to_epoch(value):
+    """ISO timestamp (naive means IST, like the stored events) or epoch number -> epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = IST.localize(dt)
+    return dt.timestamp()
+
+
+def event_repo(event: dict):
+    repo = event.get("repository")
+    if isinstance(repo, dict):
+        return repo.get("full_name")
+    return repo or None
+
+
+class SeqList:
+    """Ascending seqs of one index key: a list with a moving head, so dropping the oldest
+    is O(1) amortized and bisects stay O(log n) (deque indexing is O(n) away from the ends)."""
+
+    __slots__ = ("seqs", "head")
+
+    def __init__(self):
+        self.seqs = []
+        self.head = 0
+
+    def append(self, seq: int):
+        self.seqs.append(seq)
+
+    def popleft(self):
+        self.head += 1
+        if self.head > 64 and self.head * 2 > len(self.seqs):
+            del self.seqs[:self.head]
+            self.head = 0
+
+    def __len__(self):
+        return len(self.seqs) - self.head
+
+    def __iter__(self):
+        return itertools.islice(self.seqs, self.head, None)
+
+    def ascending_from(self, seq: int):
+        """Seqs >= `seq`, oldest first."""
+        seqs = self.seqs
+        return (seqs[i] for i in range(bisect.bisect_left(seqs, seq, self.head), len(seqs)))
+
+    def descending_from(self, seq: int):
+        """Seqs <= `seq`, newest first."""
+        seqs = self.seqs
+        return (seqs[i] for i in range(bisect.bisect_right(seqs, seq, self.head) - 1, self.head - 1, -1))
+
+
+_EMPTY = SeqList()
+
+
+class EventCache:
+    """In-memory copy of the event log with secondary indexes.
+
+    The store is read once; after that `refresh()` only looks at two stat() calls
+    (segment directory and active `.idx` file) and, when they moved, reads just the
+    records past the last sequence number it has seen. Events dropped by segment
+    retention are evicted from the front of every index.
+    """
+
+    INDEXES = ("event_type", "repository", "sender", "pr_number")
+
+    def __init__(self, store: EventStore = None):
+        self.store = store or get_event_store()
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._events = {}
+        self._first_seq = 1
+        self._next_seq = 1
+        self._stamp = None
+        self._indexes = {name: {} for name in self.INDEXES}
+        # running max of event times, position i is seq _times_seq0 + i (for time-range bisects)
+        self._times = []
+        self._times_seq0 = 1
+        # newest seq whose time was below the running max; end bisects must not stop before it
+        self._last_late_seq = 0
+        # latest status per workflow; kept even after the events themselves are retired
+        self.workflows = WorkflowIndex()
+
+    def _keys(self, event: dict):
+        yield "event_type", event.get("event_type") or "unknown"
+        yield "repository", event_repo(event)
+        yield "sender", event.get("sender")
+        yield "pr_number", event.get("pr_number")
+
+    def _stat(self):
+        directory = self.store.directory
+        try:
+            dir_stamp = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            try:
+                return "legacy", LEGACY_EVENTS_FILE.stat().st_mtime_ns
+            except FileNotFoundError:
+                return None
+        segments = self.store.segments
+        active = segments[-1].offsets_path if segments else None
+        try:
+            size = active.stat().st_size if active else 0
+        except FileNotFoundError:
+            size = -1
+        return dir_stamp, size
+
+    def refresh(self):
+        with self._lock:
+            stamp = self._stat()
+            if stamp is not None and stamp == self._stamp:
+                return
+            self.store.refresh()
+            # seqs restarted (a fresh log, migrate_events.py): what we hold no longer matches the store
+            if self._events and (self.store.first_seq() < self._first_seq or self.store.next_seq() < self._next_seq):
+                self._reset()
+            self._evict(self.store.first_seq())
+            for seq, event in self.store.iter_from(self._next_seq):
+                self._add(seq, event)
+            self._stamp = self._stat()
+
+    def _add(self, seq: int, event: dict):
+        if not self._events:
+            self._first_seq = seq
+        self._events[seq] = event
+        self._next_seq = seq + 1
+        if event.get("workflow"):
+            self.workflows.add(event["workflow"])
+        if not self._times:
+            self._times_seq0 = seq
+        try:
+            t = to_epoch(event.get("timestamp"))
+        except ValueError:
+            t = None
+        last = self._times[-1] if self._times else 0.0
+        if t is not None and t < last:
+            self._last_late_seq = seq
+        self._times.append(max(t or last, last))
+        for name, key in self._keys(event):
+            if key is None:
+                continue
+            self._indexes[name].setdefault(key, SeqList()).append(seq)
+
+    def _evict(self, first_seq: int):
+        while self._events and self._first_seq < first_seq:
+            event = self._events.pop(self._first_seq, None)
+            if event is not None:
+                for name, key in self._keys(event):
+                    bucket = self._indexes[name].get(key)
+                    if bucket:
+                        bucket.popleft()
+                        if not bucket:
+                            del self._indexes[name][key]
+            self._first_seq += 1
+        trimmed = self._first_seq - self._times_seq0
+        if trimmed > 1024 and trimmed > len(self._times) // 2:
+            del self._times[:trimmed]
+            self._times_seq0 += trimmed
+
+    # -- queries ---------------------------------------------------------------------
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._events)
+
+    def events(self) -> list:
+        with self._lock:
+            self.refresh()
+            return list(self._events.values())
+
+    def first_seq(self) -> int:
+        with self._lock:
+            self.refresh()
+            return self._first_seq if self._events else self._next_seq
+
+    def latest(self):
+        with self._lock:
+            self.refresh()
+            if not self._events:
+                return None
+            return self._events[self._next_seq - 1]
+
+    def lookup(self, index: str, key) -> list:
+        """Events whose `index` field equals `key`, oldest first."""
+        with self._lock:
+            self.refresh()
+            return [self._events[s] for s in self._indexes[index].get(key, _EMPTY)]
+
+    def query(self, filters: dict = None, since: int = None, start=None, end=None, limit: int = 20,
+              before: int = None):
+        """Matching (seq, event) pairs in chronological order.
+
+        `filters` maps index names to values. Without `since` the newest `limit`
+        matches are returned, older than `before` if given; with `since` (a seq
+        cursor) the first `limit` after it. The smallest matching index bucket
+        drives the scan and both time bounds are bisected, so cost follows the
+        result size rather than the history size.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        with self._lock:
+            self.refresh()
+            if not self._events:
+                return []
+            lo, hi = self._first_seq, self._next_seq - 1
+            if since is not None:
+                lo = max(lo, int(since) + 1)
+            if before is not None:
+                hi = min(hi, int(before) - 1)
+            base = self._first_seq - self._times_seq0
+            if start is not None:
+                i = bisect.bisect_left(self._times, to_epoch(start), base)
+                lo = max(lo, self._times_seq0 + i)
+            if end is not None:
+                # past this point every event is newer than `end`, except late ones (out-of-order times)
+                i = bisect.bisect_right(self._times, to_epoch(end), base)
+                hi = min(hi, max(self._times_seq0 + i - 1, self._last_late_seq))
+            if lo > hi:
+                return []
+            start_epoch = to_epoch(start)
+            end_epoch = to_epoch(end)
+
+            if filters:
+                buckets = [self._indexes[name].get(value, _EMPTY) for name, value in filters.items()]
+                candidates = min(buckets, key=len)
+            else:
+                candidates = None
+            ascending = since is not None
+
+            def seqs():
+                if candidates is None:
+                    return range(lo, hi + 1) if ascending else range(hi, lo - 1, -1)
+                return candidates.ascending_from(lo) if ascending else candidates.descending_from(hi)
+
+            matches = []
+            for seq in seqs():
+                if seq > hi:
+                    if ascending:
+                        break
+                    continue
+                if seq < lo:
+                    if ascending:
+                        continue
+                    break
+                event = self._events[seq]
+                if any(value != key for name, key in self._keys(event)
+                       for value in (filters.get(name),) if name in filters):
+                    continue
+                if start_epoch is not None or end_epoch is not None:
+                    t = to_epoch(event.get("timestamp"))
+                    if t is None or (start_epoch is not None and t < start_epoch) \
+                            or (end_epoch is not None and t > end_epoch):
+                        continue
+                matches.append((seq, event))
+                if len(matches) >= limit:
+                    break
+            if not ascending:
+                matches.reverse()
+            return matches
+
+    def workflow_index(self) -> WorkflowIndex:
+        self.refresh()
+        return self.workflows
+
+    def counts(self, index: str) -> dict:
+        with self._lock:
+            self.refresh()
+            return {key: len(seqs) for key, seqs in self._indexes[index].items()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_event_cache() -> EventCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EventCache()
+        return _cache
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+# compact record key -> stored event field
+FIELDS = {
+    "ts": "timestamp",
+    "type": "event_type",
+    "action": "action",
+    "pr": "pr_number",
+    "title": "title",
+    "desc": "description",
+    "base": "base_branch",
+    "head": "compare_branch",
+    "br": "branch",
+    "dlv": "delivery_id",
+    "wf": "workflow",
+}
+_REVERSE = {v: k for k, v in FIELDS.items()}
+
+
+class InternTable:
+    """Append-only `<name>.jsonl` table mapping small integer ids to shared rows.
+
+    Rows are written once per distinct key, so a repository or user costs a few
+    bytes per event instead of a full GitHub object. Readers in other processes
+    pick up new rows lazily when they meet an id they don't know yet.
+    """
+
+    def __init__(self, path: Path, key: str):
+        self.path = Path(path)
+        self.key = key
+        self._lock = threading.Lock()
+        self._rows = []
+        self._ids = {}
+        self._offset = 0
+        self.reload()
+
+    def reload(self):
+        with self._lock:
+            if not self.path.exists():
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._offset += len(line)
+                    row = json.loads(line)
+                    self._rows.append(row)
+                    self._ids[row[self.key]] = len(self._rows) - 1
+
+    def intern(self, row: dict) -> int:
+        key = row.get(self.key)
+        with self._lock:
+            if key in self._ids:
+                return self._ids[key]
+            line = json.dumps(row, separators=(",", ":")).encode() + b"\n"
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._offset += len(line)
+            self._rows.append(row)
+            self._ids[key] = len(self._rows) - 1
+            return self._ids[key]
+
+    def get(self, row_id: int):
+        if row_id >= len(self._rows):
+            self.reload()
+        if 0 <= row_id < len(self._rows):
+            return self._rows[row_id]
+        return None
+
+
+def slim_repository(repo) -> dict:
+    """Keep only the repository fields anything downstream reads."""
+    if not isinstance(repo, dict):
+        return {"full_name": repo, "owner": {"login": None}} if repo else {}
+    owner = repo.get("owner") or {}
+    return {"full_name": repo.get("full_name"), "owner": {"login": owner.get("login")}}
+
+
+class EventCodec:
+    """Encode events as compact records that reference interned repos/actors.
+
+    Decoding hands back the usual event dict; every event of one repository shares
+    the same `repository` dict, so the in-memory copy stays small as well. Records
+    written before this schema existed (full `repository` objects) decode as-is.
+    """
+
+    def __init__(self, directory: Path):
+        self.repositories = InternTable(Path(directory) / "repositories.jsonl", "full_name")
+        self.actors = InternTable(Path(directory) / "actors.jsonl", "login")
+
+    def encode(self, event: dict) -> dict:
+        record = {}
+        for field, value in event.items():
+            if value is None or value == "":
+                continue
+            if field == "repository":
+                repo = slim_repository(value)
+                if repo.get("full_name"):
+                    record["repo"] = self.repositories.intern(repo)
+            elif field == "sender":
+                record["sender"] = self.actors.intern({"login": value})
+            else:
+                record[_REVERSE.get(field, field)] = value
+        return record
+
+    def decode(self, record: dict) -> dict:
+        if "event_type" in record:
+            return record
+        event = {name: None for name in FIELDS.values()}
+        event["title"] = event["description"] = ""
+        event["repository"] = {}
+        event["sender"] = None
+        for key, value in record.items():
+            if key == "repo":
+                event["repository"] = self.repositories.get(value) or {}
+            elif key == "sender":
+                actor = self.actors.get(value)
+                event["sender"] = actor["login"] if actor else None
+            else:
+                event[FIELDS.get(key, key)] = value
+        return event
@@ -0,0 +1,304 @@
+import json
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from event_schema import EventCodec
+
+STORE_DIR = Path(os.environ.get("EVENT_STORE_DIR", Path(__file__).parent / "event_log"))
+LEGACY_EVENTS_FILE = Path(__file__).parent / "github_events.json"
+
+SEGMENT_SUFFIX = ".jsonl"
+OFFSETS_SUFFIX = ".idx"
+MANIFEST_NAME = "index.json"
+_OFFSET = struct.Struct("<Q")
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"{first_seq:020d}"
+
+
+class Segment:
+    """One JSONL file of events plus its `.idx` sidecar of record start offsets."""
+
+    def __init__(self, directory: Path, first_seq: int):
+        self.first_seq = first_seq
+        self.path = directory / (_segment_name(first_seq) + SEGMENT_SUFFIX)
+        self.offsets_path = directory / (_segment_name(first_seq) + OFFSETS_SUFFIX)
+
+    @property
+    def count(self) -> int:
+        try:
+            return self.offsets_path.stat().st_size // _OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def offsets(self, start: int = 0) -> list:
+        with open(self.offsets_path, "rb") as f:
+            f.seek(start * _OFFSET.size)
+            raw = f.read()
+        usable = len(raw) - len(raw) % _OFFSET.size
+        return [o for (o,) in _OFFSET.iter_unpack(raw[:usable])]
+
+    def read(self, start: int = 0):
+        """Yield (seq, event) for every committed record from index `start` on."""
+        offsets = self.offsets(start)
+        if not offsets:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offsets[0])
+            for i in range(len(offsets)):
+                line = f.readline()
+                yield self.first_seq + start + i, json.loads(line)
+
+
+class EventStore:
+    """Append-only, segmented event log.
+
+    Each event is one JSON line appended to the active segment; the byte offset of
+    the record is appended to the segment's `.idx` file afterwards, so a record is
+    only visible to readers once it is complete. Appends are O(1), fsync is batched,
+    and segments rotate at `segment_max_bytes`. Retention drops whole segments
+    once there are more than `max_segments`; with `on_retire(first_seq, events)`
+    a segment is handed over (e.g. to the archive) before it is deleted. Records
+    are stored in the compact form produced by `event_schema.EventCodec`.
+    """
+
+    def __init__(self, directory=STORE_DIR, segment_max_bytes: int = 4 * 1024 * 1024,
+                 max_segments: int = 16, fsync_every: int = 32, fsync_interval: float = 1.0,
+                 readonly: bool = False, import_legacy: bool = True, on_retire=None):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.readonly = readonly
+        self.import_legacy = import_legacy
+        self.on_retire = on_retire
+        self.codec = EventCodec(self.directory)
+        self._lock = threading.Lock()
+        self._segments = []
+        self._data = None
+        self._offsets = None
+        self._active_count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if readonly:
+            self.refresh()
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._open()
+
+    # -- discovery -------------------------------------------------------------------
+
+    def refresh(self):
+        """Re-list segments on disk (used by readers in other processes)."""
+        firsts = []
+        if self.directory.exists():
+            for p in self.directory.glob("*" + SEGMENT_SUFFIX):
+                try:
+                    firsts.append(int(p.stem))
+                except ValueError:
+                    continue
+        self._segments = [Segment(self.directory, s) for s in sorted(firsts)]
+        return self._segments
+
+    @property
+    def segments(self) -> list:
+        return list(self._segments)
+
+    def _open(self):
+        self.refresh()
+        if not self._segments:
+            self._segments = [Segment(self.directory, 1)]
+            self._open_active()
+            if self.import_legacy and LEGACY_EVENTS_FILE.exists():
+                self._import_legacy(LEGACY_EVENTS_FILE)
+            return
+        self._active_count = self._recover(self._segments[-1])
+        self._open_active()
+
+    def _open_active(self):
+        active = self._segments[-1]
+        self._data = open(active.path, "ab")
+        self._offsets = open(active.offsets_path, "ab")
+
+    def _recover(self, segment: Segment):
+        """Drop a torn tail left by a crash: trust only offsets of complete lines."""
+        valid = []
+        if segment.path.exists():
+            with open(segment.path, "rb") as f:
+                pos = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    valid.append(pos)
+                    pos += len(line)
+            with open(segment.path, "r+b") as f:
+                f.truncate(pos)
+        with open(segment.offsets_path, "wb") as f:
+            f.write(b"".join(_OFFSET.pack(o) for o in valid))
+        return len(valid)
+
+    def _import_legacy(self, path: Path):
+        try:
+            events = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Could not import legacy events file {path}: {e}")
+            return
+        for event in events:
+            self.append(event, sync=False)
+        self.sync()
+
+    # -- writing ---------------------------------------------------------------------
+
+    def append(self, event: dict, sync: bool = None) -> int:
+        """Append one event and return its sequence number."""
+        if self.readonly:
+            raise RuntimeError("EventStore opened read-only")
+        with self._lock:
+            record = self.codec.encode(event)
+            line = json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+            active = self._segments[-1]
+            offset = self._data.tell()
+            if offset and offset + len(line) > self.segment_max_bytes:
+                self._rotate()
+                active = self._segments[-1]
+                offset = 0
+            self._data.write(line)
+            self._data.flush()
+            self._offsets.write(_OFFSET.pack(offset))
+            self._offsets.flush()
+            seq = active.first_seq + self._active_count
+            self._active_count += 1
+            self._unsynced += 1
+            if sync or (sync is None and self._sync_due()):
+                self._fsync()
+            return seq
+
+    def _sync_due(self) -> bool:
+        return (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval)
+
+    def _fsync(self):
+        if self._unsynced:
+            os.fsync(self._data.fileno())
+            os.fsync(self._offsets.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._fsync()
+
+    def sync_if_due(self) -> bool:
+        """fsync records left over from a burst once `fsync_interval` has passed; for a
+        periodic timer in the owning server, since `append` only checks on the next append."""
+        with self._lock:
+            if self._data is None or not self._unsynced or time.monotonic() - self._last_sync < self.fsync_interval:
+                return False
+            self._fsync()
+            return True
+
+    def _rotate(self):
+        self._fsync()
+        self._data.close()
+        self._offsets.close()
+        active = self._segments[-1]
+        self._segments.append(Segment(self.directory, active.first_seq + self._active_count))
+        self._active_count = 0
+        self._open_active()
+        self._compact()
+        self._write_manifest()
+
+    def _compact(self):
+        while len(self._segments) > self.max_segments:
+            oldest = self._segments[0]
+            if self.on_retire is not None:
+                try:
+                    self.on_retire(oldest.first_seq, [self.codec.decode(r) for _, r in oldest.read()])
+                except Exception as e:
+                    # keep the segment; the next rotation tries again
+                    print(f"Could not retire segment {oldest.path.name}, keeping it: {e!r}")
+                    break
+            self._segments.pop(0)
+            oldest.path.unlink(missing_ok=True)
+            oldest.offsets_path.unlink(missing_ok=True)
+
+    def _write_manifest(self):
+        manifest = {
+            "segments": [
+                {"name": s.path.name, "first_seq": s.first_seq, "count": s.count, "bytes": s.size}
+                for s in self._segments
+            ],
+        }
+        tmp = self.directory / (MANIFEST_NAME + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.directory / MANIFEST_NAME)
+
+    def close(self):
+        with self._lock:
+            if self._data:
+                self._fsync()
+                self._data.close()
+                self._offsets.close()
+                self._data = self._offsets = None
+
+    # -- reading ---------------------------------------------------------------------
+
+    def first_seq(self) -> int:
+        return self._segments[0].first_seq if self._segments else 1
+
+    def next_seq(self) -> int:
+        if not self._segments:
+            return 1
+        last = self._segments[-1]
+        return last.first_seq + last.count
+
+    def iter_from(self, seq: int = 0):
+        """Yield (seq, event) for all stored events with sequence >= `seq`."""
+        if self.readonly and self.import_legacy and not self._segments and LEGACY_EVENTS_FILE.exists():
+            # no writer has migrated the old file yet; serve it as-is
+            for i, event in enumerate(json.loads(LEGACY_EVENTS_FILE.read_text()), 1):
+                if i >= seq:
+                    yield i, event
+            return
+        for segment in list(self._segments):
+            end = segment.first_seq + segment.count
+            if end <= seq:
+                continue
+            start = max(0, seq - segment.first_seq)
+            try:
+                for record_seq, record in segment.read(start):
+                    yield record_seq, self.codec.decode(record)
+            except FileNotFoundError:
+                # compacted away underneath us
+                continue
+
+    def tail(self, n: int) -> list:
+        return [e for _, e in self.iter_from(max(self.first_seq(), self.next_seq() - n))]
+
+    def read_all(self) -> list:
+        return [e for _, e in self.iter_from(0)]
+
+
+_store = None
+
+
+def get_event_store(readonly: bool = True) -> EventStore:
+    """Process-wide store handle. Readers get a refreshed read-only view."""
+    global _store
+    if _store is None:
+        _store = EventStore(readonly=readonly)
+    elif _store.readonly:
+        _store.refresh()
+    return _store
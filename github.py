@@ -1,27 +1,142 @@
 from dotenv import load_dotenv
-from fastmcp import FastMCP
 import json
-from pathlib import Path
-from typing import TypedDict,List, Union
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from typing import TYPE_CHECKING, TypedDict,List, Union
 from datetime import datetime
+from event_cache import get_event_cache, event_repo, to_epoch
+from archive import get_archive
+from rollups import DIMENSIONS, RollupReader
 import pytz
-import os
-import requests
+import logging
+from github_client import get_github_client
+from tool_executor import execute_tool_calls
+from lazy_mcp import LazyMCP
+
+if TYPE_CHECKING:
+    from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
 load_dotenv()
 
-mcp=FastMCP(name="github_mcp")
+mcp=LazyMCP(name="github_mcp")
+
 
-EVENTS_FILE=Path(__file__).parent/"github_events.json"
 
     
+_rollup_reader=None
+
+def get_rollups():
+    global _rollup_reader
+    if _rollup_reader is None:
+        _rollup_reader=RollupReader(get_event_cache())
+    return _rollup_reader.current()
+
+DEFAULT_EVENT_FIELDS=["seq","timestamp","event_type","action","repo","sender","pr_number","title"]
+MAX_FIELD_CHARS=300
+
+def _project(seq:int,event:dict,fields:list)->dict:
+    row={}
+    for field in fields:
+        if field=="seq":
+            value=seq
+        elif field=="repo":
+            value=event_repo(event)
+        else:
+            value=event.get(field)
+        if isinstance(value,str) and len(value)>MAX_FIELD_CHARS:
+            value=value[:MAX_FIELD_CHARS]+"…"
+        if value not in (None,""):
+            row[field]=value
+    return row
+
 @mcp.tool
-def get_recent_actions_events()->str:
-    """Return recent GitHub Actions events from stored webhook payloads"""
-    if EVENTS_FILE.exists():
-        return json.loads(EVENTS_FILE.read_text())
-    return []
+def query_events(event_type:str=None,repo:str=None,sender:str=None,pr_number:int=None,
+                 since:int=None,before:int=None,start_time:str=None,end_time:str=None,limit:int=20,
+                 fields:List[str]=None,max_tokens:int=1500)->dict:
+    """Query stored GitHub events. Filter by event_type, repo (owner/name), sender, pr_number
+    and ISO start_time/end_time. Without `since`, pages run newest first: pass next_cursor as
+    `before` to get the next older page. With `since`, pages run oldest first: pass next_cursor
+    as `since` to get the next newer page. Returns at most `limit` compact events with only
+    `fields`, kept under ~max_tokens."""
+    fields=fields or DEFAULT_EVENT_FIELDS
+    limit=max(1,min(int(limit),200))
+    filters={"event_type":event_type,"repository":repo,"sender":sender,"pr_number":pr_number}
+    ascending=since is not None
+    # one extra match tells whether another page exists
+    matches=get_event_cache().query(filters,since=since,before=before,start=start_time,end=end_time,limit=limit+1)
+    has_more=len(matches)>limit
+    matches=matches[:limit] if ascending else matches[-limit:]
+    rows=[]
+    budget=max_tokens*4  # ~4 characters per token
+    truncated=False
+    # keep the oldest rows when paging forward, the newest when paging backwards
+    ordered=matches if ascending else list(reversed(matches))
+    for seq,event in ordered:
+        row=_project(seq,event,fields)
+        cost=len(json.dumps(row,default=str))
+        if rows and cost>budget:
+            truncated=True
+            break
+        budget-=cost
+        rows.append((seq,row))
+    rows.sort(key=lambda r:r[0])
+    if rows:
+        next_cursor=rows[-1][0] if ascending else rows[0][0]
+    else:
+        next_cursor=since if ascending else before
+    return {
+        "events":[row for _,row in rows],
+        "next_cursor":next_cursor,
+        "has_more":has_more or truncated,
+        "truncated_for_budget":truncated,
+    }
+
+def _event_key(event:dict):
+    if event.get("delivery_id"):
+        return event["delivery_id"]
+    return (event.get("timestamp"),event.get("event_type"),event_repo(event),event.get("title"))
+
+HISTORY_FIELDS=["timestamp","event_type","action","repo","sender","pr_number","title"]
+
+@mcp.tool
+def query_event_history(start_time:str,end_time:str=None,repo:str=None,event_type:str=None,sender:str=None,
+                        limit:int=50,oldest_first:bool=False,fields:List[str]=None,max_tokens:int=1500)->dict:
+    """Query the full GitHub event history by time, including archived events older than query_events
+    can see. Give an ISO start_time (and optionally end_time); filter by repo (owner/name), event_type
+    and sender. Returns the newest `limit` matches in the range (the oldest with oldest_first=True),
+    in chronological order, kept under ~max_tokens."""
+    fields=[f for f in (fields or HISTORY_FIELDS) if f!="seq"]
+    limit=max(1,min(int(limit),200))
+    archived=get_archive().query(start_time,end_time,repo,event_type,sender,limit=limit,oldest_first=oldest_first)
+    filters={"event_type":event_type,"repository":repo,"sender":sender}
+    live=get_event_cache().query(filters,since=0 if oldest_first else None,start=start_time,end=end_time,limit=limit)
+    # a retired segment is archived before the live cache drops it, so the two can overlap
+    seen=set()
+    merged=[]
+    for t,event in sorted(archived+[(to_epoch(e.get("timestamp")) or 0.0,e) for _,e in live],key=lambda m:m[0]):
+        key=_event_key(event)
+        if key not in seen:
+            seen.add(key)
+            merged.append((t,event))
+    has_more=len(merged)>limit or len(archived)>=limit or len(live)>=limit
+    merged=merged[:limit] if oldest_first else merged[-limit:]
+    rows=[]
+    budget=max_tokens*4
+    truncated=False
+    for _,event in (merged if oldest_first else reversed(merged)):
+        row=_project(None,event,fields)
+        cost=len(json.dumps(row,default=str))
+        if rows and cost>budget:
+            truncated=True
+            break
+        budget-=cost
+        rows.append(row)
+    if not oldest_first:
+        rows.reverse()
+    return {"events":rows,"has_more":has_more,"truncated_for_budget":truncated}
+
+@mcp.tool
+def get_recent_actions_events(limit:int=20)->dict:
+    """Return the most recent stored GitHub events in compact form (use query_events to filter)"""
+    return query_events.fn(limit=limit)
 
 
 
@@ -29,68 +144,74 @@ def get_recent_actions_events()->str:
 @mcp.tool
 def get_repository_detail() -> str:
     """Return basic repository info and summary of recent events"""
-    if not EVENTS_FILE.exists():
-        return "No repository events available."
-    events = json.loads(EVENTS_FILE.read_text())
-    if not events:
+    latest_event = get_event_cache().latest()
+    if not latest_event:
         return "No events recorded yet."
     
-    latest_event = events[-1]
     repo = latest_event.get("repository", {})
     full_name = repo.get("full_name", "Unknown")
     owner = repo.get("owner", {}).get("login", "Unknown")
 
-    counts = {}
-    for e in events:
-        etype = e.get('event_type', 'unknown')
-        counts[etype] = counts.get(etype, 0) + 1
-
+    rollups = get_rollups()
+    counts = rollups.counts("event_type")
     count_summary = ", ".join(f"{etype}: {count}" for etype, count in counts.items())
+    last_24h = sum(rollups.counts("event_type", "24h").values())
 
     return (
         f"Repository: {full_name} (owner: {owner})\n"
-        f"Total events: {len(events)} ({count_summary})\n"
+        f"Total events: {rollups.total} ({count_summary}), last 24h: {last_24h}\n"
         f"Most recent event: {latest_event.get('event_type')} "
         f"by {latest_event.get('sender')}"
     )
 
+@mcp.tool
+def get_event_stats(window:str="24h",dimension:str="event_type",top:int=10)->str:
+    """Event counts over a rolling window ('1h', '24h', '7d' or 'all') grouped by
+    dimension ('event_type', 'repository', 'sender' or 'action')."""
+    if dimension not in DIMENSIONS:
+        return f"Unknown dimension {dimension!r}, expected one of: {', '.join(DIMENSIONS)}"
+    try:
+        counts = get_rollups().counts(dimension, window)
+    except ValueError as e:
+        return str(e)
+    if not counts:
+        return f"No events in window {window}."
+    ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:max(1, top)]
+    lines = "\n".join(f"- {key}: {count}" for key, count in ranked)
+    return f"Events by {dimension} ({window}), total {sum(counts.values())}:\n{lines}"
+
 @mcp.tool
 def get_workflow_status(workflow_name:str)->str:
     """Return the latest status of a GitHub Actions workflow by name."""
-    if not EVENTS_FILE.exists():
-        return "No GitHub Actions events found."
-    events=json.loads(EVENTS_FILE.read_text())
-    events=[e for e in events if e.get("workflow_job") or e.get("workflow_run")]
-    for event in reversed(events):
-        job=event.get("workflow_job")
-        run=event.get("workflow_run")
-        name=""
-        status=""
-        if job and workflow_name.lower() in job.get("name","").lower():
-            name=job['name']
-            status=job['conclusion'] or job['status']
-        elif run and workflow_name.lower() in run.get("name","").lower():
-            name=run['name']
-            status=run['conclusion'] or run['status']
-
-        if name:
-            return f"workflow '{name}' status: {status}"
-    return f"No recent status found for workflow: {workflow_name}"
+    run=get_event_cache().workflow_index().status(workflow_name)
+    if not run:
+        return f"No recent status found for workflow: {workflow_name}"
+    status=run.get('conclusion') or run.get('status')
+    details=", ".join(f"{k}: {run[k]}" for k in ("branch","run_id","duration_s","completed_at") if run.get(k) is not None)
+    return f"workflow '{run['name']}' status: {status}" + (f" ({details})" if details else "")
+
+@mcp.tool
+def get_workflow_duration_stats(workflow_name:str)->str:
+    """Return p50/p95 run durations for a GitHub Actions workflow or job by name."""
+    stats=get_event_cache().workflow_index().duration_stats(workflow_name)
+    if not stats:
+        return f"No runs found for workflow: {workflow_name}"
+    if not stats["runs"]:
+        return f"workflow '{stats['name']}' has no completed runs yet"
+    return (f"workflow '{stats['name']}' over {stats['runs']} completed runs: "
+            f"p50 {stats['p50_s']}s, p95 {stats['p95_s']}s, max {stats['max_s']}s")
 
 
 @mcp.tool
 def summarize_latest_event()->str:
     """Summarize the latest GitHub event (PR,push etc)"""
-    if not EVENTS_FILE.exists():
-        return "No GitHub events found."
-    events=json.loads(EVENTS_FILE.read_text())
-    if not events:
+    latest=get_event_cache().latest()
+    if not latest:
         return "No events stored."
-    latest=events[-1]
     event_type=latest.get('event_type','unknown')
-    repo=latest.get("repository",'unknown')
+    repo=(latest.get("repository") or {}).get("full_name",'unknown')
     sender=latest.get('sender','unknown')
-    title=repo.get("title",'')
+    title=latest.get("title",'')
     description=latest.get("description",'')
     timestamp=latest.get('timestamp')
     if timestamp:
@@ -110,51 +231,21 @@ def summarize_latest_event()->str:
         f"# Event: {event_type}\nRepository:{repo}\nTitle: {title}\nDescription:{description}\nTimestamp:{formatted_time}\nSource: {sender}"
     )
 
-import requests
-
 @mcp.tool
 def merge_pull_request(repo: str, pr_number: int) -> str:
     """Merge a PR using GitHub API"""
-    import logging
-    url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}/merge"
-    token = os.environ.get("GITHUB_PAT")
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json"
-    }
-
-    response = requests.put(url, headers=headers)
-    logging.info(f"Merge Request URL: {url}")
-    logging.info(f"Response Code: {response.status_code}")
-    logging.info(f"Response Body: {response.text}")
-
-    if response.status_code == 200:
-        return f"✅ Successfully merged PR #{pr_number} in {repo}."
-    else:
-        return f"❌ Failed to merge PR #{pr_number} in {repo}. Reason: {response.json().get('message', 'Unknown error')}"
+    response = get_github_client().request("PUT", f"repos/{repo}/pulls/{pr_number}/merge")
+    logging.info(f"Merge PR #{pr_number} in {repo}: {response.status}")
+    return _merge_result(response, repo, pr_number)
 
 
 @mcp.tool
 def close_pull_request(repo: str, pr_number: int) -> str:
     """Close a pull request without merging using GitHub API"""
-    import logging
-    url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}"
-    token = os.environ.get("GITHUB_PAT")
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    data={"state": "closed"}
-    logging.info(f"Closing PR URL: {url}")
     try:
-        response = requests.patch(url, json=data, headers=headers)
-        logging.info(f"Response Code: {response.status_code}")
-        logging.info(f"Response Body: {response.text}")
-        if response.status_code == 200:
-            print("closed pull_request")
-            return f"✅ Closed pull request #{pr_number} in {repo}"
-        else:
-            return f"❌ Failed to close PR: {response.status_code} - {response.text}"
+        response = get_github_client().request("PATCH", f"repos/{repo}/pulls/{pr_number}", body={"state": "closed"})
+        logging.info(f"Close PR #{pr_number} in {repo}: {response.status}")
+        return _close_result(response, repo, pr_number)
     except Exception as e:
         logging.error(f"Exception while closing PR: {e}")
         return f"❌ Exception while closing PR:{str(e)}"
@@ -162,36 +253,58 @@ def close_pull_request(repo: str, pr_number: int) -> str:
 @mcp.tool
 def get_pull_request_details(repo:str,pr_number:int)->dict:
     """Get details of a pull request from Github API"""
-    url=f"https://api.github.com/repos/{repo}/pulls/{pr_number}"
-    token=os.environ.get("GITHUB_PAT")
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    response=requests.get(url,headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return {"error":f"Failed to get PR detail: {response.status_code}{response.text}"} 
+    return _details_result(get_github_client().get(f"repos/{repo}/pulls/{pr_number}"))
+
+
+def _merge_result(response, repo, pr_number) -> str:
+    if response.status == 200:
+        return f"✅ Successfully merged PR #{pr_number} in {repo}."
+    return f"❌ Failed to merge PR #{pr_number} in {repo}. Reason: {response.message()}"
+
+def _close_result(response, repo, pr_number) -> str:
+    if response.status == 200:
+        return f"✅ Closed pull request #{pr_number} in {repo}"
+    return f"❌ Failed to close PR: {response.status} - {response.message()}"
+
+def _details_result(response) -> dict:
+    if response.status == 200:
+        return response.data
+    return {"error": f"Failed to get PR detail: {response.status}{response.message()}"}
+
+
+# Async variants for the FastAPI server: same client and cache, on the shared pooled
+# aiohttp session, so a slow GitHub round trip doesn't block the event loop.
+
+async def merge_pull_request_async(repo: str, pr_number: int) -> str:
+    """Merge a PR using GitHub API"""
+    response = await get_github_client().arequest("PUT", f"repos/{repo}/pulls/{pr_number}/merge")
+    logging.info(f"Merge PR #{pr_number} in {repo}: {response.status}")
+    return _merge_result(response, repo, pr_number)
+
+async def close_pull_request_async(repo: str, pr_number: int) -> str:
+    """Close a pull request without merging using GitHub API"""
+    try:
+        response = await get_github_client().arequest("PATCH", f"repos/{repo}/pulls/{pr_number}", body={"state": "closed"})
+        logging.info(f"Close PR #{pr_number} in {repo}: {response.status}")
+        return _close_result(response, repo, pr_number)
+    except Exception as e:
+        logging.error(f"Exception while closing PR: {e}")
+        return f"❌ Exception while closing PR:{str(e)}"
+
+async def get_pull_request_details_async(repo: str, pr_number: int) -> dict:
+    """Get details of a pull request from Github API"""
+    return _details_result(await get_github_client().aget(f"repos/{repo}/pulls/{pr_number}"))
 
 
 
 class GitHubAgentState(TypedDict):
-    messages:List[Union[HumanMessage,AIMessage,ToolMessage]]
+    messages:List[Union["HumanMessage","AIMessage","ToolMessage"]]
 
-gt_tools=[get_recent_actions_events.fn,get_workflow_status.fn,get_repository_detail.fn,summarize_latest_event.fn,merge_pull_request.fn,close_pull_request.fn,get_pull_request_details.fn]
+gt_tools=[get_recent_actions_events.fn,query_events.fn,query_event_history.fn,get_workflow_status.fn,get_workflow_duration_stats.fn,get_repository_detail.fn,get_event_stats.fn,summarize_latest_event.fn,merge_pull_request.fn,close_pull_request.fn,get_pull_request_details.fn]
 github_tools= {tool.__name__:tool for tool in gt_tools}
 
 def github_agent(state:GitHubAgentState)->GitHubAgentState:
     tool_calls=state["messages"][-1].tool_calls
-    results=[]
-    for t in tool_calls:
-        fn=github_tools.get(t['name'])
-        if fn:
-            try:
-                result=fn(**t["args"])
-            except Exception as e:
-                result=f"Error: {e}"
-            results.append(ToolMessage(tool_call_id=t['id'],name=t['name'],content=str(result)))
-    return {"messages":state['messages']+results}
-
+    results=execute_tool_calls(tool_calls,github_tools)
+    # a delta: the graph's add_messages reducer appends it
+    return {"messages":results}
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_pool import get_session
+from metrics import registry
+
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+# longest a request waits for rate-limit quota before failing with a 429 instead
+GITHUB_MAX_THROTTLE_WAIT = float(os.environ.get("GITHUB_MAX_THROTTLE_WAIT", 10))
+
+
+class GitHubResponse(NamedTuple):
+    status: int
+    data: object
+    headers: dict
+    from_cache: bool = False
+
+    def message(self) -> str:
+        if isinstance(self.data, dict):
+            return self.data.get("message", "Unknown error")
+        return str(self.data or "Unknown error")
+
+
+def _written(key: str, url: str) -> bool:
+    """Whether a write to `url` can change the cached GET `key`: the resource itself, anything
+    under it, and for /merge its parent PR. Whole path segments only, so /repos/a/b leaves /repos/a/bc alone."""
+    path = key.split("?", 1)[0]
+    if path == url or path.startswith(url + "/"):
+        return True
+    return url.endswith("/merge") and path == url[:-len("/merge")]
+
+
+class GitHubClient:
+    """Shared GitHub REST client.
+
+    * keep-alive pooling: one `requests.Session` for sync callers, the shared
+      aiohttp session from http_pool for async ones;
+    * an LRU of GET responses keyed by URL, revalidated with `If-None-Match`
+      (a 304 does not count against the rate limit);
+    * rate-limit tracking from `X-RateLimit-*`: once the remaining quota drops
+      below `slowdown_fraction` of the limit, requests are spaced out so the
+      quota lasts until the reset, and they wait for the reset at zero. A
+      wait longer than `max_wait` is not slept through: the request returns
+      a local 429 response with Retry-After instead;
+    * hit rate and latency stats via `stats()`.
+    """
+
+    def __init__(self, base_url: str = GITHUB_API_URL, token: str = None, cache_size: int = 512,
+                 pool_size: int = 20, slowdown_fraction: float = 0.1, timeout: float = 10,
+                 max_wait: float = GITHUB_MAX_THROTTLE_WAIT):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.cache_size = cache_size
+        self.slowdown_fraction = slowdown_fraction
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.rate_limit = {"limit": None, "remaining": None, "reset": None}
+        self.counters = {"requests": 0, "cache_hits": 0, "cache_misses": 0, "throttled": 0, "rate_limited": 0}
+        self._latencies = deque(maxlen=1000)
+
+    # -- helpers ---------------------------------------------------------------------
+
+    def url(self, path: str) -> str:
+        return path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+
+    def _headers(self, url: str, method: str) -> dict:
+        headers = {
+            "Authorization": f"Bearer {self.token or os.environ.get('GITHUB_PAT')}",
+            "Accept": "application/vnd.github+json",
+        }
+        if method == "GET":
+            with self._lock:
+                cached = self._cache.get(url)
+            if cached and cached.headers.get("ETag"):
+                headers["If-None-Match"] = cached.headers["ETag"]
+        return headers
+
+    def throttle_delay(self) -> float:
+        """Seconds to wait before the next request to stay inside the rate limit."""
+        limit, remaining, reset = (self.rate_limit[k] for k in ("limit", "remaining", "reset"))
+        if remaining is None or reset is None or not limit:
+            return 0.0
+        until_reset = max(0.0, reset - time.time())
+        if remaining <= 0:
+            return until_reset
+        if remaining < limit * self.slowdown_fraction:
+            return until_reset / remaining
+        return 0.0
+
+    def _rate_limited(self, method: str, delay: float) -> GitHubResponse:
+        """Local 429 for a request that would have to wait `delay` seconds for quota."""
+        self.counters["rate_limited"] += 1
+        registry.inc("github_api_requests_total", method=method, status=429)
+        return GitHubResponse(429, {"message": f"GitHub API rate limit exhausted, resets in {delay:.0f}s"},
+                              {"Retry-After": str(int(delay) + 1)})
+
+    def _record(self, url: str, method: str, status: int, data, headers: dict, started: float) -> GitHubResponse:
+        elapsed = time.perf_counter() - started
+        self._latencies.append(elapsed)
+        self.counters["requests"] += 1
+        registry.observe("stage_seconds", elapsed, stage="github_api")
+        registry.inc("github_api_requests_total", method=method, status=status)
+        for key, header in (("limit", "X-RateLimit-Limit"), ("remaining", "X-RateLimit-Remaining"),
+                            ("reset", "X-RateLimit-Reset")):
+            if header in headers:
+                try:
+                    self.rate_limit[key] = int(headers[header])
+                except ValueError:
+                    pass
+        with self._lock:
+            if method == "GET":
+                if status == 304 and url in self._cache:
+                    self.counters["cache_hits"] += 1
+                    self._cache.move_to_end(url)
+                    cached = self._cache[url]
+                    return cached._replace(from_cache=True)
+                self.counters["cache_misses"] += 1
+                if status == 200 and headers.get("ETag"):
+                    self._cache[url] = GitHubResponse(status, data, {"ETag": headers["ETag"]})
+                    self._cache.move_to_end(url)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            else:
+                for key in [k for k in self._cache if _written(k, url)]:
+                    del self._cache[key]
+        return GitHubResponse(status, data, dict(headers))
+
+    # -- sync ------------------------------------------------------------------------
+
+    def request(self, method: str, path: str, body=None) -> GitHubResponse:
+        url = self.url(path)
+        delay = self.throttle_delay()
+        if delay > self.max_wait:
+            return self._rate_limited(method, delay)
+        if delay:
+            self.counters["throttled"] += 1
+            time.sleep(delay)
+        started = time.perf_counter()
+        response = self.session.request(method, url, json=body, headers=self._headers(url, method),
+                                        timeout=self.timeout)
+        try:
+            data = response.json() if response.content else None
+        except ValueError:
+            data = response.text
+        return self._record(url, method, response.status_code, data, response.headers, started)
+
+    def get(self, path: str) -> GitHubResponse:
+        return self.request("GET", path)
+
+    # -- async -----------------------------------------------------------------------
+
+    async def arequest(self, method: str, path: str, body=None) -> GitHubResponse:
+        url = self.url(path)
+        delay = self.throttle_delay()
+        if delay > self.max_wait:
+            return self._rate_limited(method, delay)
+        if delay:
+            self.counters["throttled"] += 1
+            await asyncio.sleep(delay)
+        session = await get_session()
+        started = time.perf_counter()
+        async with session.request(method, url, json=body, headers=self._headers(url, method)) as response:
+            raw = await response.read()
+            try:
+                data = json.loads(raw) if raw else None
+            except ValueError:
+                data = raw.decode(errors="replace")
+            return self._record(url, method, response.status, data, response.headers, started)
+
+    async def aget(self, path: str) -> GitHubResponse:
+        return await self.arequest("GET", path)
+
+    # -- reporting -------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        samples = sorted(self._latencies)
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2) if samples else None
+
+        return {
+            **self.counters,
+            "cache_entries": len(self._cache),
+            "cache_hit_rate": round(self.counters["cache_hits"] / lookups, 3) if lookups else None,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+            "rate_limit": dict(self.rate_limit),
+        }
+
+
+_client = None
+
+
+def _rate_limit_remaining():
+    if _client is None or _client.rate_limit["remaining"] is None:
+        raise LookupError("no GitHub responses yet")
+    return _client.rate_limit["remaining"]
+
+
+registry.gauge_callback("github_rate_limit_remaining", _rate_limit_remaining, "Last X-RateLimit-Remaining seen")
+
+
+def get_github_client() -> GitHubClient:
+    global _client
+    if _client is None:
+        _client = GitHubClient()
+    return _client
@@ -0,0 +1,50 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 100))
+BLOCKING_IO_WORKERS = int(os.environ.get("BLOCKING_IO_WORKERS", 16))
+
+_session = None
+_executor = None
+
+
+async def get_session() -> ClientSession:
+    """Shared keep-alive client session for the running event loop."""
+    global _session
+    if _session is None or _session.closed:
+        _session = ClientSession(
+            connector=TCPConnector(limit=HTTP_POOL_SIZE, keepalive_timeout=60),
+            timeout=ClientTimeout(total=10),
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+    return _executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a synchronous (e.g. `requests`-based) tool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(fn, *args, **kwargs))
+
+
+def shutdown_executor(wait: bool = True):
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
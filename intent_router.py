@@ -0,0 +1,92 @@
+import re
+
+# Word-bounded so "pr" no longer matches inside "prompt", "approve", "print"..., with the
+# inflections the old substring match accepted ("repositories", "committed", "merging") spelled out
+GITHUB_KEYWORDS = re.compile(
+    r"\b(?:pull[ _]?requests?|merg(?:e[sd]?|ing)|commit(?:s|ted|ting)?|branch(?:es|ed)?|repositor(?:y|ies)|repos?"
+    r"|github|prs?|pr_number|events?|git|checkout|tag(?:s|ged)?|clon(?:e[sd]?|ing)|workflows?)\b",
+    re.IGNORECASE,
+)
+
+_NAME = r"['\"`]?(?P<workflow_name>[\w./ -]+?)['\"`]?"
+_REPO = r"(?P<repo>[\w.-]+/[\w.-]+)"
+_PR = r"(?:pr|pull[ _]?request)\s*#?\s*(?P<pr_number>\d+)"
+_END = r"\s*[?.!]*\s*$"
+# optional lead-in of a plain question ("show me the ...", "what's the ..."); rules match the whole message
+_ASK = r"^(?:(?:what(?:'s| is| was| are)|show(?:\s+me)?|get|give\s+me|tell\s+me(?:\s+about)?|summari[sz]e)\s+)?(?:the\s+)?"
+
+
+def _format_pr(details) -> str:
+    if not isinstance(details, dict):
+        return str(details)
+    if details.get("error"):
+        return details["error"]
+    state = "merged" if details.get("merged") else details.get("state", "unknown")
+    return (
+        f"PR #{details.get('number')} '{details.get('title', '')}' is {state}\n"
+        f"- Base: {(details.get('base') or {}).get('ref')} <- Head: {(details.get('head') or {}).get('ref')}\n"
+        f"- Author: {(details.get('user') or {}).get('login', 'unknown')}\n"
+        f"- URL: {details.get('html_url', '')}"
+    )
+
+
+# (tool name, patterns, formatter); the first matching pattern wins. Every pattern is anchored
+# at both ends, so a compound request ("... and post it to slack") still goes to the LLM.
+RULES = [
+    ("get_workflow_status", [
+        rf"^(?:what(?:'s| is)\s+(?:the\s+)?)?(?:status|state|result)\s+of\s+(?:the\s+)?(?:workflow|pipeline|build|job|ci)\s+{_NAME}{_END}",
+        rf"^(?:what(?:'s| is)\s+(?:the\s+)?)?(?:workflow|pipeline|build|job|ci)\s+{_NAME}\s+(?:status|state|result){_END}",
+        rf"^(?:did|has|is)\s+(?:the\s+)?(?:workflow|pipeline|build|job)\s+{_NAME}\s+(?:pass|passed|fail|failed|finish|finished|succeed|succeeded|running){_END}",
+    ], str),
+    ("summarize_latest_event", [
+        _ASK + r"(?:latest|last|most recent|newest)\s+(?:github\s+)?event" + _END,
+        r"^what(?:'s| is| just)?\s+(?:just\s+)?happened(?:\s+on\s+github)?" + _END,
+    ], str),
+    ("get_repository_detail", [
+        _ASK + r"(?:repo|repository)\s+(?:summary|details?|info|overview|stats)" + _END,
+        r"^summar(?:y|ize|ise)\s+(?:of\s+)?(?:the\s+)?(?:repo|repository)" + _END,
+    ], str),
+    ("get_pull_request_details", [
+        rf"{_ASK}(?:details?|status|info)\s+(?:of|for|on)\s+{_PR}\s+(?:in|on|of|from)\s+{_REPO}{_END}",
+        rf"{_ASK}{_PR}\s+(?:in|on|of|from)\s+{_REPO}\s+(?:details?|status|info){_END}",
+    ], _format_pr),
+]
+
+_COMPILED = [
+    (tool, [re.compile(p, re.IGNORECASE) for p in patterns], formatter)
+    for tool, patterns, formatter in RULES
+]
+
+
+def match_intent(text: str):
+    """Return (tool_name, kwargs, formatter) for a routine question, or None."""
+    text = text.strip()
+    for tool, patterns, formatter in _COMPILED:
+        for pattern in patterns:
+            m = pattern.search(text)
+            if not m:
+                continue
+            kwargs = {k: v.strip() for k, v in m.groupdict().items() if v}
+            if "pr_number" in kwargs:
+                kwargs["pr_number"] = int(kwargs["pr_number"])
+            return tool, kwargs, formatter
+    return None
+
+
+def route_intent(text: str, tools: dict):
+    """Answer `text` straight from the matching tool, skipping the LLM. None if no rule applies."""
+    matched = match_intent(text)
+    if matched is None:
+        return None
+    tool, kwargs, formatter = matched
+    fn = tools.get(tool)
+    if fn is None:
+        return None
+    try:
+        return formatter(fn(**kwargs))
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def is_github_question(text: str) -> bool:
+    return GITHUB_KEYWORDS.search(text) is not None
@@ -0,0 +1,48 @@
+class LazyTool:
+    """What `@mcp.tool` returns here: the plain function on `.fn`, like fastmcp's FunctionTool."""
+
+    def __init__(self, fn, options: dict):
+        self.fn = fn
+        self.name = options.get("name") or fn.__name__
+        self.options = options
+
+    def __call__(self, *args, **kwargs):
+        return self.fn(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyTool({self.name})"
+
+
+class LazyMCP:
+    """Drop-in for `FastMCP(name=...)` as a tool registry that defers importing fastmcp.
+
+    Tools are recorded at import time; the real FastMCP server is only built,
+    and fastmcp only imported, the first time `.server` is used (e.g. to run
+    the MCP server). The HTTP servers only call the plain functions.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.tools = {}
+        self._server = None
+
+    def tool(self, fn=None, **options):
+        if fn is None:
+            return lambda f: self.tool(f, **options)
+        tool = LazyTool(fn, options)
+        self.tools[tool.name] = tool
+        return tool
+
+    @property
+    def server(self):
+        if self._server is None:
+            from fastmcp import FastMCP
+
+            server = FastMCP(name=self.name)
+            for tool in self.tools.values():
+                server.tool(tool.fn, **tool.options)
+            self._server = server
+        return self._server
+
+    def run(self, *args, **kwargs):
+        return self.server.run(*args, **kwargs)
@@ -1,213 +1,135 @@
-from langchain_openai import ChatOpenAI
-from fastapi import FastAPI,Request
-from fastapi.responses import JSONResponse, PlainTextResponse
-from langchain_core.messages import HumanMessage, BaseMessage, SystemMessage
-from langgraph.graph import StateGraph, END
-from typing import TypedDict, Annotated, Sequence
-from langgraph.graph.message import add_messages
-from github import gt_tools, github_agent,merge_pull_request, close_pull_request, get_pull_request_details
-from slack import slack_tools,slack_agent,send_slack_notification
-import uvicorn
+from github import gt_tools, github_tools, github_agent
+from slack import slack_tools,slack_agent
+from intent_router import route_intent, is_github_question
+from tool_executor import execute_tool_calls
+from metrics import stage
+from conversation_memory import ConversationMemory, fit_prompt, get_tool_result, memory_tools
+# The HTTP endpoints live in notify_server.py; re-exported so `main_agent:app` keeps working.
+from notify_server import app
 from multiprocessing import Process
-from datetime import datetime
-import pytz
-import json
 
 
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 
+# The LLM client and the graph are built on first use (get_llm / get_agent), so
+# importing this module does not pull in langchain_openai or langgraph.
 
-class AgentState(TypedDict):
-    messages:Annotated[Sequence[BaseMessage],add_messages]
+tools=gt_tools + list(slack_tools.values()) + [get_tool_result]
 
-tools=gt_tools + list(slack_tools.values())
+_llm=None
+_agent=None
 
-llm=ChatOpenAI(model="gpt-4.1-nano",temperature=0).bind_tools(tools=tools,tool_choice='auto')
+def get_llm():
+    global _llm
+    if _llm is None:
+        from langchain_openai import ChatOpenAI
+        _llm=ChatOpenAI(model="gpt-4.1-nano",temperature=0).bind_tools(tools=tools,tool_choice='auto')
+    return _llm
 
-def should_continue(state:AgentState):
+def should_continue(state):
     """check if last message contain tool"""
     result=state['messages'][-1]
     return hasattr(result,'tool_call') and len(result.tool_calls)>0
 
 sys_prompt="""You are an assistant that helps with GitHub and slack workflows. Use GitHub tools for repo queries and slack tools for team notifications."""
 
-def call_llm(state:AgentState)->AgentState:
-    result=state['messages'][-1].content.lower()
-    github_keywords=[
-         "pull_request","merge","commit","branch","repository","repo","github","pr","pr_number","events","event","git","checkout","tag","clone"
-    ]
-    if not any(g_key in result for g_key in github_keywords):
-         return {"messages":state['messages']+[HumanMessage(content="Sorry, I don't have information about that.")]}
-    messages=[SystemMessage(content=sys_prompt)]+list(state['messages'])
-    response=llm.invoke(messages)
-    return {"messages":state['messages']+[response]}
-
-def router(state: AgentState):
+# Nodes return only the messages they add; add_messages appends them to the state.
+def call_llm(state):
+    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+
+    last=state['messages'][-1]
+    if isinstance(last,HumanMessage):
+        question=last.content
+        answer=route_intent(question,github_tools)
+        if answer is not None:
+            return {"messages":[AIMessage(content=answer)]}
+        if not is_github_question(question):
+            return {"messages":[HumanMessage(content="Sorry, I don't have information about that.")]}
+    messages=[SystemMessage(content=sys_prompt)]+fit_prompt(list(state['messages']))
+    with stage("llm_invoke"):
+        response=get_llm().invoke(messages)
+    return {"messages":[response]}
+
+def tools_agent(state):
+    """Run a batch that mixes GitHub, Slack and memory tool calls."""
+    tool_calls=state['messages'][-1].tool_calls
+    return {"messages":execute_tool_calls(tool_calls,{**github_tools,**slack_tools,**memory_tools})}
+
+def router(state):
+    from langgraph.graph import END
+
     tool_calls = getattr(state['messages'][-1], 'tool_calls', [])
     tool_names = [t['name'] for t in tool_calls]
 
     gt_tool_names = [fn.__name__ for fn in gt_tools]
     slack_tool_names = list(slack_tools.keys())
 
-    if any(t in gt_tool_names for t in tool_names):
+    if not tool_names:
+        return END
+    if all(t in gt_tool_names for t in tool_names):
         return "GitHub"
-    elif any(t in slack_tool_names for t in tool_names):
+    elif all(t in slack_tool_names for t in tool_names):
         return "Slack"
     else:
-        return END
-
-graph=StateGraph(state_schema=AgentState)
-graph.add_node("MainAgent",call_llm)
-graph.add_node("GitHub", github_agent)
-graph.add_node("Slack", slack_agent)
-graph.set_entry_point("MainAgent")
-graph.add_edge("GitHub","MainAgent")
-graph.add_edge("Slack","MainAgent")
-graph.add_conditional_edges("MainAgent", router, {
-    "GitHub": "GitHub",
-    "Slack": "Slack",
-    END: END
-})
-
-
-agent=graph.compile()
-
-def convert_utc_to_ist(utc_str:str)->str:
-    try:
-        utc_time=datetime.strptime(utc_str,"%Y-%m-%dT%H:%M:%SZ")
-        utc_time=utc_time.replace(tzinfo=pytz.UTC)
-        ist_time=utc_time.astimezone(pytz.timezone('Asia/Kolkata'))
-        return ist_time.strftime("%Y-%m-%d %H:%M:%S IST")
-    except Exception:
-        return utc_str
-
-
-# ----------------------------------------------------------------------------------------------------------------------------------
-app=FastAPI()
-handled_prs=set()
-
-@app.post("/notify")
-async def notify(request: Request):
-    payload = await request.json()
-    event_type = payload.get('event_type', 'unknown')
-    sender = payload.get('sender', 'unknown')
-    title=payload.get("title",'')
-    description=payload.get("description","")
-    timestamp=payload.get("timestamp")
-    compare_branch=payload.get("compare_branch","unknown")
-    base_branch="main"
-    repo_info = payload.get("repository")
-    pr_number = payload.get("pr_number")
-
-
-    if event_type=="pull_request":
-        action=payload.get("action")
-        if action=='synchronize':
-            return {"status":"ignored synchronize event"}
-        if action not in ['opened',"reopened","closed"]:
-             return {"status":f"Ignored PR action {action}"}
-        if action =="closed":
-             return {"status":"ignored closed event to avoid duplicate notification"}
-        
-    if isinstance(repo_info, dict):
-        repo = repo_info.get("full_name", "unknown")
-    else:
-        repo = str(repo_info) if repo_info else "unknown"
-
-
-    if not pr_number:
-        pr = payload.get("pull_request")
-        if isinstance(pr, dict):
-            pr_number = pr.get("number")
-        if not pr_number:
-            pr_number = payload.get("number") 
-    if pr_number is not None:
-         event_key=(pr_number,action)
-         if event_key in handled_prs:
-              return {"status":f"Ignored duplicate event for PR #{pr_number}"}
-         else:
-              handled_prs.add(event_key)
-
-
-    if timestamp:
-        timestamp=convert_utc_to_ist(timestamp)
-        timestamp=timestamp.split("+")[0].replace("T"," ").split(".")[0]
-    else:
-        timestamp=datetime.now(pytz.timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S IST")
-    message = f"🔔 New GitHub event: {event_type} on repository: {repo}"
-    message+=f"\n- Title: {title}\n- Description: {description}\n- Timestamp: {timestamp}\n- User: {sender}\n- Base Branch: {base_branch}\n- Compare Branch: {compare_branch}"
-    print(message)
-    tool_args={
-        "message":message,
-        "event_type":event_type,
-        "repo":repo,
-        "pr_number":pr_number,
-    }
-    slack_response=send_slack_notification.fn(message=message,event_type=event_type,repo=repo,pr_number=pr_number)
-    print("Slack response",slack_response)
-    return {"status": "notified and send to slack"}
-# -------------------------------------------------------------------------------------------------------------------------------
-
-@app.post("/slack/interact")
-async def handler_slack_actions(request: Request):
-    form_data = await request.form()
-    payload = form_data.get("payload")
-    if not payload:
-        return PlainTextResponse("No payload received", status_code=400)
-
-    try:
-        data = json.loads(payload)
-        action_id = data['actions'][0]['action_id']
-        action_value = data['actions'][0]['value']
-        try:
-            metadata=json.loads(action_value)
-        except json.JSONDecodeError:
-            metadata={}
-        repo = metadata.get("repo", "unknown")
-        pr_number = metadata.get("pr_number", "unknown")
-        user = data.get("user", {}).get("username", "unknown")
-        
-        if action_id=="merge_action":
-            try:
-                    pr_number = int(pr_number)
-            except (ValueError, TypeError):
-                    return JSONResponse({"error": "Invalid or missing PR number"}, status_code=400)
-            result_text=merge_pull_request.fn(repo=repo,pr_number=pr_number)
-            send_slack_notification.fn(message=result_text,repo=repo,pr_number=pr_number)
-            # return JSONResponse({"text":f"{result_text}"})
-
-        elif action_id=='cancel_action':
-            try:
-                    pr_number = int(pr_number)
-            except (ValueError, TypeError):
-                    return JSONResponse({"error": "Invalid or missing PR number"}, status_code=400)
-            pr_details=get_pull_request_details.fn(repo=repo,pr_number=pr_number)
-            if isinstance(pr_details,dict) and pr_details.get("merged"):
-                 return JSONResponse({"text":f"PR #{pr_number} in {repo} is already merged. Cancel Skipped."})
-            
-            result_text=close_pull_request.fn(repo=repo,pr_number=pr_number)
-            send_slack_notification.fn(message=result_text,repo=repo,pr_number=pr_number)
-
-            return JSONResponse({"text":f"{result_text}"})
-    except Exception as e:
-        print("❌ Error in /slack/interact:", e)
-        return JSONResponse({"error": str(e)}, status_code=500)
-
+        return "Tools"
+
+def get_agent():
+    """Compile the agent graph on first use."""
+    global _agent
+    if _agent is not None:
+        return _agent
+    from typing import TypedDict, Annotated, Sequence
+    from langchain_core.messages import BaseMessage
+    from langgraph.graph import StateGraph, END
+    from langgraph.graph.message import add_messages
+
+    class AgentState(TypedDict):
+        messages:Annotated[Sequence[BaseMessage],add_messages]
+
+    graph=StateGraph(state_schema=AgentState)
+    graph.add_node("MainAgent",call_llm)
+    graph.add_node("GitHub", github_agent)
+    graph.add_node("Slack", slack_agent)
+    graph.add_node("Tools", tools_agent)
+    graph.set_entry_point("MainAgent")
+    graph.add_edge("GitHub","MainAgent")
+    graph.add_edge("Slack","MainAgent")
+    graph.add_edge("Tools","MainAgent")
+    graph.add_conditional_edges("MainAgent", router, {
+        "GitHub": "GitHub",
+        "Slack": "Slack",
+        "Tools": "Tools",
+        END: END
+    })
+
+    _agent=graph.compile()
+    return _agent
 
 
 # ---------------------------------------------------------------------------------------------------------------------------------
 def run_agent():
+    from langchain_core.messages import HumanMessage
+
+    agent=get_agent()
+    memory=ConversationMemory()
     print("🤖 Assistant ready")
     while True:
         q=input("You: ")
         if q.lower() in {"exit","quit"}:
             break
-        state={"messages":[HumanMessage(content=q)]}
+        if q.lower()=="reset":
+            memory.clear()
+            continue
+        state={"messages":memory.context()+[HumanMessage(content=q)]}
         result=agent.invoke(state)
-        print("Agent: ",result['messages'][-1].content)
+        answer=result['messages'][-1].content
+        memory.add_turn(q,answer)
+        print("Agent: ",answer)
 def run_server():
+        import uvicorn
+
         uvicorn.run(app,host="0.0.0.0",port=8001,log_level='critical')
 
 if __name__=="__main__":
@@ -0,0 +1,147 @@
+"""Serve the github_mcp and slack_mcp tools as one shared MCP server.
+
+    python mcp_server.py                                   # streamable HTTP on :8765/mcp
+    python mcp_server.py --transport stdio                 # for a local MCP client
+    python mcp_server.py --only github --port 8766
+
+Every tool is exposed as an async tool. The PR tools use the async GitHub
+client on the pooled aiohttp session. Cache-backed queries and the Slack
+tool run in the blocking-I/O thread pool, so a slow call never stalls the
+event loop and one warm process (event cache, rollups, GitHub ETag cache)
+can serve many clients. Each client session may run at most
+MCP_CLIENT_CONCURRENCY tool calls at once. Further calls wait up to
+MCP_QUEUE_TIMEOUT seconds and are then rejected.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware
+
+import github
+import slack
+from http_pool import close_session, run_blocking
+from metrics import observe_tool, registry
+
+MCP_CLIENT_CONCURRENCY = int(os.environ.get("MCP_CLIENT_CONCURRENCY", 8))
+MCP_QUEUE_TIMEOUT = float(os.environ.get("MCP_QUEUE_TIMEOUT", 10))
+
+# tools with a native async implementation; everything else is offloaded to threads
+ASYNC_IMPLEMENTATIONS = {
+    "merge_pull_request": github.merge_pull_request_async,
+    "close_pull_request": github.close_pull_request_async,
+    "get_pull_request_details": github.get_pull_request_details_async,
+}
+
+
+def as_async_tool(name: str, fn):
+    """Async tool with `fn`'s name, signature and docstring (which MCP clients see)."""
+    native = ASYNC_IMPLEMENTATIONS.get(name)
+
+    @functools.wraps(fn)
+    async def tool(*args, **kwargs):
+        started = time.perf_counter()
+        ok = True
+        try:
+            if native is not None:
+                return await native(*args, **kwargs)
+            return await run_blocking(fn, *args, **kwargs)
+        except Exception:
+            ok = False
+            raise
+        finally:
+            observe_tool(name, time.perf_counter() - started, ok)
+
+    return tool
+
+
+class ClientConcurrencyLimit(Middleware):
+    """Per-session cap on concurrent tool calls.
+
+    Semaphores are kept for the `max_clients` most recently seen sessions.
+    """
+
+    def __init__(self, per_client: int = MCP_CLIENT_CONCURRENCY, queue_timeout: float = MCP_QUEUE_TIMEOUT,
+                 max_clients: int = 4096):
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self._semaphores = OrderedDict()
+        self.rejected = 0
+
+    def _semaphore(self, client: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(client)
+        if semaphore is None:
+            semaphore = self._semaphores[client] = asyncio.Semaphore(self.per_client)
+            while len(self._semaphores) > self.max_clients:
+                self._semaphores.popitem(last=False)
+        self._semaphores.move_to_end(client)
+        return semaphore
+
+    async def on_call_tool(self, context, call_next):
+        client = _client_key(context)
+        semaphore = self._semaphore(client)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            registry.inc("mcp_rejected_total")
+            raise ToolError(f"Too many concurrent tool calls for this client (limit {self.per_client})")
+        registry.gauge_add("mcp_tool_calls_in_flight", 1)
+        try:
+            return await call_next(context)
+        finally:
+            registry.gauge_add("mcp_tool_calls_in_flight", -1)
+            semaphore.release()
+
+
+def _client_key(context) -> str:
+    ctx = context.fastmcp_context
+    if ctx is None:
+        return "default"
+    try:
+        return ctx.client_id or ctx.session_id
+    except RuntimeError:
+        return "default"
+
+
+def build_server(only: str = None) -> FastMCP:
+    @asynccontextmanager
+    async def lifespan(server):
+        yield {}
+        await close_session()
+
+    server = FastMCP(name="github_slack_mcp", lifespan=lifespan)
+    registries = {"github": github.mcp, "slack": slack.mcp}
+    for name, registry_ in registries.items():
+        if only and name != only:
+            continue
+        for tool in registry_.tools.values():
+            server.tool(as_async_tool(tool.name, tool.fn), name=tool.name)
+    server.add_middleware(ClientConcurrencyLimit())
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["streamable-http", "stdio"], default="streamable-http")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MCP_PORT", 8765)))
+    parser.add_argument("--only", choices=["github", "slack"], help="serve just one of the two tool sets")
+    args = parser.parse_args()
+
+    server = build_server(args.only)
+    if args.transport == "stdio":
+        server.run(transport="stdio")
+    else:
+        server.run(transport="streamable-http", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
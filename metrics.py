@@ -0,0 +1,211 @@
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+
+# seconds; roughly x2.5 steps from 0.5ms to 30s
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.01))
+
+log = logging.getLogger("metrics")
+
+
+def _label_str(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Process-local counters, gauges and histograms rendered in Prometheus text format.
+
+    Updates are a dict lookup and an int add under one lock, cheap enough for
+    every request; callback gauges (queue depths) are only evaluated on scrape.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.callbacks = {}
+        self.help = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge_add(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def gauge_callback(self, name: str, fn, help_text: str = ""):
+        """Register `fn() -> number | {label_value_tuple_dict: number}` evaluated at scrape time."""
+        self.callbacks[name] = fn
+        if help_text:
+            self.help[name] = help_text
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {k: (list(h.counts), h.total, h.count) for k, h in self.histograms.items()}
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_label_str(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_label_str(labels)} {value}")
+        for name, fn in sorted(self.callbacks.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                log.debug("gauge %s failed: %s", name, e)
+                continue
+            header(name, "gauge")
+            if isinstance(value, dict):
+                for labels, v in sorted(value.items()):
+                    lines.append(f"{name}{_label_str(tuple(sorted(labels)))} {v}")
+            else:
+                lines.append(f"{name} {value}")
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, c in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += c
+                le = labels + (("le", bound),)
+                lines.append(f"{name}_bucket{_label_str(le)} {cumulative}")
+            lines.append(f"{name}_sum{_label_str(labels)} {total}")
+            lines.append(f"{name}_count{_label_str(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.help.update({
+    "stage_seconds": "Latency of each pipeline stage",
+    "stage_in_flight": "Pipeline stage executions currently running",
+    "stage_errors_total": "Pipeline stage executions that raised",
+    "tool_seconds": "Latency of each agent tool call",
+})
+
+
+# -- traces --------------------------------------------------------------------------
+
+def sampled(trace_id) -> bool:
+    """Deterministic per-trace sampling, so every process keeps the same deliveries."""
+    if not trace_id or TRACE_SAMPLE_RATE <= 0:
+        return False
+    return zlib.crc32(str(trace_id).encode()) % 10000 < TRACE_SAMPLE_RATE * 10000
+
+
+class SpanLog:
+    """Recent sampled spans; also logged as JSON on the `metrics` logger."""
+
+    def __init__(self, keep: int = 1000):
+        self.spans = deque(maxlen=keep)
+
+    def record(self, trace_id, stage: str, started: float, duration: float, **attrs):
+        span = {"trace_id": trace_id, "stage": stage, "start": round(started, 6),
+                "duration_ms": round(duration * 1000, 3), "pid": os.getpid(), **attrs}
+        self.spans.append(span)
+        log.info("span %s", json.dumps(span, default=str))
+
+    def trace(self, trace_id) -> list:
+        return [s for s in self.spans if s["trace_id"] == trace_id]
+
+
+spans = SpanLog()
+
+
+# -- instrumentation helpers -----------------------------------------------------------
+
+@contextmanager
+def stage(name: str, trace_id=None, **attrs):
+    """Time a pipeline stage: histogram, in-flight gauge, error counter and optional span.
+
+    Yields the span attribute dict, so results known only at the end (e.g. the
+    Slack response) can still be attached to a sampled trace.
+    """
+    registry.gauge_add("stage_in_flight", 1, stage=name)
+    wall = time.time()
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        registry.inc("stage_errors_total", stage=name)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        registry.gauge_add("stage_in_flight", -1, stage=name)
+        registry.observe("stage_seconds", duration, stage=name)
+        if sampled(trace_id):
+            spans.record(trace_id, name, wall, duration, **attrs)
+
+
+def timed(name: str):
+    """Decorator form of `stage()` for sync and async functions."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def observe_tool(tool: str, duration: float, ok: bool = True):
+    registry.observe("tool_seconds", duration, tool=tool)
+    if not ok:
+        registry.inc("tool_errors_total", tool=tool)
+
+
+def render_metrics() -> str:
+    return registry.render()
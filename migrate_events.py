@@ -0,0 +1,59 @@
+"""Rewrite stored events into the compact schema (see event_schema.py).
+
+Converts either the old github_events.json array or an existing event log whose
+records still embed full GitHub repository objects:
+
+    python migrate_events.py                      # event_log/ in place
+    python migrate_events.py --from-json github_events.json
+"""
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+from event_store import STORE_DIR, EventStore
+
+
+def _size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.glob("*") if p.is_file())
+
+
+def migrate(source: Path, target: Path = STORE_DIR) -> int:
+    source = Path(source)
+    target = Path(target)
+    staging = target.with_name(target.name + ".migrating")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    if source.is_file():
+        events = json.loads(source.read_text())
+    else:
+        events = (e for _, e in EventStore(source, readonly=True, import_legacy=False).iter_from(0))
+
+    store = EventStore(staging, segment_max_bytes=1 << 62, import_legacy=False)
+    count = 0
+    for event in events:
+        store.append(event, sync=False)
+        count += 1
+    store.close()
+
+    before = _size(source)
+    if target.exists():
+        backup = target.with_name(target.name + ".bak")
+        shutil.rmtree(backup, ignore_errors=True)
+        os.replace(target, backup)
+        print(f"Previous log kept at {backup}")
+    os.replace(staging, target)
+    after = _size(target)
+    print(f"Migrated {count} events: {before} -> {after} bytes ({before / max(after, 1):.1f}x smaller)")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-json", type=Path, help="legacy github_events.json to import")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="event log directory")
+    args = parser.parse_args()
+    migrate(args.from_json or args.store, args.store)
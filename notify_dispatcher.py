@@ -0,0 +1,107 @@
+import asyncio
+import os
+import random
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from metrics import stage
+
+NOTIFY_URL = os.environ.get("NOTIFY_URL", "http://localhost:8001/notify")
+
+
+class NotifyDispatcher:
+    """Deliver events to the manager's /notify endpoint from a bounded queue.
+
+    One pooled ClientSession is shared by `workers` tasks. `submit()` never waits:
+    when the queue is full the event is dropped and counted, so webhook
+    acknowledgements stay fast even if the manager is slow or down. Failed
+    deliveries (connection errors, timeouts, 429/5xx) are retried with
+    exponential backoff and jitter.
+    """
+
+    def __init__(self, url: str = NOTIFY_URL, workers: int = None, queue_size: int = None,
+                 max_retries: int = None, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 timeout: float = 5.0):
+        self.url = url
+        self.workers = workers or int(os.environ.get("NOTIFY_WORKERS", 4))
+        self.queue_size = queue_size or int(os.environ.get("NOTIFY_QUEUE_SIZE", 1000))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("NOTIFY_MAX_RETRIES", 3))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.queue = None
+        self.session = None
+        self._tasks = []
+        self.counters = {"submitted": 0, "delivered": 0, "retries": 0, "failed": 0, "dropped": 0}
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.session = ClientSession(
+            connector=TCPConnector(limit=self.workers, keepalive_timeout=60),
+            timeout=ClientTimeout(total=self.timeout),
+        )
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 5.0):
+        if self.queue is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"Notify queue not drained on shutdown, {self.queue.qsize()} events left")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def submit(self, event: dict) -> bool:
+        if self.queue is None:
+            raise RuntimeError("NotifyDispatcher.start() was not awaited")
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            print(f"Notify queue full ({self.queue_size}), dropping {event.get('event_type')} event")
+            return False
+        self.counters["submitted"] += 1
+        return True
+
+    async def _worker(self, n: int):
+        while True:
+            event = await self.queue.get()
+            try:
+                with stage("notify_deliver", event.get("delivery_id")):
+                    await self._deliver(event)
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, event: dict):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.counters["retries"] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            try:
+                async with self.session.post(self.url, json=event) as rep:
+                    if rep.status == 200:
+                        self.counters["delivered"] += 1
+                        return
+                    if rep.status != 429 and rep.status < 500:
+                        print(f"Notify failed with status {rep.status}")
+                        break
+                    print(f"Notify got status {rep.status}, attempt {attempt + 1}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as notify_error:
+                print(f"Failed to notify manager agent:{notify_error!r}")
+        self.counters["failed"] += 1
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+        }
@@ -0,0 +1,262 @@
+"""Notify server: /notify (webhook events -> Slack) and /slack/interact (Merge/Cancel buttons).
+
+Kept free of the agent stack (langchain, langgraph, the OpenAI client) so it
+starts fast and stays small per worker; main_agent.py loads that lazily.
+
+    uvicorn notify_server:app --host 0.0.0.0 --port 8001
+    python serve.py --workers 4          # production, one process per core
+"""
+from fastapi import FastAPI,Request,BackgroundTasks
+from fastapi.responses import JSONResponse, PlainTextResponse
+from github import merge_pull_request_async, close_pull_request_async, get_pull_request_details_async
+from slack import send_slack_notification_async,post_slack_message
+from http_pool import close_session, get_session, shutdown_executor, run_blocking
+from dedupe import get_dedupe, delivery_keys
+from singleflight import SingleFlight, KeyedLocks, InFlight
+from shared_flight import get_shared_flight
+from slack_outbox import get_outbox
+from digest import get_digest
+from routing import get_rules
+from metrics import registry, render_metrics, spans, stage
+from contextlib import asynccontextmanager
+from datetime import datetime
+import pytz
+import asyncio
+import json
+import os
+
+
+def convert_utc_to_ist(utc_str:str)->str:
+    try:
+        utc_time=datetime.strptime(utc_str,"%Y-%m-%dT%H:%M:%SZ")
+        utc_time=utc_time.replace(tzinfo=pytz.UTC)
+        ist_time=utc_time.astimezone(pytz.timezone('Asia/Kolkata'))
+        return ist_time.strftime("%Y-%m-%d %H:%M:%S IST")
+    except Exception:
+        return utc_str
+
+
+# ----------------------------------------------------------------------------------------------------------------------------------
+PR_ACTION_CACHE_TTL=float(os.environ.get("PR_ACTION_CACHE_TTL",30))
+SHUTDOWN_DRAIN_TIMEOUT=float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT",20))
+# notifications and PR actions still running; shutdown waits for them
+inflight=InFlight()
+registry.gauge_callback("notify_in_flight",lambda: inflight.count,"Notifications and PR actions being processed")
+
+async def open_worker_state():
+    """Runs in each worker after it is forked: open this process's SQLite handles and HTTP pool."""
+    get_rules()
+    await run_blocking(get_dedupe)
+    await run_blocking(get_shared_flight,PR_ACTION_CACHE_TTL)
+    await get_session()
+    outbox=await run_blocking(get_outbox)
+    await outbox.start()
+    await (await run_blocking(get_digest,outbox)).start()
+
+async def shutdown_http_pool():
+    if not await inflight.wait(SHUTDOWN_DRAIN_TIMEOUT):
+        print(f"Shutting down with {inflight.count} notifications/PR actions still running")
+    # buffered digest events stay in the outbox database and are flushed after restart
+    await get_digest(get_outbox()).stop()
+    await get_outbox().stop()
+    await close_session()
+    shutdown_executor(wait=False)
+
+@asynccontextmanager
+async def lifespan(app):
+    await open_worker_state()
+    try:
+        yield
+    finally:
+        await shutdown_http_pool()
+
+app=FastAPI(lifespan=lifespan)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics())
+
+@app.get("/metrics/traces/{delivery_id}")
+async def trace(delivery_id: str):
+    """Sampled spans this process recorded for one GitHub delivery."""
+    return spans.trace(delivery_id)
+
+@app.post("/notify")
+async def notify(request: Request):
+    with stage("notify_parse"):
+        payload=await request.json()
+    return await process_notification(payload)
+
+async def process_notification(payload: dict) -> dict:
+    """Turn a stored webhook event into a Slack notification (shared by /notify and the in-process bus)."""
+    async with inflight.track():
+        with stage("notify",payload.get("delivery_id"),event_type=payload.get("event_type")):
+            return await _process_notification(payload)
+
+async def _process_notification(payload: dict) -> dict:
+    event_type = payload.get('event_type', 'unknown')
+    sender = payload.get('sender', 'unknown')
+    title=payload.get("title",'')
+    description=payload.get("description","")
+    timestamp=payload.get("timestamp")
+    compare_branch=payload.get("compare_branch","unknown")
+    base_branch="main"
+    repo_info = payload.get("repository")
+    pr_number = payload.get("pr_number")
+
+
+    if isinstance(repo_info, dict):
+        repo = repo_info.get("full_name", "unknown")
+    else:
+        repo = str(repo_info) if repo_info else "unknown"
+
+    # same rules the webhook server applied; also covers events POSTed to /notify directly
+    decision=get_rules().route(event_type,repo,payload.get("branch"),payload.get("action"))
+    if decision.route!="notify":
+        return {"status":f"Ignored {event_type} event ({decision.rule})"}
+    webhook_url=get_rules().channel_url(decision.channel)
+
+
+    if not pr_number:
+        pr = payload.get("pull_request")
+        if isinstance(pr, dict):
+            pr_number = pr.get("number")
+        if not pr_number:
+            pr_number = payload.get("number") 
+    keys=delivery_keys(payload.get("delivery_id"),repo,pr_number,payload.get("action"))
+    with stage("dedupe",payload.get("delivery_id")):
+        claimed=await run_blocking(get_dedupe().claim,*keys)
+    if not claimed:
+         return {"status":f"Ignored duplicate event for PR #{pr_number}" if pr_number is not None else "Ignored duplicate delivery"}
+
+
+    if timestamp:
+        timestamp=convert_utc_to_ist(timestamp)
+        timestamp=timestamp.split("+")[0].replace("T"," ").split(".")[0]
+    else:
+        timestamp=datetime.now(pytz.timezone("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S IST")
+    message = f"🔔 New GitHub event: {event_type} on repository: {repo}"
+    message+=f"\n- Title: {title}\n- Description: {description}\n- Timestamp: {timestamp}\n- User: {sender}\n- Base Branch: {base_branch}\n- Compare Branch: {compare_branch}"
+    print(message)
+    tool_args={
+        "message":message,
+        "event_type":event_type,
+        "repo":repo,
+        "pr_number":pr_number,
+    }
+    delivery_id=payload.get("delivery_id")
+    try:
+        with stage("slack_enqueue",delivery_id,repo=repo,pr_number=pr_number) as span:
+            slack_response=await send_slack_notification_async(message=message,event_type=event_type,repo=repo,pr_number=pr_number,
+                                                               key=f"notify:{delivery_id}" if delivery_id else None,trace_id=delivery_id,
+                                                               branch=payload.get("branch"),webhook_url=webhook_url,
+                                                               summary={"event_type":event_type,"title":title,"description":description,
+                                                                        "sender":sender,"time":timestamp})
+            span["slack_response"]=slack_response
+    except BaseException:
+        # nothing was queued: give the claim back so the dispatcher's retry is not dropped as a duplicate
+        await asyncio.shield(run_blocking(get_dedupe().release,*keys))
+        raise
+    print("Slack response",slack_response)
+    return {"status": "queued for slack"}
+# -------------------------------------------------------------------------------------------------------------------------------
+
+async def reply_to_interaction(response_url,text,repo,pr_number):
+    """Send an interaction result to Slack's response_url, or the channel webhook without one."""
+    if response_url:
+        result=await post_slack_message(response_url,{"text":text,"response_type":"in_channel","replace_original":False})
+    else:
+        result=await send_slack_notification_async(message=text,repo=repo,pr_number=pr_number)
+    print("Slack response",result)
+
+# Several people clicking the same button share one GitHub call and one channel post;
+# merge and cancel on the same PR never run at the same time. SingleFlight/KeyedLocks
+# collapse clicks within this worker, SharedSingleFlight across workers.
+pr_actions=SingleFlight(ttl=PR_ACTION_CACHE_TTL)
+pr_locks=KeyedLocks()
+
+class PRActionFailed(Exception):
+    """GitHub refused the merge/close; raised so the failure is never cached and the next click retries."""
+
+async def _pr_action(action_id,repo,pr_number):
+    if action_id=="merge_action":
+        result=await merge_pull_request_async(repo=repo,pr_number=pr_number)
+    else:
+        pr_details=await get_pull_request_details_async(repo=repo,pr_number=pr_number)
+        if isinstance(pr_details,dict) and pr_details.get("merged"):
+            return f"PR #{pr_number} in {repo} is already merged. Cancel Skipped."
+        result=await close_pull_request_async(repo=repo,pr_number=pr_number)
+    if result.startswith("❌"):
+        raise PRActionFailed(result)
+    return result
+
+async def perform_pr_action(action_id,repo,pr_number):
+    """Returns (result text, whether this worker ran it). A failure raises PRActionFailed, so the
+    lease is released without recording it and other workers retry instead of replaying it."""
+    async with pr_locks.lock((repo,pr_number)):
+        return await get_shared_flight(PR_ACTION_CACHE_TTL).do((repo,pr_number,action_id),(repo,pr_number),_pr_action,action_id,repo,pr_number)
+
+async def run_pr_action(action_id,repo,pr_number,response_url):
+    async with inflight.track():
+        ran=[]
+
+        async def attempt():
+            # only the caller whose attempt runs is the leader; collapsed clicks share its result or error
+            ran.append(True)
+            return await perform_pr_action(action_id,repo,pr_number)
+
+        failed=False
+        try:
+            (result_text,ran_here),_=await pr_actions.do((repo,pr_number,action_id),attempt)
+            leader=bool(ran) and ran_here
+        except PRActionFailed as e:
+            result_text,leader,failed=str(e),bool(ran),True
+        except Exception as e:
+            print("❌ Error handling Slack action:", e)
+            result_text,leader,failed=f"❌ Error handling {action_id} for PR #{pr_number} in {repo}: {e}",bool(ran),True
+        if leader:
+            await reply_to_interaction(response_url,result_text,repo,pr_number)
+        elif response_url:
+            text=result_text if failed else f"Already handled: {result_text}"
+            await post_slack_message(response_url,{"text":text,"response_type":"ephemeral","replace_original":False})
+
+@app.post("/slack/interact")
+async def handler_slack_actions(request: Request, background_tasks: BackgroundTasks):
+    form_data = await request.form()
+    payload = form_data.get("payload")
+    if not payload:
+        return PlainTextResponse("No payload received", status_code=400)
+
+    try:
+        data = json.loads(payload)
+        action_id = data['actions'][0]['action_id']
+        action_value = data['actions'][0]['value']
+        try:
+            metadata=json.loads(action_value)
+        except json.JSONDecodeError:
+            metadata={}
+        repo = metadata.get("repo", "unknown")
+        pr_number = metadata.get("pr_number", "unknown")
+        user = data.get("user", {}).get("username", "unknown")
+        response_url = data.get("response_url")
+
+        if action_id not in ("merge_action","cancel_action"):
+            return JSONResponse({"text":f"Unknown action {action_id}"})
+        try:
+                pr_number = int(pr_number)
+        except (ValueError, TypeError):
+                return JSONResponse({"error": "Invalid or missing PR number"}, status_code=400)
+
+        # Ack inside Slack's 3s window; the GitHub call and the result post run after the response.
+        background_tasks.add_task(run_pr_action,action_id,repo,pr_number,response_url)
+        verb="Merging" if action_id=="merge_action" else "Closing"
+        return JSONResponse({"text":f"⏳ {verb} PR #{pr_number} in {repo} (requested by {user})..."})
+    except Exception as e:
+        print("❌ Error in /slack/interact:", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+if __name__=="__main__":
+    import uvicorn
+
+    uvicorn.run(app,host="0.0.0.0",port=8001,log_level='critical')
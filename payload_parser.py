@@ -0,0 +1,155 @@
+"""Parse GitHub webhook bodies into just the fields ingest reads.
+
+A push with hundreds of commits or a PR with a long body can be megabytes, but
+build_event, routing and the workflow index only use a few dozen fields.
+`parse_webhook` works on the raw bytes and keeps only the paths in FIELDS:
+
+* bodies of at least STREAM_THRESHOLD bytes are parsed incrementally with
+  ijson (when installed), so the full object graph is never built;
+* smaller bodies, or any body without ijson, are decoded with orjson (or the
+  stdlib json module) and projected right away.
+
+Bodies over MAX_WEBHOOK_BYTES (GitHub's own 25 MB cap) are refused, and only
+the first MAX_WEBHOOK_COMMITS commit messages of a push are kept;
+`commits_total` holds the real count.
+
+    PAYLOAD_PARSER=auto|stream|orjson|json    # force one parser (default auto)
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+MAX_WEBHOOK_BYTES = int(os.environ.get("MAX_WEBHOOK_BYTES", 25 * 1024 * 1024))
+MAX_WEBHOOK_COMMITS = int(os.environ.get("MAX_WEBHOOK_COMMITS", 50))
+STREAM_THRESHOLD = int(os.environ.get("PAYLOAD_STREAM_THRESHOLD", 1024 * 1024))
+PAYLOAD_PARSER = os.environ.get("PAYLOAD_PARSER", "auto")
+
+# True keeps a scalar; a dict selects inside an object; a one-item list selects inside each array element
+FIELDS = {
+    "action": True, "ref": True, "ref_type": True, "title": True, "body": True,
+    "repository": {"full_name": True, "owner": {"login": True}},
+    "sender": {"login": True},
+    "pull_request": {"number": True, "title": True, "body": True, "base": {"ref": True}, "head": {"ref": True}},
+    "issue": {"title": True, "body": True},
+    "release": {"name": True, "tag_name": True, "body": True},
+    "commits": [{"message": True}],
+    "workflow": {"name": True},
+    "workflow_run": {key: True for key in ("id", "name", "run_number", "event", "status", "conclusion", "head_branch",
+                                           "run_started_at", "created_at", "updated_at", "html_url")},
+    "workflow_job": {key: True for key in ("id", "name", "workflow_name", "run_id", "status", "conclusion",
+                                           "head_branch", "started_at", "completed_at", "html_url")},
+}
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+def _flatten(spec: dict, prefix: str = "") -> tuple:
+    """ijson prefixes of the kept scalars, and of the objects/arrays on the way to them."""
+    leaves, containers = {}, {}
+    for key, sub in spec.items():
+        path = f"{prefix}{key}"
+        if sub is True:
+            leaves[path] = key
+            continue
+        if isinstance(sub, list):
+            containers[path] = (key, list)
+            containers[f"{path}.item"] = (None, dict)
+            inner, inner_containers = _flatten(sub[0], f"{path}.item.")
+        else:
+            containers[path] = (key, dict)
+            inner, inner_containers = _flatten(sub, f"{path}.")
+        leaves.update(inner)
+        containers.update(inner_containers)
+    return leaves, containers
+
+
+LEAVES, CONTAINERS = _flatten(FIELDS)
+_SCALARS = {"string", "number", "boolean", "null"}
+
+
+def project(value, spec: dict = FIELDS, max_items: int = None):
+    """Copy of the decoded `value` with only the paths in `spec`."""
+    out = {}
+    for key, sub in spec.items():
+        if key not in value:
+            continue
+        item = value[key]
+        if sub is True:
+            if not isinstance(item, (dict, list)):
+                out[key] = item
+        elif isinstance(sub, list):
+            if isinstance(item, list):
+                kept = item if max_items is None else item[:max_items]
+                out[key] = [project(element, sub[0]) for element in kept if isinstance(element, dict)]
+                if key == "commits":
+                    out["commits_total"] = len(item)
+        elif isinstance(item, dict):
+            out[key] = project(item, sub)
+    return out
+
+
+def _parse_stream(raw: bytes, max_commits: int) -> dict:
+    """Walk ijson events, building only the kept paths; other values are never materialized."""
+    root = {}
+    stack = []  # containers being filled; None for a skipped object/array
+    commits = 0
+    leaves, containers = LEAVES, CONTAINERS
+    for prefix, event, value in ijson.parse(raw, use_float=True):
+        if prefix in leaves:
+            if event in _SCALARS and stack[-1] is not None:
+                stack[-1][leaves[prefix]] = value
+            elif event in ("start_map", "start_array"):
+                stack.append(None)
+            elif event in ("end_map", "end_array"):
+                stack.pop()
+        elif event == "start_map" or event == "start_array":
+            if not stack:
+                if event != "start_map":
+                    raise ValueError("webhook body is not a JSON object")
+                stack.append(root)
+                continue
+            parent = stack[-1]
+            kind = containers.get(prefix)
+            container = None
+            if parent is not None and kind is not None and (event == "start_map") == (kind[1] is dict):
+                if prefix == "commits.item":
+                    commits += 1
+                if prefix != "commits.item" or commits <= max_commits:
+                    container = kind[1]()
+                    if kind[0] is None:
+                        parent.append(container)
+                    else:
+                        parent[kind[0]] = container
+            stack.append(container)
+        elif event == "end_map" or event == "end_array":
+            stack.pop()
+    if not root and raw.lstrip()[:1] != b"{":
+        raise ValueError("webhook body is not a JSON object")
+    if "commits" in root:
+        root["commits_total"] = commits
+    return root
+
+
+def parse_webhook(raw: bytes, parser: str = PAYLOAD_PARSER, max_commits: int = MAX_WEBHOOK_COMMITS) -> dict:
+    """The FIELDS of a webhook body, from its raw bytes."""
+    if len(raw) > MAX_WEBHOOK_BYTES:
+        raise PayloadTooLarge(f"webhook body is {len(raw)} bytes (limit {MAX_WEBHOOK_BYTES})")
+    if parser == "auto":
+        parser = "stream" if ijson is not None and len(raw) >= STREAM_THRESHOLD else "orjson" if orjson else "json"
+    if parser == "stream":
+        return _parse_stream(raw, max_commits)
+    data = orjson.loads(raw) if parser == "orjson" else json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("webhook body is not a JSON object")
+    return project(data, max_items=max_commits)
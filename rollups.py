@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from event_cache import event_repo, to_epoch
+
+DIMENSIONS = ("event_type", "repository", "sender", "action")
+# name -> (bucket seconds, number of buckets)
+WINDOWS = {
+    "1h": (60, 60),
+    "24h": (3600, 24),
+    "7d": (3 * 3600, 56),
+}
+SNAPSHOT_NAME = "rollups.json"
+
+
+def event_dimensions(event: dict) -> dict:
+    return {
+        "event_type": event.get("event_type") or "unknown",
+        "repository": event_repo(event),
+        "sender": event.get("sender"),
+        "action": event.get("action"),
+    }
+
+
+def _bump(counts: dict, dims: dict, delta: int):
+    for dim, key in dims.items():
+        if key is None:
+            continue
+        per_dim = counts.setdefault(dim, {})
+        value = per_dim.get(key, 0) + delta
+        if value:
+            per_dim[key] = value
+        else:
+            per_dim.pop(key, None)
+
+
+class Window:
+    """Counts over the last `n` fixed-size time buckets, kept as a ring.
+
+    `totals` always holds the sum of the live buckets; a bucket's counts are
+    subtracted when the ring wraps past it, so reads never rescan history.
+    """
+
+    def __init__(self, bucket_seconds: int, n: int):
+        self.bucket_seconds = bucket_seconds
+        self.n = n
+        self.buckets = [None] * n  # each slot: [bucket index, {dim: {key: count}}]
+        self.head = None
+        self.totals = {}
+
+    def _advance(self, idx: int):
+        if self.head is None:
+            self.head = idx
+            return
+        if idx <= self.head:
+            return
+        for i in range(self.head + 1, min(idx, self.head + self.n) + 1):
+            slot = self.buckets[i % self.n]
+            if slot is not None:
+                for dim, per_dim in slot[1].items():
+                    for key, count in per_dim.items():
+                        _bump(self.totals, {dim: key}, -count)
+                self.buckets[i % self.n] = None
+        self.head = idx
+
+    def add(self, dims: dict, t: float):
+        idx = int(t // self.bucket_seconds)
+        self._advance(idx)
+        if idx <= self.head - self.n:
+            return
+        slot = self.buckets[idx % self.n]
+        if slot is None or slot[0] != idx:
+            slot = self.buckets[idx % self.n] = [idx, {}]
+        _bump(slot[1], dims, 1)
+        _bump(self.totals, dims, 1)
+
+    def counts(self, dim: str, now: float = None) -> dict:
+        self._advance(int((now or time.time()) // self.bucket_seconds))
+        return dict(self.totals.get(dim, {}))
+
+    def to_dict(self) -> dict:
+        return {"head": self.head, "buckets": [b for b in self.buckets if b is not None]}
+
+    def load(self, data: dict):
+        self.head = data.get("head")
+        self.buckets = [None] * self.n
+        self.totals = {}
+        for idx, counts in data.get("buckets", []):
+            self.buckets[idx % self.n] = [idx, counts]
+            for dim, per_dim in counts.items():
+                for key, count in per_dim.items():
+                    _bump(self.totals, {dim: key}, count)
+
+
+class Rollups:
+    """All-time and windowed event counts per event_type, repository, sender and action.
+
+    `seq` is a low-water mark: every event up to it has been counted. Appends
+    finish out of order, so events counted past a gap are kept in `ahead`
+    until the gap fills; replaying from `seq + 1` skips them.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.ahead = set()
+        self.total = 0
+        self.all = {}
+        self.windows = {name: Window(*spec) for name, spec in WINDOWS.items()}
+        self.latest = None
+        self._lock = threading.Lock()
+
+    def add(self, event: dict, seq: int = None):
+        dims = event_dimensions(event)
+        try:
+            t = to_epoch(event.get("timestamp")) or time.time()
+        except ValueError:
+            t = time.time()
+        with self._lock:
+            if seq is not None and (seq <= self.seq or seq in self.ahead):
+                return
+            self.total += 1
+            _bump(self.all, dims, 1)
+            for window in self.windows.values():
+                window.add(dims, t)
+            self.latest = {"event_type": dims["event_type"], "repository": dims["repository"], "sender": dims["sender"]}
+            if seq is not None:
+                self.ahead.add(seq)
+                self._advance()
+
+    def _advance(self):
+        while self.seq + 1 in self.ahead:
+            self.seq += 1
+            self.ahead.discard(self.seq)
+
+    def skip_to(self, first_seq: int):
+        """Events before `first_seq` are gone (retention): stop waiting for them."""
+        with self._lock:
+            if first_seq - 1 > self.seq:
+                self.seq = first_seq - 1
+                self.ahead = {s for s in self.ahead if s > self.seq}
+                self._advance()
+
+    def counts(self, dim: str = "event_type", window: str = None) -> dict:
+        with self._lock:
+            if window is None or window == "all":
+                return dict(self.all.get(dim, {}))
+            if window not in self.windows:
+                raise ValueError(f"Unknown window {window!r}, expected one of: all, {', '.join(self.windows)}")
+            return self.windows[window].counts(dim)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "seq": self.seq,
+                "ahead": sorted(self.ahead),
+                "total": self.total,
+                "all": self.all,
+                "latest": self.latest,
+                "windows": {name: w.to_dict() for name, w in self.windows.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rollups":
+        rollups = cls()
+        rollups.seq = data.get("seq", 0)
+        rollups.ahead = set(data.get("ahead", ()))
+        rollups.total = data.get("total", 0)
+        rollups.all = data.get("all", {})
+        rollups.latest = data.get("latest")
+        for name, window in rollups.windows.items():
+            window.load(data.get("windows", {}).get(name, {}))
+        return rollups
+
+    def save(self, path: Path):
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), separators=(",", ":")))
+        os.replace(tmp, path)
+
+
+class RollupWriter:
+    """Ingest-side rollups: updated per event, snapshotted next to the event log.
+
+    Snapshots are written every `every` events or `interval` seconds and carry
+    the sequence number they cover, so readers only replay what came after.
+    Saves are serialized, so overlapping calls never share the temp file and
+    a later snapshot never lands before an earlier one.
+    """
+
+    def __init__(self, store, every: int = 50, interval: float = 2.0):
+        self.path = Path(store.directory) / SNAPSHOT_NAME
+        self.every = every
+        self.interval = interval
+        self._pending = 0
+        self._last_save = time.monotonic()
+        self._save_lock = threading.Lock()
+        self.rollups = self._load(store)
+
+    def _load(self, store) -> Rollups:
+        rollups = Rollups()
+        if self.path.exists():
+            try:
+                rollups = Rollups.from_dict(json.loads(self.path.read_text()))
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable rollup snapshot {self.path}: {e}")
+        rollups.skip_to(store.first_seq())
+        for seq, event in store.iter_from(rollups.seq + 1):
+            rollups.add(event, seq)
+        return rollups
+
+    def add(self, event: dict, seq: int) -> bool:
+        """Count one event; True when a snapshot is due (call `save()`, ideally off the loop)."""
+        self.rollups.add(event, seq)
+        self._pending += 1
+        return self._pending >= self.every or time.monotonic() - self._last_save >= self.interval
+
+    def save(self):
+        self._pending = 0
+        self._last_save = time.monotonic()
+        with self._save_lock:
+            self.rollups.save(self.path)
+
+
+class RollupReader:
+    """Reader-side rollups: the latest snapshot plus events the cache has seen since."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.path = Path(cache.store.directory) / SNAPSHOT_NAME
+        self._stamp = None
+        self._lock = threading.Lock()
+        self.rollups = Rollups()
+
+    def current(self) -> Rollups:
+        with self._lock:
+            try:
+                stamp = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                stamp = None
+            if stamp is not None and stamp != self._stamp:
+                try:
+                    self.rollups = Rollups.from_dict(json.loads(self.path.read_text()))
+                    self._stamp = stamp
+                except (OSError, ValueError):
+                    pass
+            self.rollups.skip_to(self.cache.first_seq())
+            while True:
+                batch = self.cache.query(since=self.rollups.seq, limit=1000)
+                for seq, event in batch:
+                    self.rollups.add(event, seq)
+                if len(batch) < 1000:
+                    break
+            return self.rollups
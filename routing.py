@@ -0,0 +1,211 @@
+"""Declarative routing rules: which webhook events are kept, notified, and to which Slack channel.
+
+The rules file (ROUTING_RULES, default routing_rules.json) is a JSON object:
+
+    {
+      "channels": {"releases": "$SLACK_RELEASES_WEBHOOK_URL"},
+      "default_route": "drop",
+      "rules": [
+        {"events": ["pull_request"], "branches": ["main"], "actions": ["opened", "reopened"]},
+        {"events": ["release"], "repos": ["acme/*"], "channel": "releases"},
+        {"events": ["pull_request"], "branches": ["main"], "route": "store"}
+      ]
+    }
+
+Rules are checked in order and the first match wins. `repos` and `branches`
+are case-insensitive globs; `events` and `actions` are exact names. A missing
+field matches anything, and `branches` only constrains events that carry a
+branch (issues and releases have none). A rule's `route` is one of
+
+* ``notify`` (default): persist the event and post it to `channel`,
+* ``store``: persist it but send nothing,
+* ``drop``: reject it before it is persisted or forwarded.
+
+`channel` names an entry in `channels` (an incoming-webhook URL, or
+``$ENV_VAR`` to read it from the environment); ``default`` is
+SLACK_WEBHOOK_URL. Events no rule matches get `default_route`.
+
+The rules are compiled once into a table keyed by event type, and the rules
+that can apply to an (event type, repo) pair are memoized, so routing an event
+is a dict lookup plus a few precompiled regex matches.
+
+    python routing.py --check                      # validate and list the compiled rules
+    python routing.py pull_request acme/widgets main opened
+"""
+import argparse
+import fnmatch
+import json
+import os
+import re
+from pathlib import Path
+
+ROUTING_RULES = Path(os.environ.get("ROUTING_RULES", Path(__file__).parent / "routing_rules.json"))
+ROUTES = ("notify", "store", "drop")
+RULE_FIELDS = {"name", "events", "repos", "branches", "actions", "route", "channel"}
+
+# used when there is no rules file: the filtering the servers have always done
+DEFAULT_RULES = {
+    "default_route": "drop",
+    "rules": [
+        {"name": "pr-cards", "events": ["pull_request"], "branches": ["main"], "actions": ["opened", "reopened"]},
+        {"name": "pr-history", "events": ["pull_request"], "branches": ["main"], "route": "store"},
+        {"name": "workflows", "events": ["workflow_run", "workflow_job"]},
+        {"name": "main-branch", "branches": ["main"]},
+    ],
+}
+
+
+def _globs(patterns):
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns), re.IGNORECASE)
+
+
+def _resolve_channel(value: str) -> str:
+    if value.startswith("$"):
+        return os.environ.get(value[1:])
+    return value
+
+
+class Route:
+    __slots__ = ("route", "channel", "rule")
+
+    def __init__(self, route: str, channel: str = "default", rule: str = None):
+        self.route = route
+        self.channel = channel
+        self.rule = rule
+
+    def __repr__(self):
+        return f"Route({self.route!r}, channel={self.channel!r}, rule={self.rule!r})"
+
+
+class Rule:
+    __slots__ = ("index", "name", "events", "repos", "repo_re", "branches", "branch_re", "actions", "decision")
+
+    def __init__(self, index: int, spec: dict, channels: dict):
+        unknown = set(spec) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"rule {index}: unknown field(s) {sorted(unknown)}")
+        route = spec.get("route", "notify")
+        if route not in ROUTES:
+            raise ValueError(f"rule {index}: route must be one of {ROUTES}, got {route!r}")
+        channel = spec.get("channel", "default")
+        if channel != "default" and channel not in channels:
+            raise ValueError(f"rule {index}: unknown channel {channel!r}")
+        self.index = index
+        self.name = spec.get("name") or f"rule {index}"
+        self.events = set(spec.get("events") or ()) or None
+        self.repos = list(spec.get("repos") or ()) or None
+        self.repo_re = _globs(self.repos)
+        self.branches = list(spec.get("branches") or ()) or None
+        self.branch_re = _globs(self.branches)
+        self.actions = set(spec.get("actions") or ()) or None
+        self.decision = Route(route, channel, self.name)
+
+    def matches(self, branch, action) -> bool:
+        if branch and self.branch_re is not None and not self.branch_re.fullmatch(branch):
+            return False
+        return self.actions is None or action in self.actions
+
+
+class RoutingRules:
+    def __init__(self, config: dict, source: str = "built-in defaults", memo_size: int = 4096):
+        self.source = source
+        self.memo_size = memo_size
+        self.channels = {name: _resolve_channel(url) for name, url in (config.get("channels") or {}).items()}
+        default_route = config.get("default_route", "drop")
+        if default_route not in ROUTES:
+            raise ValueError(f"default_route must be one of {ROUTES}, got {default_route!r}")
+        self.default = Route(default_route, rule="default_route")
+        self.rules = [Rule(i, spec, self.channels) for i, spec in enumerate(config.get("rules") or ())]
+        # event type -> rules that name it, merged in file order with the rules for any event
+        any_event = [rule for rule in self.rules if rule.events is None]
+        self.by_event = {}
+        for event in {e for rule in self.rules for e in rule.events or ()}:
+            self.by_event[event] = [rule for rule in self.rules if rule.events is None or event in rule.events]
+        self.any_event = any_event
+        self._memo = {}
+
+    @classmethod
+    def load(cls, path: Path = ROUTING_RULES) -> "RoutingRules":
+        path = Path(path)
+        if not path.exists():
+            return cls(DEFAULT_RULES)
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), source=str(path))
+
+    def _candidates(self, event_type: str, repo: str) -> list:
+        key = (event_type, repo)
+        candidates = self._memo.get(key)
+        if candidates is None:
+            rules = self.by_event.get(event_type, self.any_event)
+            candidates = [rule for rule in rules if rule.repo_re is None or (repo and rule.repo_re.fullmatch(repo))]
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[key] = candidates
+        return candidates
+
+    def route(self, event_type: str, repo: str = None, branch: str = None, action: str = None) -> Route:
+        for rule in self._candidates(event_type, repo):
+            if rule.matches(branch, action):
+                return rule.decision
+        return self.default
+
+    def channel_url(self, channel: str = "default") -> str:
+        if channel == "default":
+            return os.environ.get("SLACK_WEBHOOK_URL")
+        return self.channels.get(channel)
+
+    def describe(self) -> list:
+        return [{"name": rule.name, "events": sorted(rule.events) if rule.events else "*", "repos": rule.repos or "*",
+                 "branches": rule.branches or "*",
+                 "actions": sorted(rule.actions) if rule.actions else "*",
+                 "route": rule.decision.route, "channel": rule.decision.channel} for rule in self.rules]
+
+
+def route_fields(event_type: str, data: dict):
+    """(repo, branch, action) of a raw webhook payload: just what routing needs, before build_event."""
+    repo = (data.get("repository") or {}).get("full_name")
+    branch = None
+    if event_type == "pull_request":
+        branch = ((data.get("pull_request") or {}).get("base") or {}).get("ref")
+    elif event_type == "push":
+        ref = data.get("ref") or ""
+        branch = ref.split("/")[-1] if ref else None
+    elif event_type in ("create", "delete"):
+        branch = data.get("ref")
+    elif event_type in ("workflow_run", "workflow_job"):
+        branch = (data.get(event_type) or {}).get("head_branch")
+    return repo, branch, data.get("action")
+
+
+_rules = None
+
+
+def get_rules() -> RoutingRules:
+    global _rules
+    if _rules is None:
+        _rules = RoutingRules.load()
+    return _rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", default=str(ROUTING_RULES))
+    parser.add_argument("--check", action="store_true", help="validate the rules file and print the compiled rules")
+    parser.add_argument("event", nargs="*", help="event_type [repo [branch [action]]] to route")
+    args = parser.parse_args()
+
+    rules = RoutingRules.load(args.rules)
+    if args.check or not args.event:
+        print(f"{len(rules.rules)} rules from {rules.source}; default route: {rules.default.route}")
+        for rule in rules.describe():
+            print(json.dumps(rule))
+    if args.event:
+        event_type, repo, branch, action = (args.event + [None] * 3)[:4]
+        decision = rules.route(event_type, repo, branch, action)
+        print(f"{event_type} {repo} {branch} {action} -> {decision.route} (channel {decision.channel}, {decision.rule})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Production server for the notify/interact app: N worker processes, no REPL.
+
+    python serve.py --workers 4 --port 8001
+    python serve.py --app combined_app:app --port 8080 --workers 1
+
+Uses gunicorn with uvicorn workers when gunicorn is installed (dead workers
+are restarted, workers are recycled after --max-requests), and uvicorn's own
+process manager otherwise. Each worker imports the app after the fork and
+runs its startup hook, so SQLite handles and HTTP pools are per process;
+dedupe and PR-action state live in SQLite under STATE_DIR and are shared by
+all workers. On SIGTERM workers stop accepting requests and get
+--graceful-timeout seconds to drain in-flight notifications and PR actions.
+
+The webhook server (webhook_server.py) owns the event log and stays a
+single process; combined_app also writes the event log, so run it with
+--workers 1.
+"""
+import argparse
+import os
+
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+def serve_gunicorn(args) -> bool:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("graceful_timeout", args.graceful_timeout)
+            self.cfg.set("timeout", args.graceful_timeout + 30)
+            self.cfg.set("keepalive", 75)
+            self.cfg.set("max_requests", args.max_requests)
+            self.cfg.set("max_requests_jitter", args.max_requests // 10)
+            self.cfg.set("loglevel", args.log_level)
+
+        def load(self):
+            from importlib import import_module
+
+            module, attr = args.app.split(":")
+            return getattr(import_module(module), attr)
+
+    Application().run()
+    return True
+
+
+def serve_uvicorn(args):
+    import uvicorn
+
+    uvicorn.run(
+        args.app, host=args.host, port=args.port, workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout, timeout_keep_alive=75,
+        limit_max_requests=args.max_requests or None, log_level=args.log_level,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="notify_server:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8001)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT", 20)))
+    parser.add_argument("--max-requests", type=int, default=0, help="recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--no-gunicorn", action="store_true", help="use uvicorn's process manager even if gunicorn is installed")
+    args = parser.parse_args()
+
+    # the worker drains for SHUTDOWN_DRAIN_TIMEOUT; keep it inside the server's grace period
+    os.environ["SHUTDOWN_DRAIN_TIMEOUT"] = str(max(1, args.graceful_timeout - 2))
+    print(f"✅ Serving {args.app} on http://{args.host}:{args.port} with {args.workers} workers")
+    if args.no_gunicorn or not serve_gunicorn(args):
+        serve_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from dedupe import STATE_DIR
+from http_pool import run_blocking
+
+ACTIONS_DB = Path(os.environ.get("ACTIONS_DB", STATE_DIR / "actions.sqlite3"))
+
+
+class SharedSingleFlight:
+    """SingleFlight across worker processes, backed by a WAL-mode SQLite file.
+
+    `do(key, lock_key, fn)` runs `fn` in exactly one process for `key` and
+    returns `(result, leader)` like SingleFlight.do. Calls sharing `lock_key`
+    never overlap (merge and cancel on one PR): the leader holds a lease on
+    `lock_key` for at most `lease` seconds, so a crashed worker cannot wedge
+    the key. Other workers poll until the result is recorded, then get it with
+    `leader=False` for `ttl` seconds. Results must be JSON-serializable;
+    failures release the lease and are not recorded.
+    """
+
+    def __init__(self, path=ACTIONS_DB, ttl: float = 30.0, lease: float = 60.0, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.pid = os.getpid()
+        self.counters = {"calls": 0, "waited": 0, "cached": 0}
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, expires REAL NOT NULL) WITHOUT ROWID")
+        self._db.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner INTEGER NOT NULL, expires REAL NOT NULL) WITHOUT ROWID")
+
+    def _begin(self, key: str, lock_key: str):
+        """("done", result) | ("leader", None) | ("busy", None), decided in one write transaction."""
+        now = time.time()
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM results WHERE expires <= ?", (now,))
+                db.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+                row = db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    state = ("done", json.loads(row[0]))
+                elif db.execute("SELECT 1 FROM leases WHERE key = ?", (lock_key,)).fetchone():
+                    state = ("busy", None)
+                else:
+                    db.execute("INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                               (lock_key, self.pid, now + self.lease))
+                    state = ("leader", None)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return state
+
+    def _finish(self, key: str, lock_key: str, result=None, record: bool = True):
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if record:
+                    db.execute("INSERT OR REPLACE INTO results (key, result, expires) VALUES (?, ?, ?)",
+                               (key, json.dumps(result, default=str), time.time() + self.ttl))
+                db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (lock_key, self.pid))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    async def do(self, key, lock_key, fn, *args, **kwargs):
+        key, lock_key = json.dumps(key, default=str), json.dumps(lock_key, default=str)
+        waited = False
+        while True:
+            state, result = await run_blocking(self._begin, key, lock_key)
+            if state == "done":
+                self.counters["waited" if waited else "cached"] += 1
+                return result, False
+            if state == "leader":
+                break
+            waited = True
+            await asyncio.sleep(self.poll_interval)
+
+        self.counters["calls"] += 1
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            await asyncio.shield(run_blocking(self._finish, key, lock_key, record=False))
+            raise
+        await asyncio.shield(run_blocking(self._finish, key, lock_key, result))
+        return result, True
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_shared = None
+
+
+def get_shared_flight(ttl: float = 30.0) -> SharedSingleFlight:
+    """Per-process instance; re-created after a fork so workers never share a connection."""
+    global _shared
+    if _shared is None or _shared.pid != os.getpid():
+        _shared = SharedSingleFlight(ttl=ttl)
+    return _shared
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """Collapse concurrent identical async calls into one and briefly cache the result.
+
+    `do(key, fn)` returns `(result, leader)`. The first caller for `key` runs `fn`
+    and gets `leader=True`; callers arriving while it is in flight, or within
+    `ttl` seconds after it finished, get the same result with `leader=False`.
+    Exceptions are shared with waiting callers but never cached.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight = {}
+        self._results = OrderedDict()
+        self.counters = {"calls": 0, "collapsed": 0, "cached": 0}
+
+    def _cached(self, key):
+        hit = self._results.get(key)
+        if hit is None:
+            return None
+        expires, result = hit
+        if expires < time.monotonic():
+            del self._results[key]
+            return None
+        return hit
+
+    async def do(self, key, fn, *args, **kwargs):
+        hit = self._cached(key)
+        if hit is not None:
+            self.counters["cached"] += 1
+            return hit[1], False
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counters["collapsed"] += 1
+            return await asyncio.shield(future), False
+
+        self.counters["calls"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            # mark retrieved so an unawaited shared failure doesn't warn
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._results[key] = (time.monotonic() + self.ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+            return result, True
+        finally:
+            del self._inflight[key]
+
+    def forget(self, key):
+        self._results.pop(key, None)
+
+
+class KeyedLocks:
+    """One asyncio.Lock per key, dropped again once nobody holds or waits on it."""
+
+    def __init__(self):
+        self._locks = {}
+        self._users = {}
+
+    def lock(self, key):
+        return _KeyedLock(self, key)
+
+
+class _KeyedLock:
+    def __init__(self, owner: KeyedLocks, key):
+        self.owner = owner
+        self.key = key
+
+    async def __aenter__(self):
+        owner = self.owner
+        lock = owner._locks.setdefault(self.key, asyncio.Lock())
+        owner._users[self.key] = owner._users.get(self.key, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._release_user()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.owner._locks[self.key].release()
+        self._release_user()
+
+    def _release_user(self):
+        owner = self.owner
+        owner._users[self.key] -= 1
+        if not owner._users[self.key]:
+            del owner._users[self.key]
+            del owner._locks[self.key]
+
+
+class InFlight:
+    """Count running background work so shutdown can wait for it to finish."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = None
+
+    def track(self):
+        return _Tracked(self)
+
+    async def wait(self, timeout: float) -> bool:
+        """True once nothing is in flight, False if `timeout` passed first."""
+        if not self.count:
+            return True
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class _Tracked:
+    def __init__(self, owner: InFlight):
+        self.owner = owner
+
+    async def __aenter__(self):
+        self.owner.count += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        owner = self.owner
+        owner.count -= 1
+        if not owner.count and owner._idle is not None:
+            owner._idle.set()
+            owner._idle = None
@@ -1,25 +1,28 @@
 from dotenv import load_dotenv
 import os
 import requests
-from fastmcp import FastMCP
-from fastapi import FastAPI
-from typing import TypedDict,List, Union
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from typing import TYPE_CHECKING, TypedDict,List, Union
 import json
-from dotenv import load_dotenv
+import asyncio
+import aiohttp
+from http_pool import get_session, run_blocking
+from tool_executor import execute_tool_calls
+from metrics import registry, stage
+from lazy_mcp import LazyMCP
+from slack_outbox import get_outbox
+from digest import get_digest, is_digestible
+
+if TYPE_CHECKING:
+    from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
 load_dotenv()
 
-mcp=FastMCP(name="slack_mcp")
-app=FastAPI()
+mcp=LazyMCP(name="slack_mcp")
 SLACK_BOT_TOKEN=os.environ.get("SLACK_API_KEY")
 
 
-@mcp.tool()
-def send_slack_notification(message:str,repo,pr_number,event_type:str="unknown")->str:
-    """Send a formatted notification to the team slack channel."""
-    webhook_url=os.environ.get("SLACK_WEBHOOK_URL")
-    if not webhook_url:
-        return "Error: SLACK_WEBHOOK_URL environment  variable not set"
+def build_slack_payload(message:str,repo,pr_number,event_type:str="unknown")->dict:
+    """Block Kit payload for a notification, with Merge/Cancel buttons for PR events."""
     blocks=[
         {"type":"section","text":{"type":"mrkdwn","text":message}}]
     if event_type and event_type.lower()=="pull_request" and  pr_number and str(pr_number).isdigit():
@@ -47,20 +50,73 @@ def send_slack_notification(message:str,repo,pr_number,event_type:str="unknown")
         }
         )
 
-    payload={
+    return {
             "blocks":blocks,
             "text":message,
             "mrkdwn":True
         }
+
+
+@mcp.tool()
+def send_slack_notification(message:str,repo,pr_number,event_type:str="unknown")->str:
+    """Send a formatted notification to the team slack channel."""
+    webhook_url=os.environ.get("SLACK_WEBHOOK_URL")
+    if not webhook_url:
+        return "Error: SLACK_WEBHOOK_URL environment  variable not set"
+    payload=build_slack_payload(message,repo,pr_number,event_type)
+    # try once inline; anything retryable goes to the outbox instead of being lost
     try:
         response=requests.post(webhook_url,json=payload,timeout=10)
         if response.status_code==200:
             return "✅ Message sent successfully to slack."
-        else:
+        if response.status_code!=429 and response.status_code<500:
             return f"❌ Failed to send message. Status: {response.status_code}, Response: {response.text}"
+        reason=f"Slack answered {response.status_code}"
     except requests.exceptions.Timeout:
-        return "❌ Request timed out. Check your internet connection and try again."
+        reason="Request timed out"
     except requests.exceptions.ConnectionError:
+        reason="Connection error"
+    except Exception as e:
+        return f"❌ Error sending message: {str(e)}"
+    get_outbox().enqueue(webhook_url,payload)
+    return f"⏳ {reason}; message queued and will be retried."
+
+
+async def send_slack_notification_async(message:str,repo,pr_number,event_type:str="unknown",key:str=None,trace_id:str=None,
+                                        branch:str=None,summary:dict=None,webhook_url:str=None)->str:
+    """Queue a notification in the durable Slack outbox; the outbox workers deliver it with retries.
+
+    `key` (e.g. the GitHub delivery id) makes a repeated call for the same notification a no-op.
+    With `summary` (event_type, title, description, sender, time), non-PR events may be folded
+    into a per-repo/branch digest instead of being sent on their own. `webhook_url` picks the
+    channel (a routing rule's target); it defaults to SLACK_WEBHOOK_URL."""
+    webhook_url=webhook_url or os.environ.get("SLACK_WEBHOOK_URL")
+    if not webhook_url:
+        return "Error: SLACK_WEBHOOK_URL environment  variable not set"
+    outbox=get_outbox()
+    payload=build_slack_payload(message,repo,pr_number,event_type)
+    if summary is not None and is_digestible(event_type,pr_number):
+        item={**summary,"delivery_id":trace_id,"payload":payload}
+        if await run_blocking(get_digest(outbox).add,webhook_url,repo,branch,item):
+            return f"✅ Added to the slack digest for {repo}."
+    added=await outbox.submit(webhook_url,payload,key=key,trace_id=trace_id)
+    return "✅ Message queued for slack." if added else "Already queued for slack."
+
+
+async def post_slack_message(url:str,payload:dict)->str:
+    """POST a message payload to a Slack incoming webhook or interaction response_url."""
+    session=await get_session()
+    try:
+        with stage("slack_post"):
+            async with session.post(url,json=payload) as response:
+                text=await response.text()
+        registry.inc("slack_posts_total",status=response.status)
+        if response.status==200:
+            return "✅ Message sent successfully to slack."
+        return f"❌ Failed to send message. Status: {response.status}, Response: {text}"
+    except asyncio.TimeoutError:
+        return "❌ Request timed out. Check your internet connection and try again."
+    except aiohttp.ClientConnectionError:
         return "❌ Connection error. Check your  internet connection and webhook URL."
     except Exception as e:
         return f"❌ Error sending message: {str(e)}"
@@ -73,18 +129,10 @@ slack_tools= {tool.__name__:tool for tool in slack_tools}
 
 
 class SlackAgentState(TypedDict):
-    messages:List[Union[HumanMessage,AIMessage,ToolMessage]]
+    messages:List[Union["HumanMessage","AIMessage","ToolMessage"]]
 
 def slack_agent(state:SlackAgentState)->SlackAgentState:
     tool_calls=state["messages"][-1].tool_calls
-    results=[]
-    for t in tool_calls:
-        fn=slack_tools.get(t['name'])
-        if fn:
-            try:
-                result= fn(**t["args"])
-            except Exception as e:
-                result=f"Error: {e}"
-            results.append(ToolMessage(tool_call_id=t['id'],name=t['name'],content=str(result)))
-    return {"messages":state['messages']+results}
-
+    results=execute_tool_calls(tool_calls,slack_tools)
+    # a delta: the graph's add_messages reducer appends it
+    return {"messages":results}
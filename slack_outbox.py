@@ -0,0 +1,348 @@
+"""Durable outbox for Slack webhook posts.
+
+Messages are written to a WAL-mode SQLite table (one local insert on the
+request path) and delivered by async workers in every server process:
+
+* claims are atomic across processes, and a claim whose worker died is
+  retried once its lease runs out, so queued messages survive restarts;
+* each channel (webhook URL) is paced to SLACK_CHANNEL_RATE posts/second
+  across all workers, and a 429's Retry-After pauses the whole channel;
+* timeouts, connection errors and 5xx retry with exponential backoff and full
+  jitter; other 4xx answers and items out of attempts go to the dead-letter
+  state, from where they can be listed and requeued;
+* an optional idempotency key (e.g. the GitHub delivery id) makes enqueueing
+  the same notification twice a no-op.
+
+Delivery is at-least-once: only a crash between Slack accepting a post and
+the row being marked sent can repeat it.
+
+    python slack_outbox.py             # counts per state
+    python slack_outbox.py --dead      # dead letters
+    python slack_outbox.py --requeue 12 15   (or --requeue all)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from dedupe import STATE_DIR
+from http_pool import get_session, run_blocking
+from metrics import registry, stage
+
+OUTBOX_DB = Path(os.environ.get("SLACK_OUTBOX_DB", STATE_DIR / "slack_outbox.sqlite3"))
+SLACK_CHANNEL_RATE = float(os.environ.get("SLACK_CHANNEL_RATE", 1.0))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    idem_key TEXT UNIQUE,
+    channel TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    trace_id TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    done_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (state, next_at);
+CREATE TABLE IF NOT EXISTS channels (channel TEXT PRIMARY KEY, next_at REAL NOT NULL) WITHOUT ROWID;
+"""
+
+
+class SlackOutbox:
+    def __init__(self, path=OUTBOX_DB, workers: int = None, channel_rate: float = SLACK_CHANNEL_RATE,
+                 max_attempts: int = 8, backoff_base: float = 1.0, backoff_max: float = 300.0,
+                 lease: float = 60.0, keep_done: float = 24 * 3600, poll_interval: float = 0.5):
+        self.path = Path(path)
+        self.workers = workers or int(os.environ.get("SLACK_OUTBOX_WORKERS", 4))
+        self.channel_interval = 1.0 / channel_rate if channel_rate > 0 else 0.0
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.keep_done = keep_done
+        self.poll_interval = poll_interval
+        self.pid = os.getpid()
+        self.counters = {"enqueued": 0, "duplicates": 0, "sent": 0, "retries": 0, "rate_limited": 0, "dead": 0}
+        self._lock = threading.Lock()
+        self._tasks = []
+        self._wake = None
+        self._loop = None
+        self._stopping = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    # -- enqueue -------------------------------------------------------------------
+
+    def enqueue(self, url: str, payload: dict, key: str = None, trace_id: str = None) -> bool:
+        """Persist one message. False if `key` was already enqueued (nothing is added)."""
+        with self._lock:
+            return self.insert(self._db, url, payload, key, trace_id)
+
+    def insert(self, db, url: str, payload: dict, key: str = None, trace_id: str = None) -> bool:
+        """`enqueue` on a connection the caller holds, e.g. inside `transaction()`."""
+        now = time.time()
+        cursor = db.execute(
+            "INSERT OR IGNORE INTO outbox (idem_key, channel, url, payload, trace_id, next_at, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, url, url, json.dumps(payload, separators=(",", ":")), trace_id, now, now))
+        added = cursor.rowcount == 1
+        self.counters["enqueued" if added else "duplicates"] += 1
+        return added
+
+    async def submit(self, url: str, payload: dict, key: str = None, trace_id: str = None) -> bool:
+        added = await run_blocking(self.enqueue, url, payload, key, trace_id)
+        if added:
+            self.wake()
+        return added
+
+    def wake(self):
+        """Tell idle workers in this process that something was queued (safe from executor threads)."""
+        if self._wake is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._wake.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    # -- claim / settle ----------------------------------------------------------------
+
+    def transaction(self, fn):
+        """Run `fn(db)` in one write transaction on the outbox database."""
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db)
+                db.execute("COMMIT")
+                return result
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _claim(self):
+        """Lease the next due message whose channel is not paused, or None."""
+        now = time.time()
+
+        def claim(db):
+            # leases of workers that died mid-delivery
+            db.execute("UPDATE outbox SET state = 'pending' WHERE state = 'inflight' AND lease_until <= ?", (now,))
+            row = db.execute(
+                "SELECT o.id, o.channel, o.url, o.payload, o.trace_id, o.attempts FROM outbox o "
+                "LEFT JOIN channels c ON c.channel = o.channel "
+                "WHERE o.state = 'pending' AND o.next_at <= ? AND COALESCE(c.next_at, 0) <= ? "
+                "ORDER BY o.next_at, o.id LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE outbox SET state = 'inflight', lease_until = ? WHERE id = ?", (now + self.lease, row[0]))
+            db.execute("INSERT OR REPLACE INTO channels (channel, next_at) VALUES (?, ?)",
+                       (row[1], now + self.channel_interval))
+            return dict(zip(("id", "channel", "url", "payload", "trace_id", "attempts"), row))
+
+        return self.transaction(claim)
+
+    def _backoff(self, attempts: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempts))
+
+    def _settle(self, item: dict, status, retry_after, error: str = None):
+        now = time.time()
+
+        def settle(db):
+            if status is not None and 200 <= status < 300:
+                db.execute("UPDATE outbox SET state = 'sent', done_at = ?, lease_until = NULL WHERE id = ?",
+                           (now, item["id"]))
+                return "sent"
+            if status == 429:
+                pause = _retry_after_seconds(retry_after, default=self._backoff(item["attempts"] + 1))
+                db.execute("INSERT OR REPLACE INTO channels (channel, next_at) VALUES (?, ?)",
+                           (item["channel"], now + pause))
+                db.execute("UPDATE outbox SET state = 'pending', next_at = ?, last_error = ? WHERE id = ?",
+                           (now + pause, "429 rate limited", item["id"]))
+                return "rate_limited"
+            attempts = item["attempts"] + 1
+            retryable = status is None or status >= 500
+            if not retryable or attempts >= self.max_attempts:
+                db.execute("UPDATE outbox SET state = 'dead', attempts = ?, last_error = ?, done_at = ? WHERE id = ?",
+                           (attempts, error, now, item["id"]))
+                return "dead"
+            db.execute("UPDATE outbox SET state = 'pending', attempts = ?, next_at = ?, last_error = ? WHERE id = ?",
+                       (attempts, now + self._backoff(attempts), error, item["id"]))
+            return "retries"
+
+        outcome = self.transaction(settle)
+        self.counters[outcome] += 1
+        registry.inc("slack_outbox_total", outcome=outcome)
+        if outcome == "dead":
+            print(f"Slack message {item['id']} dead-lettered: {error}")
+
+    def _release(self, item: dict):
+        self.transaction(lambda db: db.execute("UPDATE outbox SET state = 'pending', lease_until = NULL WHERE id = ?",
+                                          (item["id"],)))
+
+    def sweep(self):
+        cutoff = time.time() - self.keep_done
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE state = 'sent' AND done_at < ?", (cutoff,))
+
+    # -- workers -------------------------------------------------------------------------
+
+    async def start(self):
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Let posts in progress finish, then stop; queued messages are sent after the next start."""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=drain_timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        delivered = 0
+        while not self._stopping:
+            try:
+                item = await run_blocking(self._claim)
+                if item is None:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    if not self._stopping:
+                        self._wake.clear()
+                    continue
+                await self._deliver(item)
+                delivered += 1
+                if delivered % 1000 == 0:
+                    await run_blocking(self.sweep)
+            except Exception as e:
+                # e.g. "database is locked" under WAL contention; an unsettled claim is retried once its lease expires
+                registry.inc("slack_outbox_errors_total")
+                print(f"❌ Slack outbox worker error, retrying: {e!r}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _deliver(self, item: dict):
+        status, retry_after, error = None, None, None
+        try:
+            session = await get_session()
+            with stage("slack_post", item["trace_id"]) as span:
+                async with session.post(item["url"], data=item["payload"],
+                                        headers={"Content-Type": "application/json"}) as response:
+                    text = await response.text()
+                    status, retry_after = response.status, response.headers.get("Retry-After")
+                span["status"] = status
+            registry.inc("slack_posts_total", status=status)
+            if status >= 300:
+                error = f"{status}: {text[:200]}"
+        except asyncio.CancelledError:
+            self._release(item)
+            raise
+        except Exception as e:
+            error = repr(e)
+        await run_blocking(self._settle, item, status, retry_after, error)
+
+    # -- inspection ------------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            states = dict(self._db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+        return {**self.counters, "states": states}
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE state IN ('pending', 'inflight')").fetchone()[0]
+
+    def dead_letters(self, limit: int = 50) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, channel, attempts, last_error, created, trace_id FROM outbox WHERE state = 'dead' "
+                "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(zip(("id", "channel", "attempts", "last_error", "created", "trace_id"), r)) for r in rows]
+
+    def requeue(self, ids=None) -> int:
+        """Move dead letters (all, or the given ids) back to pending with a fresh attempt budget."""
+        now = time.time()
+        with self._lock:
+            if ids is None:
+                cursor = self._db.execute("UPDATE outbox SET state = 'pending', attempts = 0, next_at = ? "
+                                          "WHERE state = 'dead'", (now,))
+            else:
+                cursor = self._db.executemany("UPDATE outbox SET state = 'pending', attempts = 0, next_at = ? "
+                                              "WHERE state = 'dead' AND id = ?", [(now, i) for i in ids])
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _retry_after_seconds(value, default: float) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+_outbox = None
+
+
+def get_outbox() -> SlackOutbox:
+    """Per-process instance; re-created after a fork so workers never share a connection."""
+    global _outbox
+    if _outbox is None or _outbox.pid != os.getpid():
+        _outbox = SlackOutbox()
+    return _outbox
+
+
+def _depth():
+    if _outbox is None:
+        raise LookupError("outbox not opened in this process")
+    return _outbox.depth()
+
+
+registry.gauge_callback("slack_outbox_depth", _depth, "Slack messages waiting to be delivered")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dead", action="store_true", help="list dead letters")
+    parser.add_argument("--requeue", nargs="+", metavar="ID", help="requeue dead letters by id, or 'all'")
+    args = parser.parse_args()
+    outbox = get_outbox()
+    if args.requeue:
+        ids = None if args.requeue == ["all"] else [int(i) for i in args.requeue]
+        print(f"Requeued {outbox.requeue(ids)} messages")
+    elif args.dead:
+        for row in outbox.dead_letters():
+            print(json.dumps(row))
+    else:
+        print(json.dumps(outbox.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
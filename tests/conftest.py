@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# keep dedupe/action/outbox state of the tests out of the repo's state/ directory
+os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="notify_tests_"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
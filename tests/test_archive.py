@@ -0,0 +1,31 @@
+from archive import Archive
+
+
+def _events(prefix, start_hour):
+    return [{"timestamp": f"2024-05-01T{start_hour + i:02d}:00:00+05:30", "event_type": "push",
+             "repository": {"full_name": "acme/widgets"}, "title": f"{prefix} {i}"} for i in range(3)]
+
+
+def _titles(archive):
+    return sorted(event["title"] for _, event in archive.query(limit=100))
+
+
+def test_retire_keeps_segments_when_seqs_restart(tmp_path):
+    archive = Archive(tmp_path)
+    archive.retire(1, _events("old", 1))
+    # a fresh event log numbers its events from 1 again
+    archive.retire(1, _events("new", 10))
+
+    reopened = Archive(tmp_path)
+    assert [s.name for s in reopened.segments] == [f"log-{1:020d}", f"log-{1:020d}-1"]
+    assert _titles(reopened) == ["new 0", "new 1", "new 2", "old 0", "old 1", "old 2"]
+
+
+def test_retire_of_the_same_segment_is_not_archived_twice(tmp_path):
+    archive = Archive(tmp_path)
+    archive.retire(1, _events("old", 1))
+    archive.retire(1, _events("old", 1))
+
+    reopened = Archive(tmp_path)
+    assert len(reopened.segments) == 1
+    assert _titles(reopened) == ["old 0", "old 1", "old 2"]
@@ -0,0 +1,31 @@
+import asyncio
+
+import combined_app
+import notify_server
+import webhook_server
+from metrics import registry
+
+
+def test_bus_stops_before_the_notify_pipeline_shuts_down(monkeypatch):
+    calls = []
+
+    async def record(name):
+        calls.append(name)
+
+    monkeypatch.setattr(notify_server, "open_worker_state", lambda: record("open_worker_state"))
+    monkeypatch.setattr(notify_server, "shutdown_http_pool", lambda: record("shutdown_http_pool"))
+    monkeypatch.setattr(combined_app, "start_event_bus", lambda: record("start_event_bus"))
+    monkeypatch.setattr(combined_app, "stop_event_bus", lambda: record("stop_event_bus"))
+
+    async def run():
+        async with combined_app.app.router.lifespan_context(combined_app.app):
+            calls.append("serving")
+
+    asyncio.run(run())
+    assert calls == ["open_worker_state", "start_event_bus", "serving", "stop_event_bus", "shutdown_http_pool"]
+
+
+def test_queue_depth_gauge_reads_the_bus(monkeypatch):
+    monkeypatch.setattr(combined_app.bus, "stats", lambda: {"queue_depth": 7})
+    monkeypatch.setattr(webhook_server.dispatcher, "stats", lambda: {"queue_depth": 3})
+    assert registry.callbacks["notify_queue_depth"]() == 7
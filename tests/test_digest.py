@@ -0,0 +1,37 @@
+import asyncio
+
+from digest import DigestBuffer
+from slack_outbox import SlackOutbox
+
+
+def _item(i):
+    return {"event_type": "push", "title": f"push {i}", "sender": "octocat", "time": "", "delivery_id": f"d{i}",
+            "payload": {"text": f"push {i}"}}
+
+
+def test_inline_flush_wakes_the_sender(tmp_path):
+    outbox = SlackOutbox(tmp_path / "outbox.sqlite3", workers=1)
+    digest = DigestBuffer(outbox, window=30, max_events=3)
+    woken = []
+    outbox.wake = lambda: woken.append(True)
+
+    assert not digest.add("https://hooks.slack/x", "acme/widgets", "main", _item(0))
+    assert digest.add("https://hooks.slack/x", "acme/widgets", "main", _item(1))
+    assert digest.add("https://hooks.slack/x", "acme/widgets", "main", _item(2))
+    assert not woken
+    assert digest.add("https://hooks.slack/x", "acme/widgets", "main", _item(3))
+    assert woken == [True]
+    outbox.close()
+
+
+def test_wake_from_an_executor_thread_reaches_idle_workers(tmp_path):
+    outbox = SlackOutbox(tmp_path / "outbox.sqlite3", workers=1, poll_interval=30)
+
+    async def run():
+        outbox._wake = asyncio.Event()
+        outbox._loop = asyncio.get_running_loop()
+        await asyncio.get_running_loop().run_in_executor(None, outbox.wake)
+        await asyncio.wait_for(outbox._wake.wait(), 1)
+
+    asyncio.run(run())
+    outbox.close()
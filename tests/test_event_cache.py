@@ -0,0 +1,36 @@
+import shutil
+
+from event_cache import EventCache, SeqList
+from event_store import EventStore
+
+
+def test_seq_list_bisects_after_eviction():
+    seqs = SeqList()
+    for seq in range(1, 301, 3):
+        seqs.append(seq)
+    for _ in range(80):
+        seqs.popleft()
+    assert len(seqs) == 20
+    assert list(seqs)[0] == 241
+    assert list(seqs.ascending_from(250))[:2] == [250, 253]
+    assert list(seqs.descending_from(250))[:2] == [250, 247]
+    assert list(seqs.descending_from(100)) == []
+
+
+def test_cache_resets_when_the_store_restarts(tmp_path):
+    directory = tmp_path / "log"
+    writer = EventStore(directory, import_legacy=False)
+    for i in range(5):
+        writer.append({"timestamp": "2024-05-01T10:00:00+05:30", "event_type": "push", "title": f"old {i}"})
+    writer.close()
+    cache = EventCache(EventStore(directory, readonly=True))
+    assert len(cache) == 5
+
+    shutil.rmtree(directory)
+    writer = EventStore(directory, import_legacy=False)
+    for i in range(2):
+        writer.append({"timestamp": "2024-05-02T10:00:00+05:30", "event_type": "issues", "title": f"new {i}"})
+    writer.close()
+
+    assert [e["title"] for _, e in cache.query(since=0)] == ["new 0", "new 1"]
+    assert cache.counts("event_type") == {"issues": 2}
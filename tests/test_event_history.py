@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+import github
+from archive import Archive
+from event_cache import EventCache
+from event_store import EventStore
+
+START = pytz.timezone("Asia/Kolkata").localize(datetime(2024, 5, 1, 10, 0))
+
+
+def _event(i):
+    return {"timestamp": (START + timedelta(minutes=i)).isoformat(), "event_type": "push",
+            "repository": {"full_name": "acme/widgets"}, "title": f"event {i}", "delivery_id": f"d{i}"}
+
+
+def test_events_in_both_tiers_are_returned_once(tmp_path, monkeypatch):
+    archive = Archive(tmp_path / "archive")
+    # retention archived events 0-4 while the live cache still holds 3-4
+    archive.retire(1, [_event(i) for i in range(5)])
+    store = EventStore(tmp_path / "log", import_legacy=False)
+    for i in range(3, 8):
+        store.append(_event(i))
+    store.close()
+    cache = EventCache(store)
+    monkeypatch.setattr(github, "get_archive", lambda: archive)
+    monkeypatch.setattr(github, "get_event_cache", lambda: cache)
+
+    for oldest_first in (False, True):
+        page = github.query_event_history(START.isoformat(), limit=50, oldest_first=oldest_first, fields=["title"])
+        assert [e["title"] for e in page["events"]] == [f"event {i}" for i in range(8)]
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import github
+from event_cache import EventCache
+from event_store import EventStore
+
+START = pytz.timezone("Asia/Kolkata").localize(datetime(2024, 5, 1, 10, 0))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    store = EventStore(tmp_path / "log")
+    first = None
+    for i in range(23):
+        seq = store.append({"timestamp": (START + timedelta(minutes=i)).isoformat(), "event_type": "push",
+                            "repository": {"full_name": "acme/widgets" if i % 2 else "acme/gadgets"},
+                            "sender": "octocat", "title": f"event {i}"})
+        first = first or seq
+    store.close()
+    cache = EventCache(store)
+    cache.first = first
+    monkeypatch.setattr(github, "get_event_cache", lambda: cache)
+    return cache
+
+
+def _titles(page):
+    return [event["title"] for event in page["events"]]
+
+
+def test_pages_backwards_with_before(cache):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = github.query_events(repo="acme/widgets", before=cursor, limit=3, fields=["seq", "title"])
+        seen = _titles(page) + seen
+        cursor = page["next_cursor"]
+        pages += 1
+        if not page["has_more"]:
+            break
+    assert seen == [f"event {i}" for i in range(1, 23, 2)]
+    assert pages == 4
+
+
+def test_pages_forwards_with_since(cache):
+    seen, cursor, pages = [], cache.first - 1, 0
+    while True:
+        page = github.query_events(since=cursor, limit=5, fields=["seq", "title"])
+        seen += _titles(page)
+        cursor = page["next_cursor"]
+        pages += 1
+        if not page["has_more"]:
+            break
+    assert seen == [f"event {i}" for i in range(23)]
+    assert pages == 5
+
+
+def test_exactly_full_last_page_has_no_more(cache):
+    page = github.query_events(since=cache.first - 1 + 20, limit=3)
+    assert len(page["events"]) == 3
+    assert page["has_more"] is False
+
+
+def test_end_time_is_bisected(cache):
+    end = (START + timedelta(minutes=9)).isoformat()
+    newest = cache.query(end=end, limit=3)
+    assert [e["title"] for _, e in newest] == ["event 7", "event 8", "event 9"]
+    window = cache.query(since=0, start=(START + timedelta(minutes=4)).isoformat(), end=end, limit=50)
+    assert [e["title"] for _, e in window] == [f"event {i}" for i in range(4, 10)]
+
+
+def test_end_time_keeps_late_events(tmp_path):
+    store = EventStore(tmp_path / "log")
+    for minutes in (0, 10, 20, 5, 30):
+        store.append({"timestamp": (START + timedelta(minutes=minutes)).isoformat(), "event_type": "push",
+                      "title": f"at {minutes}"})
+    store.close()
+    found = EventCache(store).query(since=0, end=(START + timedelta(minutes=6)).isoformat())
+    assert [e["title"] for _, e in found] == ["at 0", "at 5"]
@@ -0,0 +1,20 @@
+from event_store import EventStore
+
+
+def test_sync_if_due_flushes_the_tail_of_a_burst(tmp_path, monkeypatch):
+    store = EventStore(tmp_path / "log", import_legacy=False, fsync_every=32, fsync_interval=0.5)
+    synced = []
+    monkeypatch.setattr("event_store.os.fsync", lambda fd: synced.append(fd))
+    clock = [1000.0]
+    monkeypatch.setattr("event_store.time.monotonic", lambda: clock[0])
+    store._last_sync = clock[0]
+    for i in range(5):
+        store.append({"event_type": "push", "title": str(i)})
+    assert store._unsynced == 5 and not synced
+
+    assert not store.sync_if_due()
+    clock[0] += 1
+    assert store.sync_if_due()
+    assert store._unsynced == 0 and len(synced) == 2
+    assert not store.sync_if_due()
+    store.close()
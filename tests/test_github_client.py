@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+import github_client
+from github_client import GitHubClient
+
+
+def _exhausted(reset_in):
+    client = GitHubClient(base_url="http://127.0.0.1:9", token="test", max_wait=5)
+    client.rate_limit.update(limit=5000, remaining=0, reset=int(time.time() + reset_in))
+    return client
+
+
+def test_long_rate_limit_wait_fails_fast():
+    client = _exhausted(600)
+    started = time.monotonic()
+    response = client.request("PUT", "repos/acme/widgets/pulls/7/merge")
+    assert time.monotonic() - started < 1
+    assert response.status == 429
+    assert "rate limit" in response.message()
+    assert int(response.headers["Retry-After"]) >= 599
+    assert client.counters["rate_limited"] == 1
+
+    response = asyncio.run(client.arequest("GET", "repos/acme/widgets/pulls/7"))
+    assert response.status == 429
+
+
+def test_rate_limit_gauge_without_responses(monkeypatch):
+    monkeypatch.setattr(github_client, "_client", GitHubClient(token="test"))
+    with pytest.raises(LookupError):
+        github_client._rate_limit_remaining()
+    github_client._client.rate_limit["remaining"] = 42
+    assert github_client._rate_limit_remaining() == 42
+
+
+def test_writes_invalidate_whole_path_segments():
+    client = GitHubClient(base_url="http://127.0.0.1:9", token="test")
+    urls = [client.url(p) for p in ("repos/acme/widgets", "repos/acme/widgetsbc", "repos/acme/widgets/pulls/7",
+                                    "repos/acme/widgets/pulls/70", "repos/acme/widgets/pulls?state=open")]
+    for url in urls:
+        client._record(url, "GET", 200, {}, {"ETag": '"x"'}, time.perf_counter())
+
+    client._record(client.url("repos/acme/widgets/pulls/7/merge"), "PUT", 200, {}, {}, time.perf_counter())
+    assert client.url("repos/acme/widgets/pulls/7") not in client._cache
+    assert set(client._cache) == set(urls) - {client.url("repos/acme/widgets/pulls/7")}
+
+    client._record(client.url("repos/acme/widgets"), "PATCH", 200, {}, {}, time.perf_counter())
+    assert list(client._cache) == [client.url("repos/acme/widgetsbc")]
@@ -0,0 +1,43 @@
+import pytest
+
+from intent_router import is_github_question, match_intent
+
+
+@pytest.mark.parametrize("text, tool", [
+    ("What's the latest event?", "summarize_latest_event"),
+    ("show me the most recent github event", "summarize_latest_event"),
+    ("latest event", "summarize_latest_event"),
+    ("what just happened on github?", "summarize_latest_event"),
+    ("repo summary", "get_repository_detail"),
+    ("Give me the repository details.", "get_repository_detail"),
+    ("summarize the repo", "get_repository_detail"),
+    ("details of PR 4 in acme/widgets", "get_pull_request_details"),
+    ("status of the workflow deploy", "get_workflow_status"),
+])
+def test_single_questions_take_the_fast_path(text, tool):
+    assert match_intent(text)[0] == tool
+
+
+@pytest.mark.parametrize("text", [
+    "Send the latest event to the team on slack",
+    "Post the repo summary to slack and then merge PR 4 in a/b",
+    "details of PR 4 in acme/widgets and merge it if it is green",
+])
+def test_compound_requests_go_to_the_llm(text):
+    assert match_intent(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "list all repositories",
+    "what was committed yesterday?",
+    "who is merging the release branch",
+    "which PRs merged today",
+    "show the tagged builds",
+])
+def test_github_questions(text):
+    assert is_github_question(text)
+
+
+@pytest.mark.parametrize("text", ["improve this prompt", "can you approve my leave", "print hello"])
+def test_non_github_questions(text):
+    assert not is_github_question(text)
@@ -0,0 +1,40 @@
+import asyncio
+import uuid
+
+import pytest
+
+import notify_server
+from dedupe import DeliveryDedupe
+
+
+def _payload():
+    return {"event_type": "push", "repository": {"full_name": "acme/widgets"}, "branch": "main",
+            "sender": "octocat", "title": "1 commits pushed", "delivery_id": uuid.uuid4().hex}
+
+
+def test_failed_enqueue_releases_the_claim(monkeypatch):
+    attempts = []
+
+    async def send(**kwargs):
+        attempts.append(kwargs["key"])
+        if len(attempts) == 1:
+            raise RuntimeError("outbox unavailable")
+        return "✅ Message queued for slack."
+
+    monkeypatch.setattr(notify_server, "send_slack_notification_async", send)
+    payload = _payload()
+    with pytest.raises(RuntimeError):
+        asyncio.run(notify_server.process_notification(payload))
+    # the dispatcher's retry is delivered, and a real duplicate after it is still dropped
+    assert asyncio.run(notify_server.process_notification(payload)) == {"status": "queued for slack"}
+    assert asyncio.run(notify_server.process_notification(payload))["status"] == "Ignored duplicate delivery"
+    assert len(attempts) == 2
+
+
+def test_lost_claim_does_not_remember_other_keys(tmp_path):
+    first = DeliveryDedupe(tmp_path / "dedupe.sqlite3")
+    second = DeliveryDedupe(tmp_path / "dedupe.sqlite3")
+    assert first.claim("delivery:a")
+    assert not second.claim("delivery:a", "pr:acme/widgets#7:opened")
+    assert "pr:acme/widgets#7:opened" not in second._local
+    assert second.claim("pr:acme/widgets#7:opened")
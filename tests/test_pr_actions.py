@@ -0,0 +1,71 @@
+import asyncio
+
+import notify_server
+from shared_flight import SharedSingleFlight
+
+
+def _patch(monkeypatch, tmp_path, results):
+    calls, replies, ephemeral = [], [], []
+
+    async def merge(repo, pr_number):
+        calls.append((repo, pr_number))
+        return results.pop(0)
+
+    async def reply(response_url, text, repo, pr_number):
+        replies.append(text)
+
+    async def post(url, payload):
+        ephemeral.append(payload["text"])
+
+    shared = SharedSingleFlight(tmp_path / "actions.sqlite3", ttl=30)
+    monkeypatch.setattr(notify_server, "merge_pull_request_async", merge)
+    monkeypatch.setattr(notify_server, "reply_to_interaction", reply)
+    monkeypatch.setattr(notify_server, "post_slack_message", post)
+    monkeypatch.setattr(notify_server, "get_shared_flight", lambda ttl: shared)
+    monkeypatch.setattr(notify_server, "pr_actions", notify_server.SingleFlight(ttl=30))
+    return calls, replies, ephemeral
+
+
+def test_failed_merge_is_not_cached(monkeypatch, tmp_path):
+    calls, replies, ephemeral = _patch(monkeypatch, tmp_path, [
+        "❌ Failed to merge PR #7 in acme/widgets. Reason: Base branch was modified",
+        "✅ Successfully merged PR #7 in acme/widgets.",
+    ])
+
+    async def clicks():
+        await notify_server.run_pr_action("merge_action", "acme/widgets", 7, "https://hooks.slack/r1")
+        await notify_server.run_pr_action("merge_action", "acme/widgets", 7, "https://hooks.slack/r2")
+
+    asyncio.run(clicks())
+    assert len(calls) == 2
+    assert replies[0].startswith("❌ Failed to merge")
+    assert replies[1].startswith("✅ Successfully merged")
+    assert not ephemeral
+
+
+def test_successful_merge_is_shared(monkeypatch, tmp_path):
+    calls, replies, ephemeral = _patch(monkeypatch, tmp_path, ["✅ Successfully merged PR #7 in acme/widgets."])
+
+    async def clicks():
+        await notify_server.run_pr_action("merge_action", "acme/widgets", 7, "https://hooks.slack/r1")
+        await notify_server.run_pr_action("merge_action", "acme/widgets", 7, "https://hooks.slack/r2")
+
+    asyncio.run(clicks())
+    assert len(calls) == 1
+    assert replies == ["✅ Successfully merged PR #7 in acme/widgets."]
+    assert ephemeral == ["Already handled: ✅ Successfully merged PR #7 in acme/widgets."]
+
+
+def test_collapsed_clicks_on_a_failure_post_it_once(monkeypatch, tmp_path):
+    calls, replies, ephemeral = _patch(monkeypatch, tmp_path, [
+        "❌ Failed to merge PR #7 in acme/widgets. Reason: Pull Request is not mergeable",
+    ])
+
+    async def clicks():
+        await asyncio.gather(*(notify_server.run_pr_action("merge_action", "acme/widgets", 7, f"https://hooks.slack/r{i}")
+                               for i in range(3)))
+
+    asyncio.run(clicks())
+    assert len(calls) == 1
+    assert len(replies) == 1 and replies[0].startswith("❌ Failed to merge")
+    assert len(ephemeral) == 2 and all(text.startswith("❌ Failed to merge") for text in ephemeral)
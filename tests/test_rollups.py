@@ -0,0 +1,66 @@
+import json
+import threading
+
+from event_store import EventStore
+from event_cache import EventCache
+from rollups import Rollups, RollupReader, RollupWriter
+
+
+def _event(i):
+    return {"timestamp": f"2024-05-01T10:{i % 60:02d}:00+05:30", "event_type": "push",
+            "repository": {"full_name": "acme/widgets"}, "sender": "octocat", "action": None}
+
+
+def test_seq_is_a_low_water_mark():
+    rollups = Rollups()
+    for seq in (1, 2, 4, 5):
+        rollups.add(_event(seq), seq)
+    assert (rollups.seq, rollups.ahead, rollups.total) == (2, {4, 5}, 4)
+    rollups.add(_event(3), 3)
+    assert (rollups.seq, rollups.ahead, rollups.total) == (5, set(), 5)
+    rollups.add(_event(4), 4)
+    assert rollups.total == 5
+
+
+def test_out_of_order_seqs_survive_save_and_load(tmp_path):
+    store = EventStore(tmp_path / "log", import_legacy=False)
+    writer = RollupWriter(store)
+    seqs = [store.append(_event(i)) for i in range(4)]
+    # the append of seqs[2] is still running in the executor when the snapshot is taken
+    for seq in (seqs[0], seqs[1], seqs[3]):
+        writer.add(_event(seq), seq)
+    writer.save()
+
+    reloaded = RollupWriter(store)
+    assert reloaded.rollups.total == 4
+    assert reloaded.rollups.seq == seqs[3]
+
+    reader = RollupReader(EventCache(store))
+    assert reader.current().total == 4
+    store.close()
+
+
+def test_concurrent_saves_write_a_complete_snapshot(tmp_path):
+    store = EventStore(tmp_path / "log", import_legacy=False)
+    writer = RollupWriter(store)
+    errors = []
+
+    def work(start):
+        try:
+            for i in range(start, start + 200):
+                writer.rollups.add(_event(i), i)
+                writer.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n * 200 + 1,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+
+    assert not errors
+    snapshot = json.loads(writer.path.read_text())
+    assert snapshot["seq"] == 800
+    assert snapshot["total"] == 800
@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from notify_server import PRActionFailed
+from shared_flight import SharedSingleFlight
+
+
+def _workers(tmp_path):
+    first = SharedSingleFlight(tmp_path / "actions.sqlite3", ttl=30, poll_interval=0.01)
+    second = SharedSingleFlight(tmp_path / "actions.sqlite3", ttl=30, poll_interval=0.01)
+    second.pid = first.pid + 1  # stands in for another worker process
+    return first, second
+
+
+def test_failed_leader_is_not_recorded(tmp_path):
+    first, second = _workers(tmp_path)
+    calls = []
+
+    async def merge(outcome):
+        calls.append(outcome)
+        await asyncio.sleep(0.05)
+        if outcome == "fail":
+            raise PRActionFailed("❌ Failed to merge PR #7 in acme/widgets. Reason: Not Found")
+        return "✅ Successfully merged PR #7 in acme/widgets."
+
+    async def clicks():
+        leader = asyncio.create_task(first.do(("acme/widgets", 7, "merge_action"), ("acme/widgets", 7), merge, "fail"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(second.do(("acme/widgets", 7, "merge_action"), ("acme/widgets", 7), merge, "ok"))
+        with pytest.raises(PRActionFailed):
+            await leader
+        return await follower
+
+    result, ran_here = asyncio.run(clicks())
+    # the other worker waited for the lease, found no result and ran the action itself
+    assert calls == ["fail", "ok"]
+    assert (result, ran_here) == ("✅ Successfully merged PR #7 in acme/widgets.", True)
+
+    db = sqlite3.connect(tmp_path / "actions.sqlite3")
+    assert db.execute("SELECT COUNT(*) FROM leases").fetchone() == (0,)
+    assert db.execute("SELECT COUNT(*) FROM results").fetchone() == (1,)
+
+
+def test_failure_leaves_no_result_for_other_workers(tmp_path):
+    first, second = _workers(tmp_path)
+
+    async def fail():
+        raise PRActionFailed("❌ Failed to close PR: 401 - Bad credentials")
+
+    async def ok():
+        return "✅ Closed pull request #7 in acme/widgets"
+
+    async def clicks():
+        with pytest.raises(PRActionFailed):
+            await first.do(("acme/widgets", 7, "cancel_action"), ("acme/widgets", 7), fail)
+        return await second.do(("acme/widgets", 7, "cancel_action"), ("acme/widgets", 7), ok)
+
+    assert asyncio.run(clicks()) == ("✅ Closed pull request #7 in acme/widgets", True)
@@ -0,0 +1,36 @@
+import asyncio
+import sqlite3
+
+from slack_outbox import SlackOutbox
+
+
+def test_worker_survives_database_errors(tmp_path):
+    outbox = SlackOutbox(tmp_path / "outbox.sqlite3", workers=1, poll_interval=0.01)
+    claims = [sqlite3.OperationalError("database is locked"), {"id": 1}, None]
+    delivered = []
+
+    def claim():
+        item = claims.pop(0) if claims else None
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def deliver(item):
+        delivered.append(item["id"])
+
+    outbox._claim = claim
+    outbox._deliver = deliver
+
+    async def run():
+        await outbox.start()
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        alive = not outbox._tasks[0].done()
+        await outbox.stop()
+        return alive
+
+    assert asyncio.run(run())
+    assert delivered == [1]
+    outbox.close()
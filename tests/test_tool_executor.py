@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+import tool_executor
+from metrics import registry
+from tool_executor import execute_tool_calls
+
+
+def _abandoned(name):
+    return registry.gauges.get(("tool_abandoned", (("tool", name),)), 0)
+
+
+def test_timed_out_call_is_reported_as_still_running(monkeypatch):
+    monkeypatch.setattr(tool_executor, "TOOL_TIMEOUTS", {"slow": 0.1})
+    release, finished = threading.Event(), threading.Event()
+
+    def slow():
+        release.wait(5)
+        finished.set()
+        return "merged"
+
+    [message] = execute_tool_calls([{"name": "slow", "id": "1", "args": {}}], {"slow": slow})
+    assert "still running" in message.content
+    assert _abandoned("slow") == 1
+
+    release.set()
+    assert finished.wait(5)
+    deadline = time.monotonic() + 5
+    while _abandoned("slow") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _abandoned("slow") == 0
+
+
+def test_call_that_never_got_a_slot_is_not_run(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(tool_executor, "_slots", slots)
+    monkeypatch.setattr(tool_executor, "TOOL_TIMEOUTS", {"queued": 0.1})
+    ran = []
+
+    def queued():
+        ran.append(True)
+        return "ran"
+
+    slots.acquire()  # every slot busy
+    [message] = execute_tool_calls([{"name": "queued", "id": "1", "args": {}}], {"queued": queued})
+    assert "was not run" in message.content
+    slots.release()
+    time.sleep(0.2)
+    assert ran == []
+    assert slots.acquire(blocking=False)
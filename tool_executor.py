@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from conversation_memory import compact_tool_content
+from metrics import observe_tool, registry
+
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", 8))
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", 20))
+# threads for calls that outlived their timeout: a thread cannot be interrupted, so a
+# timed-out call keeps running (and keeps its thread) until the tool returns
+TOOL_ABANDONED_SLOTS = int(os.environ.get("TOOL_ABANDONED_SLOTS", TOOL_MAX_CONCURRENCY))
+# per-tool overrides for calls known to be slower or faster than the default
+TOOL_TIMEOUTS = {
+    "merge_pull_request": 30.0,
+    "get_recent_actions_events": 5.0,
+    "query_events": 5.0,
+    "get_repository_detail": 5.0,
+    "get_event_stats": 5.0,
+    "summarize_latest_event": 5.0,
+    "get_workflow_status": 5.0,
+    "get_workflow_duration_stats": 5.0,
+}
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_CONCURRENCY + TOOL_ABANDONED_SLOTS, thread_name_prefix="tool")
+# caps calls someone is still waiting for; an abandoned call gives its slot back early
+_slots = threading.BoundedSemaphore(TOOL_MAX_CONCURRENCY)
+
+
+class _Call:
+    __slots__ = ("name", "state", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "queued"  # -> running -> done, or -> abandoned
+        self.lock = threading.Lock()
+
+    def abandon(self) -> str:
+        """Stop waiting for the call; returns the state it was in."""
+        with self.lock:
+            state = self.state
+            if state in ("queued", "running"):
+                self.state = "abandoned"
+            if state == "running":
+                _slots.release()
+                registry.gauge_add("tool_abandoned", 1, tool=self.name)
+            return state
+
+
+def _run(call: _Call, fn, args: dict):
+    _slots.acquire()
+    with call.lock:
+        if call.state == "abandoned":
+            # timed out while waiting for a slot; never started
+            _slots.release()
+            return None
+        call.state = "running"
+    name = call.name
+    registry.gauge_add("tool_in_flight", 1, tool=name)
+    started = time.perf_counter()
+    ok = True
+    try:
+        return fn(**args)
+    except Exception as e:
+        ok = False
+        return f"Error: {e}"
+    finally:
+        registry.gauge_add("tool_in_flight", -1, tool=name)
+        observe_tool(name, time.perf_counter() - started, ok)
+        with call.lock:
+            if call.state == "abandoned":
+                registry.gauge_add("tool_abandoned", -1, tool=name)
+            else:
+                call.state = "done"
+                _slots.release()
+
+
+def execute_tool_calls(tool_calls: list, tools: dict) -> list:
+    """Run an LLM turn's tool calls concurrently and return ToolMessages in call order.
+
+    At most TOOL_MAX_CONCURRENCY calls run at once (shared across the process); a
+    call that exceeds its timeout yields an error message instead of holding up
+    the turn, so a turn takes about as long as its slowest call. A timed-out call
+    that had started cannot be cancelled: it finishes in the background on one of
+    TOOL_ABANDONED_SLOTS spare threads (the `tool_abandoned` gauge) and its result
+    is dropped. Oversized results are truncated to a handle (see conversation_memory).
+    """
+    from langchain_core.messages import ToolMessage
+
+    started = time.monotonic()
+    pending = []
+    for t in tool_calls:
+        fn = tools.get(t["name"])
+        call = _Call(t["name"])
+        future = _executor.submit(_run, call, fn, t.get("args") or {}) if fn else None
+        pending.append((t, call, future))
+
+    results = []
+    for t, call, future in pending:
+        if future is None:
+            content = f"Error: unknown tool {t['name']}"
+        else:
+            timeout = TOOL_TIMEOUTS.get(t["name"], TOOL_TIMEOUT)
+            try:
+                content = future.result(timeout=max(0.0, started + timeout - time.monotonic()))
+            except FutureTimeout:
+                state = call.abandon()
+                if state != "done":
+                    registry.inc("tool_timeouts_total", tool=t["name"])
+                if state == "done":
+                    # finished just as we gave up
+                    content = future.result()
+                elif state == "running":
+                    content = (f"Error: {t['name']} did not finish within {timeout:g}s; it is still running "
+                               f"and may yet take effect, so check its outcome before retrying")
+                else:
+                    future.cancel()
+                    content = f"Error: {t['name']} timed out after {timeout:g}s waiting for a free tool slot; it was not run"
+        results.append(ToolMessage(tool_call_id=t["id"], name=t["name"], content=compact_tool_content(str(content))))
+    return results
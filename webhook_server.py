@@ -1,145 +1,227 @@
-import json
 from datetime import datetime
-from pathlib import Path
-from aiohttp import web, ClientSession
+from aiohttp import web
 import asyncio
 import pytz
+from event_store import EventStore
+from archive import EVENT_ARCHIVE, get_archive
+from event_schema import slim_repository
+from notify_dispatcher import NotifyDispatcher
+from rollups import RollupWriter
+from workflow_index import extract_workflow
+from metrics import registry, render_metrics, spans, stage
+from routing import get_rules, route_fields
+from payload_parser import MAX_WEBHOOK_BYTES, STREAM_THRESHOLD, PayloadTooLarge, parse_webhook
+
+# segments dropped by retention move to the compressed archive instead of being deleted
+event_store=EventStore(on_retire=get_archive().retire if EVENT_ARCHIVE else None)
+rollup_writer=RollupWriter(event_store)
+dispatcher=NotifyDispatcher()
+
+def build_event(event_type,data,delivery_id=None):
+    """Normalize a GitHub webhook payload into a stored event (routing has already accepted it)."""
+    repo = data.get("repository", {})
+    repo_full_name = repo.get("full_name")
+    pr_number=data.get("pull_request",{}).get("number")
+    title=''
+    description=''
+    sender=data.get("sender",{}).get("login")
+    branch_name = None
+    base_branch = None
+    compare_branch = None
+    workflow = None
+    if event_type == "pull_request":
+        pr = data.get("pull_request")
+        if pr:
+            base_branch = pr.get("base", {}).get("ref")
+            print("base_brach: ",base_branch)
+            compare_branch = pr.get("head", {}).get("ref")
+            print("compare_branch: ",compare_branch)
+            branch_name = base_branch
+    elif event_type == "push":
+        ref = data.get("ref", "")
+        if ref:
+            branch_name = ref.split("/")[-1]
+    elif event_type == "create" or event_type == "delete":
+        branch_name = data.get("ref", None)
+
+    if event_type == 'pull_request':
+        action=data.get("action")
+        pr = data.get("pull_request")
+        if pr:
+            title = pr.get("title", "")
+            description = pr.get("body", "")
+            pr_number = pr.get("number")
+        else:
+            print("pull_request key not found in payload")
 
-EVENTS_FILE=Path(__file__).parent / "github_events.json"
-
-async def notify_manager(event):
-    async with ClientSession() as session:
-        try:
-            async with session.post("http://localhost:8001/notify",json=event, timeout=5) as rep:
-                if rep.status !=200:
-                    print(f"Notify failed with status {rep.status}")
-        except Exception as notify_error:
-            print(F"Failed to notify manager agent:{notify_error}")
-
+        repo = data.get("repository")
+        if repo:
+            repo_full_name = repo.get("full_name")
+            # print("Extracted repo_full_name:", repo_full_name)
+        else:
+            print("repository key not found in payload")
+        if action=="closed":
+            message=f"Pull Request #{pr_number} '{title}' was closed by {sender} in repository {repo_full_name}."
+            print("Detected PR closed event: ",message)
+        elif action=="opened":
+            message=f"Pull Request #{pr_number} '{title}' was opened by {sender} in repository {repo_full_name}."
+        else:
+            message=f"Pull Request #{pr_number} '{title}' received action '{action}' by {sender}."
+        
 
 
+    elif event_type=='issues':
+        issue=data.get("issue",{})
+        title=issue.get("title",'')
+        description=issue.get("body",'')
+    elif event_type=='push':
+        commits=data.get('commits',[])
+        if commits:
+            total=data.get("commits_total",len(commits))
+            title=f"{total} commits pushed"
+            description="\n".join(commit.get("message",'') for commit in commits)
+            if total>len(commits):
+                description+=f"\n…and {total-len(commits)} more commits"
+            print(f"Received push event :{title} on branch {branch_name} by {sender}")
+    elif event_type=='release':
+        release=data.get("release",{})
+        title=release.get("name",release.get("tag_name",""))
+        description=release.get("body",'')
+    elif event_type=="create":
+        ref_type=data.get("ref_type","")
+        ref=data.get("ref","")
+        title=f"Created {ref_type}: {ref}"
+        description=""
+    elif event_type=="delete":
+        ref_type=data.get("ref_type","")
+        ref=data.get("ref","")
+        title=f"Deleted {ref_type}: {ref}"
+        description=""
+    elif event_type in ("workflow_run","workflow_job"):
+        workflow=extract_workflow(event_type,data)
+        title=f"{workflow.get('name','')}: {workflow.get('conclusion') or workflow.get('status','')}"
+        description=f"{workflow.get('kind')} {workflow.get('run_id')} on {workflow.get('branch')}"
+        branch_name=workflow.get("branch")
+    else:
+        title=data.get("title","")
+        description=data.get("body","")
+
+
+    ist_now=datetime.now(pytz.timezone("Asia/Kolkata")).isoformat()
+    event={
+        "timestamp":ist_now,
+        "event_type":event_type,
+        "action":data.get("action"),
+        "repository": slim_repository(data.get("repository", {})),
+        "pr_number":pr_number,
+        "title":title,
+        "description":description,
+        "sender":data.get("sender",{}).get("login"),
+        "base_branch":base_branch,
+        "compare_branch":compare_branch,
+        "branch":branch_name,
+        "delivery_id":delivery_id,
+        "workflow":workflow
+    }
+    return event
+
+
+async def parse_body(raw,delivery_id):
+    """Selected fields of a raw webhook body; large bodies are parsed off the event loop."""
+    with stage("json_parse",delivery_id,size=len(raw)):
+        if len(raw)<STREAM_THRESHOLD:
+            return parse_webhook(raw)
+        return await asyncio.get_running_loop().run_in_executor(None,parse_webhook,raw)
+
+
+def _saved(future):
+    if not future.cancelled() and future.exception() is not None:
+        registry.inc("rollup_save_errors_total")
+        print("❌ Rollup snapshot failed:",repr(future.exception()))
+
+
+async def ingest(event_type,data,delivery_id,sink):
+    """Route, persist and hand an event to `sink` (the /notify dispatcher or the in-process bus)."""
+    registry.inc("webhook_events_total",event_type=event_type)
+    with stage("route",delivery_id):
+        repo,branch,action=route_fields(event_type,data)
+        decision=get_rules().route(event_type,repo,branch,action)
+    registry.inc("webhook_routed_total",route=decision.route)
+    if decision.route=="drop":
+        registry.inc("webhook_ignored_total",event_type=event_type)
+        return {"status": "ignored","rule":decision.rule}
+    with stage("build_event",delivery_id,event_type=event_type):
+        event=build_event(event_type,data,delivery_id)
+    loop=asyncio.get_running_loop()
+    # O(1) append; run off the event loop since a batched fsync may land on this call
+    with stage("persist",delivery_id):
+        seq=await loop.run_in_executor(None,event_store.append,event)
+    with stage("rollup",delivery_id):
+        if rollup_writer.add(event,seq):
+            loop.run_in_executor(None,rollup_writer.save).add_done_callback(_saved)
+    if decision.route=="store":
+        return {"status":"stored","rule":decision.rule}
+    sink.submit(event)
+    return {"status":"received"}
 
 
 async def handle_webhook(request):
+    delivery_id=request.headers.get("X-GitHub-Delivery")
     try:
-        data=await request.json()
-        event_type=request.headers.get("X-GitHub-Event","unknown")
-        repo = data.get("repository", {})
-        repo_full_name = repo.get("full_name")
-        pr_number=data.get("pull_request",{}).get("number")
-        title=''
-        description=''
-        sender=data.get("sender",{}).get("login")
-        branch_name = None
-        base_branch = None
-        compare_branch = None
-        if event_type == "pull_request":
-            pr = data.get("pull_request")
-            if pr:
-                base_branch = pr.get("base", {}).get("ref")
-                print("base_brach: ",base_branch)
-                compare_branch = pr.get("head", {}).get("ref")
-                print("compare_branch: ",compare_branch)
-                branch_name = base_branch
-        elif event_type == "push":
-            ref = data.get("ref", "")
-            if ref:
-                branch_name = ref.split("/")[-1]
-        elif event_type == "create" or event_type == "delete":
-            branch_name = data.get("ref", None)
-
-        if branch_name and branch_name.lower() != "main":
-            print(f"Skipping event for non-main branch: {branch_name}")
-            return web.json_response({"status": "ignored"})
-
-        if event_type == 'pull_request':
-            action=data.get("action")
-            pr = data.get("pull_request")
-            if pr:
-                title = pr.get("title", "")
-                description = pr.get("body", "")
-                pr_number = pr.get("number")
-            else:
-                print("pull_request key not found in payload")
-
-            repo = data.get("repository")
-            if repo:
-                repo_full_name = repo.get("full_name")
-                # print("Extracted repo_full_name:", repo_full_name)
-            else:
-                print("repository key not found in payload")
-            if action=="closed":
-                message=f"Pull Request #{pr_number} '{title}' was closed by {sender} in repository {repo_full_name}."
-                print("Detected PR closed event: ",message)
-            elif action=="opened":
-                message=f"Pull Request #{pr_number} '{title}' was opened by {sender} in repository {repo_full_name}."
-            else:
-                message=f"Pull Request #{pr_number} '{title}' received action '{action}' by {sender}."
-            
-
-
-        elif event_type=='issues':
-            issue=data.get("issue",{})
-            title=issue.get("title",'')
-            description=issue.get("body",'')
-        elif event_type=='push':
-            commits=data.get('commits',[])
-            if commits:
-                title=f"{len(commits)} commits pushed"
-                description="\n".join(commit.get("message",'') for commit in commits)
-                print(f"Received push event :{title} on branch {branch_name} by {sender}")
-        elif event_type=='release':
-            release=data.get("release",{})
-            title=release.get("name",release.get("tag_name",""))
-            description=release.get("body",'')
-        elif event_type=="create":
-            ref_type=data.get("ref_type","")
-            ref=data.get("ref","")
-            title=f"Created {ref_type}: {ref}"
-            description=""
-        elif event_type=="delete":
-            ref_type=data.get("ref_type","")
-            ref=data.get("ref","")
-            title=f"Deleted {ref_type}: {ref}"
-            description=""
-        else:
-            title=data.get("title","")
-            description=data.get("body","")
-
-
-        ist_now=datetime.now(pytz.timezone("Asia/Kolkata")).isoformat()
-        event={
-            "timestamp":ist_now,
-            "event_type":event_type,
-            "action":data.get("action"),
-            "repository": data.get("repository", {}),
-            "pr_number":pr_number,
-            "title":title,
-            "description":description,
-            "sender":data.get("sender",{}).get("login"),
-            "base_branch":base_branch,
-            "compare_branch":compare_branch
-        }
-        events=[]
-        if EVENTS_FILE.exists():
-            with open(EVENTS_FILE) as f:
-                events=json.load(f)
-        events.append(event)
-        events=events[-100:]
-        with open(EVENTS_FILE,"w") as f:
-            json.dump(events,f,indent=2)
-        
-        asyncio.create_task(notify_manager(event))
-
-        return web.json_response({"status":"received"})
+        with stage("webhook",delivery_id):
+            # client_max_size caps the body at MAX_WEBHOOK_BYTES
+            data=await parse_body(await request.read(),delivery_id)
+            result=await ingest(request.headers.get("X-GitHub-Event","unknown"),data,delivery_id,dispatcher)
+        return web.json_response(result)
+    except (web.HTTPRequestEntityTooLarge,PayloadTooLarge) as e:
+        registry.inc("webhook_too_large_total")
+        return web.json_response({"error":str(e)},status=413)
     except Exception as e:
         return web.json_response({"error":str(e)},status=400)
-    except Exception as e:
-        print("Error parsing payload:", e)
-        return web.Response(status=500, text="Payload parsing failed")
     
-app=web.Application()
+async def notify_stats(request):
+    return web.json_response(dispatcher.stats())
+
+async def metrics_handler(request):
+    return web.Response(text=render_metrics(),content_type="text/plain",charset="utf-8",headers={"X-Content-Type-Options":"nosniff"})
+
+async def trace_handler(request):
+    return web.json_response(spans.trace(request.match_info["delivery_id"]))
+
+async def sync_event_store():
+    """Enforce fsync_interval when no append comes along to trigger the batched fsync."""
+    loop=asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(event_store.fsync_interval)
+        try:
+            await loop.run_in_executor(None,event_store.sync_if_due)
+        except Exception as e:
+            print("❌ Event store fsync failed:",repr(e))
+
+_store_sync=None
+
+async def on_startup(app):
+    global _store_sync
+    get_rules()
+    # registered here, not at import: combined_app imports this module but queues through its own bus
+    registry.gauge_callback("notify_queue_depth",lambda: dispatcher.stats()["queue_depth"],"Events waiting for a /notify worker")
+    await dispatcher.start()
+    _store_sync=asyncio.create_task(sync_event_store())
+
+async def on_cleanup(app):
+    if _store_sync is not None:
+        _store_sync.cancel()
+    await dispatcher.stop()
+    rollup_writer.save()
+    event_store.close()
+
+app=web.Application(client_max_size=MAX_WEBHOOK_BYTES)
 app.router.add_post("/webhook/github",handle_webhook)
+app.router.add_get("/notify/stats",notify_stats)
+app.router.add_get("/metrics",metrics_handler)
+app.router.add_get("/metrics/traces/{delivery_id}",trace_handler)
+app.on_startup.append(on_startup)
+app.on_cleanup.append(on_cleanup)
 
 
 if __name__ =="__main__":
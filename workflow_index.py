@@ -0,0 +1,133 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def extract_workflow(event_type: str, data: dict):
+    """Pull the fields we keep from a workflow_run / workflow_job webhook payload."""
+    if event_type == "workflow_run":
+        run = data.get("workflow_run") or {}
+        started, finished = run.get("run_started_at") or run.get("created_at"), run.get("updated_at")
+        record = {
+            "kind": "run",
+            "name": run.get("name") or (data.get("workflow") or {}).get("name"),
+            "run_id": run.get("id"),
+            "run_number": run.get("run_number"),
+            "trigger": run.get("event"),
+        }
+    elif event_type == "workflow_job":
+        job = data.get("workflow_job") or {}
+        started, finished = job.get("started_at"), job.get("completed_at")
+        record = {
+            "kind": "job",
+            "name": job.get("name"),
+            "workflow_name": job.get("workflow_name"),
+            "run_id": job.get("run_id"),
+            "job_id": job.get("id"),
+        }
+        run = job
+    else:
+        return None
+    record.update({
+        "status": run.get("status"),
+        "conclusion": run.get("conclusion"),
+        "branch": run.get("head_branch"),
+        "started_at": started,
+        "completed_at": finished if run.get("status") == "completed" else None,
+        "url": run.get("html_url"),
+    })
+    start_dt, end_dt = _parse_time(started), _parse_time(record["completed_at"])
+    record["duration_s"] = round((end_dt - start_dt).total_seconds(), 1) if start_dt and end_dt else None
+    return {k: v for k, v in record.items() if v is not None}
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class WorkflowIndex:
+    """Latest status per workflow/job name, with trigram lookup and duration stats.
+
+    Exact (case-insensitive) names are a dict hit. Other queries intersect the
+    trigram posting sets to find names containing the query, and fall back to
+    the best trigram overlap for near-misses and typos.
+    """
+
+    def __init__(self, durations_kept: int = 200):
+        self.durations_kept = durations_kept
+        self._lock = threading.Lock()
+        self.latest = {}
+        self.durations = {}
+        self._grams = {}
+
+    def add(self, record: dict):
+        name = record.get("name")
+        if not name:
+            return
+        key = name.lower()
+        with self._lock:
+            if key not in self.latest:
+                for gram in _trigrams(key):
+                    self._grams.setdefault(gram, set()).add(key)
+            self.latest[key] = record
+            if record.get("duration_s") is not None:
+                self.durations.setdefault(key, deque(maxlen=self.durations_kept)).append(record["duration_s"])
+
+    def resolve(self, query: str):
+        """Best-matching indexed name (lowercase) for `query`, or None."""
+        q = query.strip().lower()
+        with self._lock:
+            if q in self.latest:
+                return q
+            if len(q) >= 3:
+                inner = {q[i:i + 3] for i in range(len(q) - 2)}
+                candidates = set.intersection(*(self._grams.get(g, set()) for g in inner))
+                substring = [name for name in candidates if q in name]
+                if substring:
+                    return min(substring, key=len)
+            grams = _trigrams(q)
+            postings = [self._grams.get(g, ()) for g in grams]
+            scores = {}
+            for posting in postings:
+                for name in posting:
+                    scores[name] = scores.get(name, 0) + 1
+            if not scores:
+                return None
+            best = max(scores, key=lambda n: (scores[n] / len(grams | _trigrams(n)), -len(n)))
+            if scores[best] / len(grams | _trigrams(best)) < 0.3:
+                return None
+            return best
+
+    def status(self, query: str):
+        key = self.resolve(query)
+        return self.latest.get(key) if key else None
+
+    def duration_stats(self, query: str):
+        key = self.resolve(query)
+        if not key:
+            return None
+        with self._lock:
+            samples = sorted(self.durations.get(key, ()))
+        if not samples:
+            return {"name": self.latest[key]["name"], "runs": 0}
+
+        def pct(p):
+            return samples[min(len(samples) - 1, int(round(p * (len(samples) - 1))))]
+
+        return {
+            "name": self.latest[key]["name"],
+            "runs": len(samples),
+            "p50_s": pct(0.5),
+            "p95_s": pct(0.95),
+            "max_s": samples[-1],
+        }